@@ -0,0 +1,179 @@
+"""Async facade over backend/storage.py for use inside the event loop.
+
+Storage calls do blocking file or SQLite I/O and JSON encoding, which
+would stall every other request and SSE stream on the loop. The
+coroutines below run the matching storage function on a bounded thread
+pool instead.
+
+Calls that concern the same conversation run one at a time, in the order
+they were made (asyncio locks wake waiters in FIFO order), so a read
+issued after a write always sees that write. Calls for different
+conversations run concurrently, up to STORAGE_THREADS at a time.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from . import storage
+from .config import STORAGE_THREADS
+from .metrics import STORAGE_LATENCY
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+# conversation_id -> [lock, number of callers holding or waiting for it]
+_locks: Dict[str, list] = {}
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=STORAGE_THREADS, thread_name_prefix="storage")
+    return _executor
+
+
+def shutdown():
+    """Wait for queued storage work to finish and stop the thread pool."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+def _timed(func: Callable, *args) -> Any:
+    """Call a storage function, recording its duration (runs on the pool)."""
+    with STORAGE_LATENCY.time(operation=func.__name__):
+        return func(*args)
+
+
+async def _run(func: Callable, *args) -> Any:
+    """Run a blocking storage function on the pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(_timed, func, *args))
+
+
+async def _run_ordered(conversation_id: str, func: Callable, *args) -> Any:
+    """Run a storage function after every earlier call for the same conversation."""
+    entry = _locks.get(conversation_id)
+    if entry is None:
+        entry = [asyncio.Lock(), 0]
+        _locks[conversation_id] = entry
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(_get_executor(), functools.partial(_timed, func, *args))
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The work cannot be stopped once it is in the pool; keep the
+                # lock until it finishes so later calls still run after it
+                await asyncio.wait({future})
+                raise
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _locks[conversation_id]
+
+
+async def create_conversation(conversation_id: str) -> Dict[str, Any]:
+    """Async version of storage.create_conversation."""
+    return await _run_ordered(conversation_id, storage.create_conversation, conversation_id)
+
+
+async def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
+    """Async version of storage.get_conversation."""
+    return await _run_ordered(conversation_id, storage.get_conversation, conversation_id)
+
+
+async def get_messages(
+    conversation_id: str,
+    limit: int = 20,
+    before: Optional[int] = None,
+    summarize: bool = True
+) -> Optional[Dict[str, Any]]:
+    """Async version of storage.get_messages."""
+    return await _run_ordered(conversation_id, storage.get_messages, conversation_id, limit, before, summarize)
+
+
+async def get_message(conversation_id: str, index: int) -> Optional[Dict[str, Any]]:
+    """Async version of storage.get_message."""
+    return await _run_ordered(conversation_id, storage.get_message, conversation_id, index)
+
+
+async def save_conversation(conversation: Dict[str, Any]):
+    """Async version of storage.save_conversation."""
+    await _run_ordered(conversation["id"], storage.save_conversation, conversation)
+
+
+async def list_conversations() -> List[Dict[str, Any]]:
+    """Async version of storage.list_conversations."""
+    return await _run(storage.list_conversations)
+
+
+async def list_conversations_page(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    title_prefix: Optional[str] = None,
+    council_type: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Async version of storage.list_conversations_page."""
+    return await _run(storage.list_conversations_page, limit, cursor, title_prefix, council_type)
+
+
+async def add_user_message(conversation_id: str, content: str):
+    """Async version of storage.add_user_message."""
+    await _run_ordered(conversation_id, storage.add_user_message, conversation_id, content)
+
+
+async def add_assistant_message(
+    conversation_id: str,
+    stage1: List[Dict[str, Any]],
+    stage2: List[Dict[str, Any]],
+    stage3: Dict[str, Any]
+):
+    """Async version of storage.add_assistant_message."""
+    await _run_ordered(conversation_id, storage.add_assistant_message, conversation_id, stage1, stage2, stage3)
+
+
+async def add_assistant_message_obj(conversation_id: str, message: Dict[str, Any]):
+    """Async version of storage.add_assistant_message_obj."""
+    await _run_ordered(conversation_id, storage.add_assistant_message_obj, conversation_id, message)
+
+
+async def update_conversation_title(conversation_id: str, title: str):
+    """Async version of storage.update_conversation_title."""
+    await _run_ordered(conversation_id, storage.update_conversation_title, conversation_id, title)
+
+
+async def delete_conversation(conversation_id: str) -> bool:
+    """Async version of storage.delete_conversation."""
+    return await _run_ordered(conversation_id, storage.delete_conversation, conversation_id)
+
+
+@asynccontextmanager
+async def transaction(conversation_id: str) -> AsyncIterator[storage.Transaction]:
+    """
+    Async version of storage.transaction: mutations are collected in memory
+    and committed with one ordered storage call when the block exits.
+    Use flush() to write what was queued so far before a long step.
+
+    Raises:
+        ValueError if the conversation does not exist
+    """
+    if not await _run_ordered(conversation_id, storage.conversation_exists, conversation_id):
+        raise ValueError(f"Conversation {conversation_id} not found")
+
+    tx = storage.Transaction(conversation_id)
+    try:
+        yield tx
+    except BaseException as e:
+        tx.fail(e)
+        await _run_ordered(conversation_id, tx.commit)
+        raise
+    await _run_ordered(conversation_id, tx.commit)
+
+
+async def flush(tx: storage.Transaction):
+    """Async version of Transaction.flush, ordered with the conversation's other calls."""
+    await _run_ordered(tx.conversation_id, tx.flush)
@@ -0,0 +1,75 @@
+"""End-to-end latency budgets for council runs.
+
+A run's deadline is kept in a context variable, so it reaches every task
+the run spawns (asyncio copies the context into new tasks) without being
+passed through each call. Stages take a share of whatever is left with
+stage(), query_model caps its timeout at the time remaining, and fan-outs
+stop waiting once their stage's share is used up.
+
+Usage:
+    with budget.limit(45):
+        with budget.stage(0.6, reserve=15):
+            ...  # gets 60% of (remaining - 15 s)
+        ...      # the rest, at least the 15 s reserve
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# Absolute time.monotonic() by which the current run must finish
+_deadline: ContextVar[Optional[float]] = ContextVar("council_deadline", default=None)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget (negative once overrun), or None without one."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+@contextmanager
+def _until(deadline: float) -> Iterator[None]:
+    outer = _deadline.get()
+    token = _deadline.set(deadline if outer is None else min(deadline, outer))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def limit(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Run the block within an overall budget (never extending an enclosing one).
+
+    Args:
+        seconds: Budget for the block; None leaves the current budget as is
+    """
+    if seconds is None:
+        yield
+        return
+    with _until(time.monotonic() + seconds):
+        yield
+
+
+@contextmanager
+def stage(share: float = 1.0, reserve: float = 0.0) -> Iterator[None]:
+    """
+    Give the block a share of the remaining budget, keeping time back for
+    the steps after it (no-op without a budget).
+
+    Args:
+        share: Fraction of the remaining budget (after the reserve) for the block
+        reserve: Seconds kept for later steps; at most half of what is left,
+            so a tight budget is split rather than spent entirely on the reserve
+    """
+    left = remaining()
+    if left is None:
+        yield
+        return
+    available = max(0.0, left - min(reserve, left / 2))
+    with _until(time.monotonic() + available * share):
+        yield
@@ -0,0 +1,193 @@
+"""Two-tier (in-memory LRU + on-disk) cache for model responses."""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from .config import (
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_TTL,
+    RESPONSE_CACHE_DIR,
+)
+from .metrics import CACHE_LOOKUPS
+
+
+def make_cache_key(
+    model: str,
+    messages: List[Dict[str, str]],
+    params: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Build a stable key for a request.
+
+    Args:
+        model: OpenRouter model identifier
+        messages: Messages sent to the model
+        params: Extra sampling parameters (temperature, top_p, ...)
+
+    Returns:
+        Hex SHA-256 digest of the canonical JSON encoding of the request
+    """
+    canonical = json.dumps(
+        {"model": model, "messages": messages, "params": params or {}},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Response cache with a bounded in-memory LRU in front of a directory of
+    JSON files. Entries expire after their TTL in both tiers.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        ttl: float = RESPONSE_CACHE_TTL,
+        disk_dir: Optional[str] = RESPONSE_CACHE_DIR,
+        enabled: bool = RESPONSE_CACHE_ENABLED
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.enabled = enabled
+        # key -> (expires_at, response)
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expired": 0,
+        }
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look a response up in memory, then on disk.
+
+        Args:
+            key: Cache key from make_cache_key
+
+        Returns:
+            Cached response dict, or None on a miss
+        """
+        now = time.time()
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, response = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                CACHE_LOOKUPS.inc(result="memory_hit")
+                return response
+            del self._memory[key]
+            self._counters["expired"] += 1
+
+        if self.disk_dir:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None:
+                expires_at, response = entry
+                if expires_at > now:
+                    self._remember(key, expires_at, response)
+                    self._counters["disk_hits"] += 1
+                    CACHE_LOOKUPS.inc(result="disk_hit")
+                    return response
+                self._counters["expired"] += 1
+                await asyncio.to_thread(self._remove_disk, key)
+
+        self._counters["misses"] += 1
+        CACHE_LOOKUPS.inc(result="miss")
+        return None
+
+    async def set(self, key: str, response: Dict[str, Any], ttl: Optional[float] = None):
+        """
+        Store a response in both tiers.
+
+        Args:
+            key: Cache key from make_cache_key
+            response: Response dict returned by query_model
+            ttl: Time to live in seconds (defaults to the cache TTL)
+        """
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self._remember(key, expires_at, response)
+        self._counters["stores"] += 1
+
+        if self.disk_dir:
+            try:
+                await asyncio.to_thread(self._write_disk, key, expires_at, response)
+            except OSError as e:
+                print(f"Error writing response cache entry {key}: {e}")
+
+    def clear(self):
+        """Drop every in-memory entry and reset statistics (disk entries expire on their own)."""
+        self._memory.clear()
+        for name in self._counters:
+            self._counters[name] = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss statistics.
+
+        Returns:
+            Dict with per-tier hits, misses, hit ratio and in-memory entry count
+        """
+        hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+        lookups = hits + self._counters["misses"]
+        return {
+            "enabled": self.enabled,
+            **self._counters,
+            "hits": hits,
+            "lookups": lookups,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+        }
+
+    def _remember(self, key: str, expires_at: float, response: Dict[str, Any]):
+        """Insert into the LRU, evicting the least recently used entries."""
+        self._memory[key] = (expires_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _disk_path(self, key: str) -> str:
+        """Entries are fanned out into subdirectories by key prefix."""
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        path = self._disk_path(key)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            return data["expires_at"], data["response"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key: str, expires_at: float, response: Dict[str, Any]):
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-and-rename so readers never see a half-written entry
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"expires_at": expires_at, "response": response}, f)
+        os.replace(tmp_path, path)
+
+    def _remove_disk(self, key: str):
+        try:
+            os.remove(self._disk_path(key))
+        except OSError:
+            pass
+
+
+# Process-wide cache used by query_model
+response_cache = ResponseCache()
@@ -0,0 +1,236 @@
+"""Record and replay OpenRouter traffic ("cassettes").
+
+The shared httpx client (backend/openrouter.py) can be given one of the
+transports below:
+
+- RecordingTransport passes chat completion requests through to
+  OpenRouter and appends each request/response pair to a cassette file:
+  the request body, status, key headers, the time until the response
+  head arrived and every body chunk with its offset.
+- ReplayTransport answers from a cassette without any network access,
+  either with the recorded timing (scaled by `speed`) or instantly.
+
+Everything above the transport - scheduler, retries, hedging, streaming,
+response cache - runs exactly as it does against the real API, so
+production-shaped traffic can be replayed through the endpoints offline.
+
+Cassettes are JSON Lines, one interaction per line:
+    {"key": ..., "request": {...}, "status": 200, "headers": {...},
+     "head_s": 0.41, "chunks": [[0.0, "data: ..."], [0.05, "..."]]}
+
+Requests are matched by a hash of their JSON body. Identical requests
+recorded several times (retries after a 429, hedges, repeated questions)
+are served in the order they were recorded; once they run out, the last
+one is repeated.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+# Response headers worth keeping (others describe the original connection)
+_KEPT_HEADERS = ("content-type", "retry-after")
+
+
+def request_key(body: bytes) -> str:
+    """Match key of a chat completion request (hash of its canonical JSON body)."""
+    try:
+        canonical = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        canonical = body.decode("utf-8", "replace")
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _is_completion(request: httpx.Request) -> bool:
+    return request.method == "POST"
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """Passes a response body through while noting when each chunk arrived."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, started: float, on_close):
+        self._stream = stream
+        self._started = started
+        self._on_close = on_close
+        self._chunks: List[Tuple[float, str]] = []
+        self._pending = b""
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            # Stored up to the last newline so every stored chunk is valid UTF-8
+            self._pending += chunk
+            cut = self._pending.rfind(b"\n") + 1
+            if cut:
+                self._chunks.append((time.monotonic() - self._started, self._pending[:cut].decode("utf-8")))
+                self._pending = self._pending[cut:]
+            yield chunk
+
+    async def aclose(self):
+        if self._pending:
+            self._chunks.append((time.monotonic() - self._started, self._pending.decode("utf-8", "replace")))
+            self._pending = b""
+        await self._stream.aclose()
+        self._on_close(self._chunks)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Forwards requests and appends chat completions to a cassette file."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, path: str):
+        """
+        Args:
+            transport: Transport that talks to OpenRouter
+            path: Cassette file to append to (created if missing)
+        """
+        self._transport = transport
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not _is_completion(request):
+            return await self._transport.handle_async_request(request)
+
+        # Uncompressed bodies keep the cassette readable and replayable as text
+        request.headers["Accept-Encoding"] = "identity"
+        body = await request.aread()
+        started = time.monotonic()
+        response = await self._transport.handle_async_request(request)
+        head_s = time.monotonic() - started
+
+        def save(chunks: List[Tuple[float, str]]):
+            self._append({
+                "key": request_key(body),
+                "request": json.loads(body),
+                "status": response.status_code,
+                "headers": {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers},
+                "head_s": round(head_s, 4),
+                "chunks": [[round(offset - head_s, 4), text] for offset, text in chunks],
+                "recorded_at": time.time(),
+            })
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(response.stream, started, save),
+            extensions=response.extensions,
+        )
+
+    def _append(self, interaction: Dict[str, Any]):
+        # One write per line with O_APPEND, so several workers can record at once
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(interaction) + "\n")
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class _ReplayStream(httpx.AsyncByteStream):
+    def __init__(self, chunks: List[List[Any]], speed: float):
+        self._chunks = chunks
+        self._speed = speed
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        started = time.monotonic()
+        for offset, text in self._chunks:
+            if self._speed:
+                delay = offset / self._speed - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield text.encode("utf-8")
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serves chat completions from a cassette file; never touches the network."""
+
+    def __init__(self, path: str, speed: float = 1.0):
+        """
+        Args:
+            path: Cassette file to replay
+            speed: Playback speed relative to the recording (2.0 = twice as
+                fast); 0 serves everything immediately
+
+        Raises:
+            FileNotFoundError if the cassette does not exist
+        """
+        self.path = path
+        self.speed = speed
+        self._interactions: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._served: Dict[str, int] = defaultdict(int)
+        self.misses = 0
+
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    interaction = json.loads(line)
+                except ValueError:
+                    # A torn last line from an interrupted recording
+                    continue
+                self._interactions[interaction["key"]].append(interaction)
+
+    def __len__(self) -> int:
+        return sum(len(interactions) for interactions in self._interactions.values())
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not _is_completion(request):
+            # Connection warm-up and other probes
+            return httpx.Response(200, json={"status": "ok"})
+
+        key = request_key(await request.aread())
+        interactions = self._interactions.get(key)
+        if not interactions:
+            self.misses += 1
+            print(f"Cassette miss: no recorded response for this request in {self.path}")
+            return httpx.Response(
+                404, json={"error": {"message": "No recorded response for this request", "code": 404}}
+            )
+
+        index = min(self._served[key], len(interactions) - 1)
+        self._served[key] += 1
+        interaction = interactions[index]
+
+        if self.speed:
+            await asyncio.sleep(interaction["head_s"] / self.speed)
+        return httpx.Response(
+            interaction["status"],
+            headers=interaction["headers"],
+            stream=_ReplayStream(interaction["chunks"], self.speed),
+        )
+
+
+def build_transport(
+    mode: Optional[str],
+    path: Optional[str],
+    speed: float,
+    transport: httpx.AsyncBaseTransport
+) -> httpx.AsyncBaseTransport:
+    """
+    The transport for a cassette mode.
+
+    Args:
+        mode: "record", "replay", or None/"" for live traffic
+        path: Cassette file
+        speed: Replay speed (see ReplayTransport)
+        transport: The live transport (used as is, or wrapped for recording)
+    """
+    if not mode:
+        return transport
+    if not path:
+        raise ValueError("OPENROUTER_CASSETTE must be set to record or replay")
+    if mode == "record":
+        print(f"Recording OpenRouter traffic to {path}")
+        return RecordingTransport(transport, path)
+    if mode == "replay":
+        replay = ReplayTransport(path, speed)
+        print(f"Replaying {len(replay)} recorded OpenRouter responses from {path}")
+        return replay
+    raise ValueError(f"Unknown cassette mode: {mode}")
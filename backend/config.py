@@ -1,5 +1,6 @@
 """Configuration for the LLM Council."""
 
+import json
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -9,6 +10,11 @@ load_dotenv()
 # OpenRouter API key
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 
+# Optional comma-separated pool of keys; requests are spread across them
+OPENROUTER_API_KEYS = [
+    key.strip() for key in os.getenv("OPENROUTER_API_KEYS", "").split(",") if key.strip()
+] or [OPENROUTER_API_KEY]
+
 # Council members - list of OpenRouter model identifiers
 COUNCIL_MODELS = [
     # "openai/gpt-5.1",
@@ -34,10 +40,147 @@ COUNCIL_MODELS = [
 CHAIRMAN_MODEL = "meta-llama/llama-3.1-405b-instruct:free"
 
 
-# OpenRouter API endpoint
-OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
+# OpenRouter API endpoint (point it at benchmarks/fake_openrouter.py to run offline)
+OPENROUTER_API_URL = os.getenv("OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions")
+
+# Cassettes (backend/cassette.py): OPENROUTER_CASSETTE_MODE=record appends every
+# request/response with its timing to OPENROUTER_CASSETTE; =replay serves them back
+# offline, at OPENROUTER_REPLAY_SPEED times the recorded pace (0 = no delays)
+OPENROUTER_CASSETTE_MODE = os.getenv("OPENROUTER_CASSETTE_MODE", "")
+OPENROUTER_CASSETTE = os.getenv("OPENROUTER_CASSETTE")
+OPENROUTER_REPLAY_SPEED = float(os.getenv("OPENROUTER_REPLAY_SPEED", "1"))
+
+# Shared HTTP client settings (one pooled client per process)
+OPENROUTER_HTTP2 = os.getenv("OPENROUTER_HTTP2", "1") == "1"
+OPENROUTER_MAX_CONNECTIONS = int(os.getenv("OPENROUTER_MAX_CONNECTIONS", "100"))
+OPENROUTER_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENROUTER_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENROUTER_KEEPALIVE_EXPIRY = float(os.getenv("OPENROUTER_KEEPALIVE_EXPIRY", "60"))
+OPENROUTER_CONNECT_TIMEOUT = float(os.getenv("OPENROUTER_CONNECT_TIMEOUT", "10"))
+
+# Default per-request timeout in seconds
+OPENROUTER_TIMEOUT = float(os.getenv("OPENROUTER_TIMEOUT", "120"))
+
+# Warm pooled connections at startup (0 disables warm-up)
+OPENROUTER_WARMUP_CONNECTIONS = int(os.getenv("OPENROUTER_WARMUP_CONNECTIONS", "2"))
+
+# Upstream scheduler: per-model and per-key limits (0 = unlimited)
+# Defaults match OpenRouter's free tier of 20 requests/minute per key
+SCHEDULER_MODEL_CONCURRENCY = int(os.getenv("SCHEDULER_MODEL_CONCURRENCY", "8"))
+SCHEDULER_MODEL_RPM = float(os.getenv("SCHEDULER_MODEL_RPM", "0"))
+SCHEDULER_KEY_CONCURRENCY = int(os.getenv("SCHEDULER_KEY_CONCURRENCY", "32"))
+SCHEDULER_KEY_RPM = float(os.getenv("SCHEDULER_KEY_RPM", "20"))
+# The limiters live in each process, so with several uvicorn workers the RPM limits
+# are split between them: set WEB_CONCURRENCY to the number of workers (uvicorn
+# also reads it as its --workers default) and each worker gets 1/N of the rate
+SERVER_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+SCHEDULER_MODEL_RPM /= SERVER_WORKERS
+SCHEDULER_KEY_RPM /= SERVER_WORKERS
+# Retries for 429s and transient errors, bounded by the request's timeout
+SCHEDULER_MAX_RETRIES = int(os.getenv("SCHEDULER_MAX_RETRIES", "3"))
+SCHEDULER_BACKOFF_BASE = float(os.getenv("SCHEDULER_BACKOFF_BASE", "0.5"))
+SCHEDULER_BACKOFF_MAX = float(os.getenv("SCHEDULER_BACKOFF_MAX", "8"))
+
+# Fan-out policy for parallel stages (Stage 1/2, hierarchy juniors, round-table rounds)
+# Finish a stage once FANOUT_QUORUM models have answered (unset = wait for all) ...
+FANOUT_QUORUM = int(os.getenv("FANOUT_QUORUM")) if os.getenv("FANOUT_QUORUM") else None
+# ... or once FANOUT_SOFT_DEADLINE seconds have passed and at least one model answered
+FANOUT_SOFT_DEADLINE = float(os.getenv("FANOUT_SOFT_DEADLINE")) if os.getenv("FANOUT_SOFT_DEADLINE") else None
+# What to do with stragglers: "cancel" or "background" (let them finish, discard result)
+FANOUT_STRAGGLERS = os.getenv("FANOUT_STRAGGLERS", "cancel")
+
+# End-to-end latency budget for a council run in seconds (unset = no overall deadline;
+# a request may also pass its own "deadline"). COUNCIL_CHAIRMAN_RESERVE seconds are
+# always kept for the chairman / lead / synthesis step; of the time before that,
+# Stage 1 gets COUNCIL_STAGE1_SHARE and Stage 2 the rest (round-table rounds and
+# assembly-line agents split their time evenly)
+COUNCIL_DEADLINE = float(os.getenv("COUNCIL_DEADLINE")) if os.getenv("COUNCIL_DEADLINE") else None
+COUNCIL_CHAIRMAN_RESERVE = float(os.getenv("COUNCIL_CHAIRMAN_RESERVE", "15"))
+COUNCIL_STAGE1_SHARE = float(os.getenv("COUNCIL_STAGE1_SHARE", "0.6"))
+
+# Hedged requests: if a call has no first byte after the HEDGE_PERCENTILE of that
+# model's observed time-to-first-byte, race the same request on its fallback model.
+# Off by default: every hedge is an extra upstream call on the shared API key(s)
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "10"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "1.0"))
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "200"))
+# Model to send the hedge to; models not listed (or mapped to themselves) are never
+# hedged. Override with a JSON object, e.g. HEDGE_FALLBACK_MODELS='{"a/model": "b/model"}'
+HEDGE_FALLBACK_MODELS = json.loads(os.getenv("HEDGE_FALLBACK_MODELS", "null")) or {
+    CHAIRMAN_MODEL: "meta-llama/llama-3.3-70b-instruct:free",
+}
+
+# Per-model circuit breaker: open after HEALTH_CONSECUTIVE_FAILURES failures in a row,
+# or when at least HEALTH_FAILURE_THRESHOLD of the recent requests failed
+HEALTH_WINDOW = int(os.getenv("HEALTH_WINDOW", "50"))
+HEALTH_WINDOW_SECONDS = float(os.getenv("HEALTH_WINDOW_SECONDS", "600"))
+HEALTH_MIN_REQUESTS = int(os.getenv("HEALTH_MIN_REQUESTS", "5"))
+HEALTH_FAILURE_THRESHOLD = float(os.getenv("HEALTH_FAILURE_THRESHOLD", "0.5"))
+HEALTH_CONSECUTIVE_FAILURES = int(os.getenv("HEALTH_CONSECUTIVE_FAILURES", "3"))
+# Cool-down before a half-open probe; doubles after each failed probe
+HEALTH_OPEN_SECONDS = float(os.getenv("HEALTH_OPEN_SECONDS", "30"))
+HEALTH_MAX_OPEN_SECONDS = float(os.getenv("HEALTH_MAX_OPEN_SECONDS", "600"))
 
 # Data directory for conversation storage
 # Use absolute path to ensure consistency
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = str(PROJECT_ROOT / "data" / "conversations")
+
+# Response cache for query_model (in-memory LRU + on-disk tier under DATA_DIR)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(24 * 3600)))
+# Set RESPONSE_CACHE_DISK=0 to keep the cache in memory only
+RESPONSE_CACHE_DIR = (
+    os.path.join(DATA_DIR, ".response_cache")
+    if os.getenv("RESPONSE_CACHE_DISK", "1") == "1" else None
+)
+
+# Conversation storage backend: "file" (JSON files in DATA_DIR) or "sqlite"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "file")
+STORAGE_SQLITE_PATH = os.getenv("STORAGE_SQLITE_PATH", os.path.join(DATA_DIR, "conversations.sqlite3"))
+# Threads running blocking storage I/O for the async routes (backend/async_storage.py)
+STORAGE_THREADS = int(os.getenv("STORAGE_THREADS", "4"))
+
+# Conversation log is compacted into the snapshot once it is larger than both
+# this many bytes and the snapshot itself (keeps compaction cost amortized O(1))
+STORAGE_COMPACT_MIN_BYTES = int(os.getenv("STORAGE_COMPACT_MIN_BYTES", str(64 * 1024)))
+# Stored conversation format: compact JSON ("pretty" keeps the old indent=2 files),
+# compressed with STORAGE_COMPRESSION ("auto" = zstd if installed, else gzip;
+# or "zstd", "gzip", "none") once a document reaches STORAGE_COMPRESS_MIN_BYTES
+STORAGE_PRETTY = os.getenv("STORAGE_FORMAT", "compact") == "pretty"
+STORAGE_COMPRESSION = os.getenv("STORAGE_COMPRESSION", "auto")
+STORAGE_COMPRESS_MIN_BYTES = int(os.getenv("STORAGE_COMPRESS_MIN_BYTES", str(16 * 1024)))
+# fsync every append/snapshot (durable across power loss, slower)
+STORAGE_FSYNC = os.getenv("STORAGE_FSYNC", "0") == "1"
+
+# Background council jobs (backend/jobs.py): each streamed turn runs as a job whose
+# events are logged under JOBS_DIR so SSE clients can resume with Last-Event-ID
+JOBS_DIR = os.getenv("JOBS_DIR", os.path.join(DATA_DIR, ".jobs"))
+# Seconds a finished job is kept in memory / its event log is kept on disk
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", "600"))
+JOB_LOG_RETENTION = float(os.getenv("JOB_LOG_RETENTION", str(24 * 3600)))
+# Seconds between reads when following a job that runs in another worker process
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.25"))
+# Cancel a job (aborting its in-flight model requests and saving the partial turn)
+# once no client has been attached for JOB_DISCONNECT_GRACE seconds; set
+# JOB_CANCEL_ON_DISCONNECT=0 to always finish and save abandoned turns
+JOB_CANCEL_ON_DISCONNECT = os.getenv("JOB_CANCEL_ON_DISCONNECT", "1") == "1"
+JOB_DISCONNECT_GRACE = float(os.getenv("JOB_DISCONNECT_GRACE", "30"))
+
+# Prometheus metrics (GET /metrics) are kept in memory. With several uvicorn workers
+# set METRICS_DIR (e.g. data/.metrics): each worker then writes its samples there
+# every METRICS_FLUSH_INTERVAL seconds so any worker can report the totals of all
+METRICS_DIR = os.getenv("METRICS_DIR") or None
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+# Event-loop monitor (backend/loop_monitor.py): samples loop lag every
+# LOOP_MONITOR_INTERVAL seconds and captures the stack of anything blocking the
+# loop for LOOP_SLOW_CALLBACK seconds or more (see GET /api/loop/stats);
+# LOOP_MONITOR_LOG=1 also prints each one
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "1") == "1"
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.1"))
+LOOP_SLOW_CALLBACK = float(os.getenv("LOOP_SLOW_CALLBACK", "0.25"))
+LOOP_SLOW_CALLBACK_HISTORY = int(os.getenv("LOOP_SLOW_CALLBACK_HISTORY", "50"))
+LOOP_MONITOR_LOG = os.getenv("LOOP_MONITOR_LOG", "1") == "1"
@@ -1,40 +1,63 @@
 """3-stage LLM Council orchestration."""
 
-from typing import List, Dict, Any, Tuple
-from .openrouter import query_models_parallel, query_model
-from .config import COUNCIL_MODELS, CHAIRMAN_MODEL
+from typing import List, Dict, Any, Tuple, Optional
+from . import budget, tracing
+from .openrouter import query_models_parallel, query_models_as_completed, query_model, FanoutPolicy
+from .config import COUNCIL_MODELS, CHAIRMAN_MODEL, COUNCIL_CHAIRMAN_RESERVE, COUNCIL_STAGE1_SHARE
+from .events import EventCallback, token_emitter, model_token_emitter
 
 
-async def stage1_collect_responses(user_query: str) -> List[Dict[str, Any]]:
+async def stage1_collect_responses(
+    user_query: str,
+    on_event: Optional[EventCallback] = None,
+    policy: Optional[FanoutPolicy] = None,
+    report: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
     """
     Stage 1: Collect individual responses from all council models.
 
+    Within a latency budget, Stage 1 gets COUNCIL_STAGE1_SHARE of the time
+    left before the chairman's reserve.
+
     Args:
         user_query: The user's question
+        on_event: Optional callback receiving 'token' events as answers stream
+            in and a 'stage1_response' event as each model finishes
+        policy: Quorum/deadline policy for the fan-out (defaults to config)
+        report: Optional dict filled with the fan-out outcome (stragglers etc.)
 
     Returns:
         List of dicts with 'model' and 'response' keys
     """
     messages = [{"role": "user", "content": user_query}]
 
-    # Query all models in parallel
-    responses = await query_models_parallel(COUNCIL_MODELS, messages)
-
-    # Format results
+    # Query all models in parallel, reporting each answer as soon as it lands
     stage1_results = []
-    for model, response in responses.items():
-        if response is not None:  # Only include successful responses
-            stage1_results.append({
-                "model": model,
-                "response": response.get('content', '')
-            })
+    with budget.stage(COUNCIL_STAGE1_SHARE, reserve=COUNCIL_CHAIRMAN_RESERVE), tracing.stage("stage1"):
+        async for model, response in query_models_as_completed(
+            COUNCIL_MODELS, messages, on_delta=token_emitter(on_event, "stage1"),
+            policy=policy, report=report
+        ):
+            if response is not None:  # Only include successful responses
+                result = {
+                    "model": model,
+                    "response": response.get('content', '')
+                }
+                stage1_results.append(result)
+                if on_event is not None:
+                    on_event({"type": "stage1_response", "data": result})
+
+    # Keep council order so Stage 2 labels are stable across runs
+    stage1_results.sort(key=lambda result: COUNCIL_MODELS.index(result["model"]))
 
     return stage1_results
 
 
 async def stage2_collect_rankings(
     user_query: str,
-    stage1_results: List[Dict[str, Any]]
+    stage1_results: List[Dict[str, Any]],
+    policy: Optional[FanoutPolicy] = None,
+    report: Optional[Dict[str, Any]] = None
 ) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
     """
     Stage 2: Each model ranks the anonymized responses.
@@ -42,6 +65,8 @@ async def stage2_collect_rankings(
     Args:
         user_query: The original user query
         stage1_results: Results from Stage 1
+        policy: Quorum/deadline policy for the fan-out (defaults to config)
+        report: Optional dict filled with the fan-out outcome (stragglers etc.)
 
     Returns:
         Tuple of (rankings list, label_to_model mapping)
@@ -94,8 +119,10 @@ Now provide your evaluation and ranking:"""
 
     messages = [{"role": "user", "content": ranking_prompt}]
 
-    # Get rankings from all council models in parallel
-    responses = await query_models_parallel(COUNCIL_MODELS, messages)
+    # Get rankings from all council models in parallel, within whatever
+    # budget is left before the chairman's reserve
+    with budget.stage(reserve=COUNCIL_CHAIRMAN_RESERVE), tracing.stage("stage2"):
+        responses = await query_models_parallel(COUNCIL_MODELS, messages, policy=policy, report=report)
 
     # Format results
     stage2_results = []
@@ -115,15 +142,20 @@ Now provide your evaluation and ranking:"""
 async def stage3_synthesize_final(
     user_query: str,
     stage1_results: List[Dict[str, Any]],
-    stage2_results: List[Dict[str, Any]]
+    stage2_results: List[Dict[str, Any]],
+    on_event: Optional[EventCallback] = None
 ) -> Dict[str, Any]:
     """
     Stage 3: Chairman synthesizes final response.
 
+    Within a latency budget the chairman gets all the time left, which the
+    earlier stages keep at COUNCIL_CHAIRMAN_RESERVE seconds or more.
+
     Args:
         user_query: The original user query
         stage1_results: Individual model responses from Stage 1
         stage2_results: Rankings from Stage 2
+        on_event: Optional callback receiving the chairman's 'token' events
 
     Returns:
         Dict with 'model' and 'response' keys
@@ -159,7 +191,11 @@ Provide a clear, well-reasoned final answer that represents the council's collec
     messages = [{"role": "user", "content": chairman_prompt}]
 
     # Query the chairman model
-    response = await query_model(CHAIRMAN_MODEL, messages)
+    with tracing.stage("stage3"):
+        response = await query_model(
+            CHAIRMAN_MODEL, messages,
+            on_delta=model_token_emitter(on_event, "stage3", CHAIRMAN_MODEL)
+        )
 
     if response is None:
         # Fallback if chairman fails
@@ -288,7 +324,8 @@ Title:
 
     messages = [{"role": "user", "content": title_prompt}]
 
-    response = await query_model("mistralai/mistral-7b-instruct:free", messages, timeout=30.0)
+    with tracing.stage("title"):
+        response = await query_model("mistralai/mistral-7b-instruct:free", messages, timeout=30.0)
 
     # Helper to make a safe fallback title from the user query
     def fallback_from_query(q: str, max_words: int = 7) -> str:
@@ -326,28 +363,57 @@ Title:
     return f"{label} {title}"
 
 
-async def run_full_council(user_query: str) -> Tuple[List, List, Dict, Dict]:
+async def run_full_council(
+    user_query: str,
+    on_event: Optional[EventCallback] = None,
+    policy: Optional[FanoutPolicy] = None,
+    deadline: Optional[float] = None
+) -> Tuple[List, List, Dict, Dict]:
     """
     Run the complete 3-stage council process.
 
     Args:
         user_query: The user's question
+        on_event: Optional callback receiving 'token' events for Stage 1 and Stage 3
+        policy: Quorum/deadline policy for Stages 1 and 2 (defaults to config)
+        deadline: Seconds the whole run may take (None = no overall budget)
 
     Returns:
-        Tuple of (stage1_results, stage2_results, stage3_result, metadata)
+        Tuple of (stage1_results, stage2_results, stage3_result, metadata);
+        metadata["timings"] holds the stage and model call spans
+        (see backend/tracing.py)
     """
+    with budget.limit(deadline), tracing.trace() as trace:
+        stage1_results, stage2_results, stage3_result, metadata = await _run_full_council(
+            user_query, on_event, policy
+        )
+    metadata["timings"] = trace.summary()
+    return stage1_results, stage2_results, stage3_result, metadata
+
+
+async def _run_full_council(
+    user_query: str,
+    on_event: Optional[EventCallback],
+    policy: Optional[FanoutPolicy]
+) -> Tuple[List, List, Dict, Dict]:
+    fanout = {"stage1": {}, "stage2": {}}
+
     # Stage 1: Collect individual responses
-    stage1_results = await stage1_collect_responses(user_query)
+    stage1_results = await stage1_collect_responses(
+        user_query, on_event=on_event, policy=policy, report=fanout["stage1"]
+    )
 
     # If no models responded successfully, return error
     if not stage1_results:
         return [], [], {
             "model": "error",
             "response": "All models failed to respond. Please try again."
-        }, {}
+        }, {"fanout": fanout}
 
     # Stage 2: Collect rankings
-    stage2_results, label_to_model = await stage2_collect_rankings(user_query, stage1_results)
+    stage2_results, label_to_model = await stage2_collect_rankings(
+        user_query, stage1_results, policy=policy, report=fanout["stage2"]
+    )
 
     # Calculate aggregate rankings
     aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
@@ -356,13 +422,15 @@ async def run_full_council(user_query: str) -> Tuple[List, List, Dict, Dict]:
     stage3_result = await stage3_synthesize_final(
         user_query,
         stage1_results,
-        stage2_results
+        stage2_results,
+        on_event=on_event
     )
 
     # Prepare metadata
     metadata = {
         "label_to_model": label_to_model,
-        "aggregate_rankings": aggregate_rankings
+        "aggregate_rankings": aggregate_rankings,
+        "fanout": fanout
     }
 
     return stage1_results, stage2_results, stage3_result, metadata
@@ -1,11 +1,17 @@
 """Assembly Line Council - Agent A finishes, then Agent B starts, then Agent C polishes."""
 
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
+from .. import budget, tracing
 from ..openrouter import query_models_parallel, query_model
 from ..config import COUNCIL_MODELS, CHAIRMAN_MODEL
+from ..events import EventCallback, model_token_emitter
 
 
-async def run_assembly_line_council(user_query: str) -> Tuple[List, Dict]:
+async def run_assembly_line_council(
+    user_query: str,
+    on_event: Optional[EventCallback] = None,
+    deadline: Optional[float] = None
+) -> Tuple[List, Dict]:
     """
     Run the Assembly Line council process.
     
@@ -18,10 +24,24 @@ async def run_assembly_line_council(user_query: str) -> Tuple[List, Dict]:
     
     Args:
         user_query: The user's question
+        on_event: Optional callback receiving each agent's 'token' events
+        deadline: Seconds the whole run may take (None = no overall budget),
+            split evenly between the three agents
     
     Returns:
-        Tuple of (stage_results, final_output, metadata)
+        Tuple of (stage_results, final_output, metadata);
+        metadata["timings"] holds the agent and model call spans
     """
+    with budget.limit(deadline), tracing.trace() as trace:
+        stage_results, final_output, metadata = await _run_assembly_line_council(user_query, on_event)
+    metadata["timings"] = trace.summary()
+    return stage_results, final_output, metadata
+
+
+async def _run_assembly_line_council(
+    user_query: str,
+    on_event: Optional[EventCallback]
+) -> Tuple[List, Dict]:
     stage_results = []
     
     # Stage 1: First agent provides initial response/draft
@@ -32,7 +52,12 @@ async def run_assembly_line_council(user_query: str) -> Tuple[List, Dict]:
 Provide a clear, well-structured initial response that will be reviewed and refined by specialists after you:"""
     
     messages = [{"role": "user", "content": agent_a_prompt}]
-    agent_a_response = await query_model(COUNCIL_MODELS[0] if COUNCIL_MODELS else "mistralai/mistral-small-3.1-24b-instruct:free", messages)
+    agent_a_model = COUNCIL_MODELS[0] if COUNCIL_MODELS else "mistralai/mistral-small-3.1-24b-instruct:free"
+    with budget.stage(1 / 3), tracing.stage("agent_a"):
+        agent_a_response = await query_model(
+            agent_a_model, messages,
+            on_delta=model_token_emitter(on_event, "agent_a", agent_a_model)
+        )
     
     agent_a_content = agent_a_response.get('content', '') if agent_a_response else ""
     
@@ -60,7 +85,12 @@ Your task is to:
 Please provide your enhanced version:"""
     
     messages = [{"role": "user", "content": agent_b_prompt}]
-    agent_b_response = await query_model(COUNCIL_MODELS[1] if len(COUNCIL_MODELS) > 1 else "mistralai/mistral-small-3.1-24b-instruct:free", messages)
+    agent_b_model = COUNCIL_MODELS[1] if len(COUNCIL_MODELS) > 1 else "mistralai/mistral-small-3.1-24b-instruct:free"
+    with budget.stage(1 / 2), tracing.stage("agent_b"):
+        agent_b_response = await query_model(
+            agent_b_model, messages,
+            on_delta=model_token_emitter(on_event, "agent_b", agent_b_model)
+        )
     
     agent_b_content = agent_b_response.get('content', '') if agent_b_response else ""
     
@@ -89,7 +119,12 @@ Your task is to:
 Please provide the final, polished version:"""
     
     messages = [{"role": "user", "content": agent_c_prompt}]
-    agent_c_response = await query_model(COUNCIL_MODELS[2] if len(COUNCIL_MODELS) > 2 else "mistralai/mistral-small-3.1-24b-instruct:free", messages)
+    agent_c_model = COUNCIL_MODELS[2] if len(COUNCIL_MODELS) > 2 else "mistralai/mistral-small-3.1-24b-instruct:free"
+    with tracing.stage("agent_c"):
+        agent_c_response = await query_model(
+            agent_c_model, messages,
+            on_delta=model_token_emitter(on_event, "agent_c", agent_c_model)
+        )
     
     agent_c_content = agent_c_response.get('content', '') if agent_c_response else ""
     
@@ -1,11 +1,18 @@
 """Hierarchy Council - Junior agents report to a Lead Agent who makes the final call."""
 
-from typing import List, Dict, Any, Tuple
-from ..openrouter import query_models_parallel, query_model
-from ..config import COUNCIL_MODELS, CHAIRMAN_MODEL
+from typing import List, Dict, Any, Tuple, Optional
+from .. import budget, tracing
+from ..openrouter import query_models_as_completed, query_model, FanoutPolicy
+from ..config import COUNCIL_MODELS, CHAIRMAN_MODEL, COUNCIL_CHAIRMAN_RESERVE
+from ..events import EventCallback, model_token_emitter
 
 
-async def run_hierarchy_council(user_query: str) -> Tuple[List, Dict]:
+async def run_hierarchy_council(
+    user_query: str,
+    on_event: Optional[EventCallback] = None,
+    policy: Optional[FanoutPolicy] = None,
+    deadline: Optional[float] = None
+) -> Tuple[List, Dict]:
     """
     Run the Hierarchy council process.
     
@@ -15,21 +22,48 @@ async def run_hierarchy_council(user_query: str) -> Tuple[List, Dict]:
     
     Args:
         user_query: The user's question
+        on_event: Optional callback receiving a 'junior_response' event per
+            junior agent and the Lead Agent's 'token' events
+        policy: Quorum/deadline policy for the junior fan-out (defaults to config)
+        deadline: Seconds the whole run may take (None = no overall budget);
+            COUNCIL_CHAIRMAN_RESERVE of it is kept for the Lead Agent
     
     Returns:
-        Tuple of (junior_responses, lead_decision, metadata)
+        Tuple of (junior_responses, lead_decision, metadata);
+        metadata["timings"] holds the stage and model call spans
     """
+    with budget.limit(deadline), tracing.trace() as trace:
+        junior_responses, lead_decision, metadata = await _run_hierarchy_council(
+            user_query, on_event, policy
+        )
+    metadata["timings"] = trace.summary()
+    return junior_responses, lead_decision, metadata
+
+
+async def _run_hierarchy_council(
+    user_query: str,
+    on_event: Optional[EventCallback],
+    policy: Optional[FanoutPolicy]
+) -> Tuple[List, Dict]:
     # Stage 1: Junior agents provide initial responses
     messages = [{"role": "user", "content": user_query}]
-    responses = await query_models_parallel(COUNCIL_MODELS, messages)
     
     junior_responses = []
-    for model, response in responses.items():
-        if response is not None:
-            junior_responses.append({
-                "model": model,
-                "response": response.get('content', '')
-            })
+    juniors_fanout = {}
+    with budget.stage(reserve=COUNCIL_CHAIRMAN_RESERVE), tracing.stage("juniors"):
+        async for model, response in query_models_as_completed(
+            COUNCIL_MODELS, messages, policy=policy, report=juniors_fanout
+        ):
+            if response is not None:
+                result = {
+                    "model": model,
+                    "response": response.get('content', '')
+                }
+                junior_responses.append(result)
+                if on_event is not None:
+                    on_event({"type": "junior_response", "data": result})
+    
+    junior_responses.sort(key=lambda result: COUNCIL_MODELS.index(result["model"]))
     
     # Stage 2: Lead Agent evaluates and makes final call
     responses_context = "\n\n".join([
@@ -53,7 +87,11 @@ As the Lead Agent, your responsibility is to:
 Please provide your authoritative final decision and recommendation:"""
     
     lead_messages = [{"role": "user", "content": lead_prompt}]
-    lead_response = await query_model(CHAIRMAN_MODEL, lead_messages)
+    with tracing.stage("lead"):
+        lead_response = await query_model(
+            CHAIRMAN_MODEL, lead_messages,
+            on_delta=model_token_emitter(on_event, "lead", CHAIRMAN_MODEL)
+        )
     
     lead_decision = {
         "model": CHAIRMAN_MODEL,
@@ -66,7 +104,8 @@ Please provide your authoritative final decision and recommendation:"""
         "junior_agents": len(COUNCIL_MODELS),
         "agents": COUNCIL_MODELS,
         "lead_agent": CHAIRMAN_MODEL,
-        "total_junior_responses": len(junior_responses)
+        "total_junior_responses": len(junior_responses),
+        "fanout": {"juniors": juniors_fanout}
     }
     
     return junior_responses, lead_decision, metadata
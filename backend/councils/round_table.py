@@ -1,11 +1,62 @@
 """Round Table Council - Collaborative iteration where every agent sees every other agent's response."""
 
-from typing import List, Dict, Any, Tuple
-from ..openrouter import query_models_parallel, query_model
-from ..config import COUNCIL_MODELS, CHAIRMAN_MODEL
+from typing import List, Dict, Any, Tuple, Optional
+from .. import budget, tracing
+from ..openrouter import query_models_as_completed, query_model, FanoutPolicy
+from ..config import COUNCIL_MODELS, CHAIRMAN_MODEL, COUNCIL_CHAIRMAN_RESERVE
+from ..events import EventCallback, model_token_emitter
 
 
-async def run_round_table_council(user_query: str, iterations: int = 2) -> Tuple[List, Dict]:
+async def _collect_round(
+    round_number: int,
+    messages: List[Dict[str, str]],
+    on_event: Optional[EventCallback],
+    policy: Optional[FanoutPolicy],
+    report: Dict[str, Any],
+    rounds_left: int = 1
+) -> List[Dict[str, Any]]:
+    """
+    Collect one round of responses, reporting each member as it finishes.
+
+    Within a latency budget the rounds split the time before the
+    synthesis reserve evenly.
+
+    Args:
+        round_number: 1-based round index (included in events)
+        messages: Messages sent to every council member
+        on_event: Optional event callback
+        policy: Quorum/deadline policy for the round
+        report: Dict filled with the round's fan-out outcome
+        rounds_left: Rounds still to run, including this one
+
+    Returns:
+        Successful responses in council order
+    """
+    round_results = []
+    with budget.stage(1 / rounds_left, reserve=COUNCIL_CHAIRMAN_RESERVE), tracing.stage(f"round_{round_number}"):
+        async for model, response in query_models_as_completed(
+            COUNCIL_MODELS, messages, policy=policy, report=report
+        ):
+            if response is not None:
+                result = {
+                    "model": model,
+                    "response": response.get('content', '')
+                }
+                round_results.append(result)
+                if on_event is not None:
+                    on_event({"type": "round_response", "round": round_number, "data": result})
+
+    round_results.sort(key=lambda result: COUNCIL_MODELS.index(result["model"]))
+    return round_results
+
+
+async def run_round_table_council(
+    user_query: str,
+    iterations: int = 2,
+    on_event: Optional[EventCallback] = None,
+    policy: Optional[FanoutPolicy] = None,
+    deadline: Optional[float] = None
+) -> Tuple[List, Dict]:
     """
     Run the Round Table council process.
     
@@ -15,23 +66,37 @@ async def run_round_table_council(user_query: str, iterations: int = 2) -> Tuple
     Args:
         user_query: The user's question
         iterations: Number of rounds agents should iterate (default 2)
+        on_event: Optional callback receiving a 'round_response' event per
+            member per round and the synthesis 'token' events
+        policy: Quorum/deadline policy applied to every round (defaults to config)
+        deadline: Seconds the whole run may take (None = no overall budget);
+            COUNCIL_CHAIRMAN_RESERVE of it is kept for the synthesis
     
     Returns:
-        Tuple of (iteration_results, metadata)
+        Tuple of (iteration_results, synthesis_result, metadata);
+        metadata["timings"] holds the round and model call spans
     """
+    with budget.limit(deadline), tracing.trace() as trace:
+        iteration_results, synthesis_result, metadata = await _run_round_table_council(
+            user_query, iterations, on_event, policy
+        )
+    metadata["timings"] = trace.summary()
+    return iteration_results, synthesis_result, metadata
+
+
+async def _run_round_table_council(
+    user_query: str,
+    iterations: int,
+    on_event: Optional[EventCallback],
+    policy: Optional[FanoutPolicy]
+) -> Tuple[List, Dict]:
     iteration_results = []
+    fanout = {}
     
     # Initial round - collect responses
     messages = [{"role": "user", "content": user_query}]
-    responses = await query_models_parallel(COUNCIL_MODELS, messages)
-    
-    round_1_results = []
-    for model, response in responses.items():
-        if response is not None:
-            round_1_results.append({
-                "model": model,
-                "response": response.get('content', '')
-            })
+    fanout["round_1"] = {}
+    round_1_results = await _collect_round(1, messages, on_event, policy, fanout["round_1"], iterations)
     
     iteration_results.append({
         "round": 1,
@@ -62,15 +127,11 @@ Aim to either build upon the best ideas or offer a genuinely different perspecti
         iteration_messages = [{"role": "user", "content": iteration_prompt}]
         
         # Get refined responses from all models
-        iteration_responses = await query_models_parallel(COUNCIL_MODELS, iteration_messages)
-        
-        iteration_round_results = []
-        for model, response in iteration_responses.items():
-            if response is not None:
-                iteration_round_results.append({
-                    "model": model,
-                    "response": response.get('content', '')
-                })
+        fanout[f"round_{iteration}"] = {}
+        iteration_round_results = await _collect_round(
+            iteration, iteration_messages, on_event, policy, fanout[f"round_{iteration}"],
+            iterations - iteration + 1
+        )
         
         iteration_results.append({
             "round": iteration,
@@ -96,7 +157,11 @@ Please synthesize all of these perspectives into a comprehensive, well-rounded f
 The answer should integrate the different viewpoints and create a cohesive response."""
     
     synthesis_messages = [{"role": "user", "content": synthesis_prompt}]
-    synthesis_response = await query_model(CHAIRMAN_MODEL, synthesis_messages)
+    with tracing.stage("synthesis"):
+        synthesis_response = await query_model(
+            CHAIRMAN_MODEL, synthesis_messages,
+            on_delta=model_token_emitter(on_event, "synthesis", CHAIRMAN_MODEL)
+        )
     
     synthesis_result = {
         "model": CHAIRMAN_MODEL,
@@ -108,7 +173,8 @@ The answer should integrate the different viewpoints and create a cohesive respo
         "iterations": iterations,
         "total_models": len(COUNCIL_MODELS),
         "models": COUNCIL_MODELS,
-        "synthesis_model": CHAIRMAN_MODEL
+        "synthesis_model": CHAIRMAN_MODEL,
+        "fanout": fanout
     }
     
     return iteration_results, synthesis_result, metadata
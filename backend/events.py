@@ -0,0 +1,57 @@
+"""
+Progress events emitted by the councils while they run.
+
+Council jobs (backend/jobs.py) pass Job.emit as on_event, which records
+each event and relays it to the job's SSE clients.
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+# Councils report progress by calling on_event(event) with a JSON-serializable dict
+EventCallback = Callable[[Dict[str, Any]], None]
+
+
+def token_emitter(
+    on_event: Optional[EventCallback],
+    stage: str
+) -> Optional[Callable[[str, str], None]]:
+    """
+    Build an on_delta(model, delta) callback that forwards tokens as events.
+
+    Args:
+        on_event: Event callback supplied by the caller (may be None)
+        stage: Stage name attached to every token event (e.g. "stage1")
+
+    Returns:
+        Callback producing 'token' events, or None if nobody is listening
+    """
+    if on_event is None:
+        return None
+
+    def on_delta(model: str, delta: str):
+        on_event({"type": "token", "stage": stage, "model": model, "delta": delta})
+
+    return on_delta
+
+
+def model_token_emitter(
+    on_event: Optional[EventCallback],
+    stage: str,
+    model: str
+) -> Optional[Callable[[str], None]]:
+    """
+    Build an on_delta(delta) callback for a single model's token events.
+
+    Args:
+        on_event: Event callback supplied by the caller (may be None)
+        stage: Stage name attached to every token event (e.g. "stage3")
+        model: Model whose tokens are being forwarded
+
+    Returns:
+        Callback producing 'token' events, or None if nobody is listening
+    """
+    emit = token_emitter(on_event, stage)
+    if emit is None:
+        return None
+    return lambda delta: emit(model, delta)
+
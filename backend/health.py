@@ -0,0 +1,196 @@
+"""Per-model health registry with a circuit breaker."""
+
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from .config import (
+    HEALTH_WINDOW,
+    HEALTH_WINDOW_SECONDS,
+    HEALTH_MIN_REQUESTS,
+    HEALTH_FAILURE_THRESHOLD,
+    HEALTH_CONSECUTIVE_FAILURES,
+    HEALTH_OPEN_SECONDS,
+    HEALTH_MAX_OPEN_SECONDS,
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+OK = "ok"
+ERROR = "error"
+TIMEOUT = "timeout"
+
+
+class ModelHealth:
+    """
+    Rolling outcomes of one model plus its circuit state.
+
+    closed: requests flow normally.
+    open: requests are refused until the cool-down ends.
+    half_open: a single probe request is let through; its outcome closes
+        the circuit again or re-opens it with a doubled cool-down.
+    """
+
+    def __init__(self):
+        # (timestamp, outcome, latency seconds)
+        self.outcomes: Deque[Tuple[float, str, float]] = deque(maxlen=HEALTH_WINDOW)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.open_seconds = HEALTH_OPEN_SECONDS
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+
+    def _recent(self) -> List[Tuple[float, str, float]]:
+        cutoff = time.time() - HEALTH_WINDOW_SECONDS
+        return [o for o in self.outcomes if o[0] >= cutoff]
+
+    def cooldown_remaining(self) -> float:
+        return max(0.0, self.opened_at + self.open_seconds - time.time())
+
+    def snapshot(self) -> Dict[str, Any]:
+        recent = self._recent()
+        total = len(recent)
+        errors = sum(1 for o in recent if o[1] == ERROR)
+        timeouts = sum(1 for o in recent if o[1] == TIMEOUT)
+        latencies = sorted(o[2] for o in recent if o[1] == OK)
+        return {
+            "state": self.state,
+            "requests": total,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "timeout_rate": round(timeouts / total, 4) if total else 0.0,
+            "latency_p50": _percentile(latencies, 50),
+            "latency_p95": _percentile(latencies, 95),
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in": round(self.cooldown_remaining(), 1) if self.state == OPEN else 0.0,
+        }
+
+
+def _percentile(ordered: List[float], percentile: float) -> Optional[float]:
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(percentile / 100.0 * len(ordered)))
+    return round(ordered[rank - 1], 3)
+
+
+class HealthRegistry:
+    """Tracks every model's health and decides whether it may be called."""
+
+    def __init__(self):
+        self._models: Dict[str, ModelHealth] = {}
+
+    def _health(self, model: str) -> ModelHealth:
+        health = self._models.get(model)
+        if health is None:
+            health = ModelHealth()
+            self._models[model] = health
+        return health
+
+    def is_available(self, model: str) -> bool:
+        """
+        Whether a request to the model could be admitted right now
+        (closed, or open with the cool-down over). Has no side effects.
+        """
+        health = self._models.get(model)
+        if health is None or health.state == CLOSED:
+            return True
+        if health.state == OPEN:
+            return health.cooldown_remaining() <= 0
+        return not health.probe_in_flight
+
+    def available(self, models: List[str]) -> List[str]:
+        """Filter a model list down to those whose circuit admits requests."""
+        return [model for model in models if self.is_available(model)]
+
+    def acquire(self, model: str) -> bool:
+        """
+        Ask to send a request. An open circuit whose cool-down has passed
+        moves to half-open and this caller becomes the probe.
+
+        Returns:
+            True if the request may be sent
+        """
+        health = self._health(model)
+        if health.state == CLOSED:
+            return True
+        if health.state == OPEN:
+            if health.cooldown_remaining() > 0:
+                return False
+            health.state = HALF_OPEN
+            health.probe_in_flight = False
+        if health.probe_in_flight:
+            return False
+        health.probe_in_flight = True
+        return True
+
+    def release(self, model: str):
+        """Give back a probe slot without an outcome (e.g. the call was cancelled)."""
+        health = self._health(model)
+        if health.state == HALF_OPEN:
+            health.probe_in_flight = False
+
+    def record(self, model: str, outcome: str, latency: float):
+        """
+        Record the outcome of a request and update the circuit.
+
+        Args:
+            model: Model that was called
+            outcome: OK, ERROR or TIMEOUT
+            latency: Seconds the request took
+        """
+        health = self._health(model)
+        health.outcomes.append((time.time(), outcome, latency))
+
+        if outcome == OK:
+            health.consecutive_failures = 0
+            if health.state == HALF_OPEN:
+                print(f"Circuit for {model} closed after a successful probe")
+                health.state = CLOSED
+                health.open_seconds = HEALTH_OPEN_SECONDS
+                health.outcomes.clear()
+                health.outcomes.append((time.time(), outcome, latency))
+            health.probe_in_flight = False
+            return
+
+        health.consecutive_failures += 1
+
+        if health.state == HALF_OPEN:
+            health.open_seconds = min(HEALTH_MAX_OPEN_SECONDS, health.open_seconds * 2)
+            self._open(model, health)
+            return
+
+        recent = health._recent()
+        failures = sum(1 for o in recent if o[1] != OK)
+        tripped = (
+            health.consecutive_failures >= HEALTH_CONSECUTIVE_FAILURES
+            or (len(recent) >= HEALTH_MIN_REQUESTS and failures / len(recent) >= HEALTH_FAILURE_THRESHOLD)
+        )
+        if health.state == CLOSED and tripped:
+            self._open(model, health)
+
+    def _open(self, model: str, health: ModelHealth):
+        health.state = OPEN
+        health.opened_at = time.time()
+        health.probe_in_flight = False
+        print(f"Circuit for {model} opened for {health.open_seconds:.0f}s")
+
+    def snapshot(self, models: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Health of every tracked model, plus any extra models requested.
+
+        Args:
+            models: Models to include even if they have no history yet
+        """
+        names = list(self._models)
+        for model in models or []:
+            if model not in self._models:
+                names.append(model)
+        return {
+            model: (self._models[model].snapshot() if model in self._models else ModelHealth().snapshot())
+            for model in names
+        }
+
+
+# Process-wide registry fed by query_model
+health_registry = HealthRegistry()
@@ -0,0 +1,615 @@
+"""Background council jobs with a persistent, resumable event log.
+
+A council turn runs as an asyncio task owned by the JobManager instead of
+inside the HTTP response. Every event the turn emits gets an increasing
+id, is kept in memory and is appended to the job's log file
+(`JOBS_DIR/<job_id>.jsonl`). SSE clients subscribe from any event id, so
+a dropped connection can resume where it left off (Last-Event-ID)
+without starting a new run.
+
+Log layout: a header line `{"job": {...}}`, one `{"id": n, "event": {...}}`
+line per event, and a trailer `{"status": ..., "error": ...}` once the job
+has finished. Jobs started by another worker process are followed by
+tailing their log file. Logs are written by one background thread, so the
+event loop never waits on the disk and each log's lines stay in order.
+
+When the last client detaches and nobody reattaches within the disconnect
+grace period, the job is cancelled: in-flight model requests are aborted,
+later stages never start and the partial turn is saved as incomplete.
+Clients following the job from another worker keep it alive by touching
+its `.watch` file.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from . import async_storage, budget, tracing
+from .config import (
+    JOBS_DIR,
+    JOB_RETENTION,
+    JOB_LOG_RETENTION,
+    JOB_POLL_INTERVAL,
+    JOB_CANCEL_ON_DISCONNECT,
+    JOB_DISCONNECT_GRACE,
+)
+from .council import (
+    generate_conversation_title,
+    stage1_collect_responses,
+    stage2_collect_rankings,
+    stage3_synthesize_final,
+    calculate_aggregate_rankings,
+)
+from .councils import run_round_table_council, run_hierarchy_council, run_assembly_line_council
+from .metrics import REQUEST_LATENCY
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+# Not finished, and the process running it is gone
+INTERRUPTED = "interrupted"
+
+FINISHED = {COMPLETED, FAILED, CANCELLED, INTERRUPTED}
+
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+_log_writer: Optional[ThreadPoolExecutor] = None
+
+
+def _get_log_writer() -> ThreadPoolExecutor:
+    global _log_writer
+    if _log_writer is None:
+        # A single thread: writes to a log are applied in the order they were queued
+        _log_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-log")
+    return _log_writer
+
+
+class Job:
+    """One council turn: its state, its events and its log file."""
+
+    def __init__(
+        self,
+        conversation_id: str,
+        content: str,
+        council_type: str,
+        log_dir: str,
+        disconnect_grace: Optional[float] = None
+    ):
+        """
+        Args:
+            conversation_id: Conversation the turn belongs to
+            content: User message
+            council_type: Council to run
+            log_dir: Directory for the job's event log
+            disconnect_grace: Seconds to wait for a client to reattach before
+                cancelling the job (None keeps running without clients)
+        """
+        self.id = uuid.uuid4().hex
+        self.conversation_id = conversation_id
+        self.content = content
+        self.council_type = council_type
+        self.status = PENDING
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.events: List[Tuple[int, Dict[str, Any]]] = []
+        self.task: Optional[asyncio.Task] = None
+        self.disconnect_grace = disconnect_grace
+        self.subscribers = 0
+        self._abandon_timer: Optional[asyncio.TimerHandle] = None
+        self.watch_path = os.path.join(log_dir, f"{self.id}.watch")
+        self._wakeup = asyncio.get_running_loop().create_future()
+
+        self.log_path = os.path.join(log_dir, f"{self.id}.jsonl")
+        # Records not handed to the writer thread yet; token events are
+        # written together with the next stage event
+        self._pending: List[Dict[str, Any]] = []
+        self._log_closed = False
+        # The latest write queued on the writer thread
+        self.written: Optional[asyncio.Future] = None
+        self._write({"job": self.info()})
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    def info(self) -> Dict[str, Any]:
+        """Status summary (the body of GET /api/jobs/{id})."""
+        return {
+            "id": self.id,
+            "conversation_id": self.conversation_id,
+            "council_type": self.council_type,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "last_event_id": len(self.events),
+            "pid": os.getpid(),
+        }
+
+    def _write(self, record: Dict[str, Any], flush: bool = True, close: bool = False):
+        """Queue a log record; flush hands the queued records to the writer thread."""
+        if self._log_closed:
+            return
+        self._pending.append(record)
+        if not flush:
+            return
+        records, self._pending = self._pending, []
+        self._log_closed = close
+        self.written = asyncio.get_running_loop().run_in_executor(
+            _get_log_writer(), _append_records, self.log_path, records
+        )
+
+    def _wake(self):
+        if not self._wakeup.done():
+            self._wakeup.set_result(None)
+        self._wakeup = asyncio.get_running_loop().create_future()
+
+    def emit(self, event: Dict[str, Any]):
+        """Record an event and wake subscribers (usable as an on_event callback)."""
+        event_id = len(self.events) + 1
+        self.events.append((event_id, event))
+        self.updated_at = time.time()
+        self._write({"id": event_id, "event": event}, flush=event.get("type") != "token")
+        self._wake()
+
+    def start(self):
+        self.status = RUNNING
+        self.updated_at = time.time()
+
+    def finish(self, status: str, error: Optional[str] = None):
+        """Mark the job finished, close its log and release subscribers."""
+        if self.done:
+            return
+        self.status = status
+        self.error = error
+        self.updated_at = time.time()
+        self._write({"status": status, "error": error}, close=True)
+        if self._abandon_timer is not None:
+            self._abandon_timer.cancel()
+        self._wake()
+
+    async def subscribe(self, after: int = 0) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Yield (event_id, event) for every event after the given id, live
+        until the job finishes.
+        """
+        position = max(0, after)
+        self.subscribers += 1
+        if self._abandon_timer is not None:
+            self._abandon_timer.cancel()
+            self._abandon_timer = None
+        try:
+            while True:
+                while position < len(self.events):
+                    yield self.events[position]
+                    position += 1
+                if self.done:
+                    return
+                # Shielded: a subscriber going away must not cancel the shared future
+                await asyncio.shield(self._wakeup)
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0:
+                self._schedule_abandon()
+
+    def _schedule_abandon(self):
+        if self.done or self.disconnect_grace is None:
+            return
+        loop = asyncio.get_running_loop()
+        self._abandon_timer = loop.call_later(self.disconnect_grace, self._abandon)
+
+    def _watched_elsewhere(self) -> bool:
+        try:
+            return time.time() - os.path.getmtime(self.watch_path) < self.disconnect_grace
+        except OSError:
+            return False
+
+    def _abandon(self):
+        """Cancel the job if no client came back during the grace period."""
+        self._abandon_timer = None
+        if self.done or self.subscribers > 0 or self.task is None:
+            return
+        if self._watched_elsewhere():
+            self._schedule_abandon()
+            return
+        print(f"Cancelling job {self.id}: client disconnected")
+        self.task.cancel("Client disconnected")
+
+
+def _append_records(path: str, records: List[Dict[str, Any]]):
+    """Append records to a job log (runs on the log writer thread)."""
+    data = "".join(json.dumps(record) + "\n" for record in records)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(data)
+    except OSError as e:
+        print(f"Could not write job log {path}: {e}")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _touch(path: str):
+    with open(path, "a"):
+        os.utime(path)
+
+
+def read_job_log(path: str, offset: int = 0) -> Tuple[Optional[Dict[str, Any]], List[Tuple[int, Dict[str, Any]]], Optional[Dict[str, Any]], int]:
+    """
+    Parse a job log from a byte offset, ignoring a trailing partial line.
+
+    Returns:
+        Tuple of (header info or None, events, trailer or None, offset after the last full line)
+    """
+    info = None
+    events = []
+    trailer = None
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+
+    end = data.rfind(b"\n") + 1
+    for line in data[:end].splitlines():
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if "job" in record:
+            info = record["job"]
+        elif "id" in record:
+            events.append((record["id"], record["event"]))
+        elif "status" in record:
+            trailer = record
+    return info, events, trailer, offset + end
+
+
+class JobManager:
+    """Starts council jobs and serves their status and event streams."""
+
+    def __init__(
+        self,
+        log_dir: str = JOBS_DIR,
+        retention: float = JOB_RETENTION,
+        log_retention: float = JOB_LOG_RETENTION,
+        poll_interval: float = JOB_POLL_INTERVAL,
+        cancel_on_disconnect: bool = JOB_CANCEL_ON_DISCONNECT,
+        disconnect_grace: float = JOB_DISCONNECT_GRACE
+    ):
+        """
+        Args:
+            log_dir: Directory for the per-job event logs
+            retention: Seconds a finished job stays in memory
+            log_retention: Seconds a job log file is kept on disk
+            poll_interval: Seconds between reads when tailing another worker's job
+            cancel_on_disconnect: Cancel a job once its clients have gone
+                (False lets every turn finish and be saved)
+            disconnect_grace: Seconds a job waits for a client to reattach
+        """
+        self.log_dir = log_dir
+        self.retention = retention
+        self.log_retention = log_retention
+        self.poll_interval = poll_interval
+        self.cancel_on_disconnect = cancel_on_disconnect
+        self.disconnect_grace = disconnect_grace
+        self._jobs: Dict[str, Job] = {}
+        self._last_prune = 0.0
+
+    def log_path(self, job_id: str) -> Optional[str]:
+        """Path of a job's log, or None for a malformed id."""
+        if not _JOB_ID.match(job_id):
+            return None
+        return os.path.join(self.log_dir, f"{job_id}.jsonl")
+
+    def start(
+        self,
+        conversation_id: str,
+        content: str,
+        council_type: str,
+        is_first_message: bool,
+        deadline: Optional[float] = None
+    ) -> Job:
+        """
+        Start running a council turn in the background.
+
+        Args:
+            conversation_id: Conversation the turn belongs to
+            content: User message
+            council_type: "default", "round_table", "hierarchy" or "assembly_line"
+            is_first_message: Whether to generate a conversation title
+            deadline: Seconds the council may take (None = no overall budget)
+
+        Returns:
+            The running job
+        """
+        self._prune()
+        job = Job(
+            conversation_id, content, council_type, self.log_dir,
+            disconnect_grace=self.disconnect_grace if self.cancel_on_disconnect else None
+        )
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job, is_first_message, deadline))
+        # Also covers a client that disconnects before it starts reading
+        job._schedule_abandon()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """A job running (or recently finished) in this process."""
+        return self._jobs.get(job_id)
+
+    async def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Status of a job from memory, or from its log if another (or an
+        earlier) process ran it.
+
+        Returns:
+            Status dict, or None if the job is unknown
+        """
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.info()
+
+        path = self.log_path(job_id)
+        if path is None or not os.path.exists(path):
+            return None
+        info, events, trailer, _ = await asyncio.to_thread(read_job_log, path)
+        if info is None:
+            return None
+        info["last_event_id"] = events[-1][0] if events else 0
+        if trailer is not None:
+            info["status"] = trailer["status"]
+            info["error"] = trailer.get("error")
+        elif not self._running_elsewhere(info):
+            info["status"] = INTERRUPTED
+        return info
+
+    def _running_elsewhere(self, info: Dict[str, Any]) -> bool:
+        pid = info.get("pid")
+        return bool(pid) and pid != os.getpid() and _pid_alive(pid)
+
+    async def events(self, job_id: str, after: int = 0) -> Optional[AsyncIterator[Tuple[int, Dict[str, Any]]]]:
+        """
+        Event stream of a job starting after the given event id.
+
+        Returns:
+            Async iterator of (event_id, event), or None if the job is unknown
+        """
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.subscribe(after)
+
+        path = self.log_path(job_id)
+        if path is None or not os.path.exists(path):
+            return None
+        return self._tail(job_id, path, after)
+
+    async def _tail(self, job_id: str, path: str, after: int) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """Follow the log of a job owned by another process."""
+        offset = 0
+        info = None
+        watch_path = os.path.join(self.log_dir, f"{job_id}.watch")
+        while True:
+            # Tells the owning process a client is still attached
+            await asyncio.to_thread(_touch, watch_path)
+            # Checked before reading so lines written just before the owner died are seen
+            alive = info is None or self._running_elsewhere(info)
+            header, events, trailer, offset = await asyncio.to_thread(read_job_log, path, offset)
+            info = header or info
+            for event_id, event in events:
+                if event_id > after:
+                    yield event_id, event
+                    after = event_id
+            if trailer is not None or info is None:
+                return
+            if not alive:
+                # The owning process died mid-run; end the stream like a failed job
+                yield after + 1, {"type": "error", "message": "Job was interrupted"}
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    async def shutdown(self):
+        """Cancel running jobs (their partial turns are saved) and wait for them."""
+        tasks = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        # Let the final log lines reach the disk
+        writes = [job.written for job in self._jobs.values() if job.written is not None]
+        if writes:
+            await asyncio.gather(*writes, return_exceptions=True)
+
+    def _prune(self):
+        """Forget finished jobs and delete old logs (at most once a minute)."""
+        now = time.time()
+        if now - self._last_prune < 60:
+            return
+        self._last_prune = now
+
+        for job_id, job in list(self._jobs.items()):
+            if job.done and now - job.updated_at > self.retention:
+                del self._jobs[job_id]
+
+        try:
+            filenames = os.listdir(self.log_dir)
+        except FileNotFoundError:
+            return
+        for filename in filenames:
+            path = os.path.join(self.log_dir, filename)
+            try:
+                if os.path.splitext(filename)[0] not in self._jobs and now - os.path.getmtime(path) > self.log_retention:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    async def _run(self, job: Job, is_first_message: bool, deadline: Optional[float]):
+        job.start()
+        started = time.monotonic()
+        try:
+            with budget.limit(deadline), tracing.trace():
+                await run_turn(job.conversation_id, job.content, job.council_type, is_first_message, job.emit)
+        except asyncio.CancelledError as e:
+            job.emit({"type": "cancelled", "message": str(e) or "Job cancelled"})
+            job.finish(CANCELLED, str(e) or None)
+            raise
+        except Exception as e:
+            # Send error event
+            job.emit({"type": "error", "message": str(e)})
+            job.finish(FAILED, str(e))
+        else:
+            job.finish(COMPLETED)
+        finally:
+            REQUEST_LATENCY.observe(time.monotonic() - started, council_type=job.council_type, status=job.status)
+
+
+async def run_turn(
+    conversation_id: str,
+    content: str,
+    council_type: str,
+    is_first_message: bool,
+    emit
+):
+    """
+    Run one council turn, emitting progress events and saving the result.
+
+    The user message, title and answer are committed together; if the turn
+    fails, whatever finished is saved as an incomplete answer. Runs within
+    the caller's latency budget, if any (see backend/budget.py); inside a
+    trace, the saved metadata["timings"] covers the whole turn including
+    the title (see backend/tracing.py).
+
+    Args:
+        conversation_id: Conversation to add the turn to
+        content: User message
+        council_type: "default", "round_table", "hierarchy" or "assembly_line"
+        is_first_message: Whether to generate a conversation title
+        emit: Callback receiving every event, ending with 'complete'
+    """
+    title_task = None
+    try:
+        async with async_storage.transaction(conversation_id) as tx:
+            # Add user message (saved now, so a crash mid-council keeps it)
+            tx.add_user_message(content)
+            await async_storage.flush(tx)
+            tx.set_partial({"role": "assistant", "council_type": council_type})
+
+            # Start title generation in parallel (don't await yet)
+            if is_first_message:
+                title_task = asyncio.create_task(generate_conversation_title(content, council_type))
+
+            # Route to appropriate council type
+            if council_type == "round_table":
+                # Round Table: Collaborative iteration
+                emit({'type': 'council_start', 'council_type': 'round_table'})
+                iteration_results, synthesis_result, metadata = await run_round_table_council(content, iterations=2, on_event=emit)
+                emit({'type': 'council_complete', 'iterations': iteration_results, 'synthesis': synthesis_result, 'metadata': metadata})
+
+                assistant_message = {
+                    "role": "assistant",
+                    "council_type": "round_table",
+                    "iterations": iteration_results,
+                    "synthesis": synthesis_result,
+                    "metadata": metadata
+                }
+
+            elif council_type == "hierarchy":
+                # Hierarchy: Lead agent makes final call
+                emit({'type': 'council_start', 'council_type': 'hierarchy'})
+                junior_responses, lead_decision, metadata = await run_hierarchy_council(content, on_event=emit)
+                emit({'type': 'council_complete', 'junior_responses': junior_responses, 'lead_decision': lead_decision, 'metadata': metadata})
+
+                assistant_message = {
+                    "role": "assistant",
+                    "council_type": "hierarchy",
+                    "junior_responses": junior_responses,
+                    "lead_decision": lead_decision,
+                    "metadata": metadata
+                }
+
+            elif council_type == "assembly_line":
+                # Assembly Line: Sequential workflow
+                emit({'type': 'council_start', 'council_type': 'assembly_line'})
+                stage_results, final_output, metadata = await run_assembly_line_council(content, on_event=emit)
+                emit({'type': 'council_complete', 'stages': stage_results, 'final_output': final_output, 'metadata': metadata})
+
+                assistant_message = {
+                    "role": "assistant",
+                    "council_type": "assembly_line",
+                    "stages": stage_results,
+                    "final_output": final_output,
+                    "metadata": metadata
+                }
+
+            else:
+                # Default: 3-stage council
+                emit({'type': 'stage1_start'})
+                fanout = {"stage1": {}, "stage2": {}}
+                stage1_results = await stage1_collect_responses(content, on_event=emit, report=fanout["stage1"])
+                tx.set_partial({"role": "assistant", "council_type": "default", "stage1": stage1_results})
+                emit({'type': 'stage1_complete', 'data': stage1_results})
+
+                emit({'type': 'stage2_start'})
+                stage2_results, label_to_model = await stage2_collect_rankings(content, stage1_results, report=fanout["stage2"])
+                aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
+                metadata = {"label_to_model": label_to_model, "aggregate_rankings": aggregate_rankings, "fanout": fanout}
+                tx.set_partial({
+                    "role": "assistant",
+                    "council_type": "default",
+                    "stage1": stage1_results,
+                    "stage2": stage2_results,
+                    "metadata": metadata
+                })
+                emit({'type': 'stage2_complete', 'data': stage2_results, 'metadata': {'label_to_model': label_to_model, 'aggregate_rankings': aggregate_rankings}})
+
+                emit({'type': 'stage3_start'})
+                stage3_result = await stage3_synthesize_final(content, stage1_results, stage2_results, on_event=emit)
+                emit({'type': 'stage3_complete', 'data': stage3_result})
+
+                assistant_message = {
+                    "role": "assistant",
+                    "council_type": "default",
+                    "stage1": stage1_results,
+                    "stage2": stage2_results,
+                    "stage3": stage3_result,
+                    "metadata": metadata
+                }
+
+            # Wait for title generation if it was started
+            if title_task:
+                title = await title_task
+                tx.update_conversation_title(title)
+                emit({'type': 'title_complete', 'data': {'title': title}})
+
+            trace = tracing.current()
+            if trace is not None:
+                assistant_message["metadata"]["timings"] = trace.summary()
+
+            # Save complete assistant message
+            tx.add_assistant_message_obj(assistant_message)
+    finally:
+        if title_task is not None and not title_task.done():
+            title_task.cancel()
+
+    # Send completion event
+    emit({'type': 'complete'})
+
+
+# Process-wide job runner used by the streaming endpoints
+job_manager = JobManager()
@@ -0,0 +1,55 @@
+"""Rolling per-model latency samples used to decide when to hedge requests."""
+
+import math
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from .config import HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, HEDGE_MIN_DELAY, HEDGE_WINDOW
+
+
+class LatencyTracker:
+    """
+    Keeps the most recent time-to-first-byte samples per model and mode
+    (streaming vs. non-streaming, whose first bytes mean different things).
+    """
+
+    def __init__(self, window: int = HEDGE_WINDOW):
+        self.window = window
+        self._samples: Dict[Tuple[str, bool], Deque[float]] = {}
+
+    def record(self, model: str, streaming: bool, seconds: float):
+        """Add a time-to-first-byte sample."""
+        samples = self._samples.get((model, streaming))
+        if samples is None:
+            samples = deque(maxlen=self.window)
+            self._samples[(model, streaming)] = samples
+        samples.append(seconds)
+
+    def percentile(self, model: str, streaming: bool, percentile: float) -> Optional[float]:
+        """
+        Nearest-rank percentile of the recorded samples.
+
+        Returns:
+            Seconds, or None if fewer than HEDGE_MIN_SAMPLES samples exist
+        """
+        samples = self._samples.get((model, streaming))
+        if not samples or len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        rank = max(1, math.ceil(percentile / 100.0 * len(ordered)))
+        return ordered[rank - 1]
+
+    def hedge_delay(self, model: str, streaming: bool) -> Optional[float]:
+        """
+        How long to wait for a first byte before sending a hedged request.
+
+        Returns:
+            Seconds, or None if there is not enough history to hedge safely
+        """
+        observed = self.percentile(model, streaming, HEDGE_PERCENTILE)
+        if observed is None:
+            return None
+        return max(HEDGE_MIN_DELAY, observed)
+
+
+# Process-wide tracker fed by query_model
+latency_tracker = LatencyTracker()
@@ -0,0 +1,176 @@
+"""Event-loop lag monitor and slow-callback detector.
+
+Everything (handlers, SSE generators, JSON encoding) shares one asyncio
+loop, so a single callback that blocks stalls every stream at once. Two
+pieces watch for that:
+
+- A sampler task sleeps LOOP_MONITOR_INTERVAL seconds at a time and
+  records how late it wakes up (the delay any other task would see).
+- A watchdog thread notices when the sampler has been overdue for
+  LOOP_SLOW_CALLBACK seconds and captures the loop thread's stack and the
+  task it is running - i.e. the code blocking the loop, caught in the act.
+
+When the stall ends its full duration is filled in. Lag samples and slow
+callbacks feed the Prometheus metrics (backend/metrics.py); the recent
+slow callbacks with their stacks are served by GET /api/loop/stats and
+printed when LOOP_MONITOR_LOG is on. Stacks are per worker process.
+"""
+
+import asyncio
+import math
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+from .config import (
+    LOOP_MONITOR_INTERVAL,
+    LOOP_SLOW_CALLBACK,
+    LOOP_SLOW_CALLBACK_HISTORY,
+    LOOP_MONITOR_LOG,
+)
+from .metrics import LOOP_LAG, SLOW_CALLBACKS
+
+# Innermost frames kept per captured stack
+_STACK_DEPTH = 30
+
+
+def _task_name(task: Optional[asyncio.Task]) -> Optional[str]:
+    if task is None:
+        return None
+    coro = task.get_coro()
+    return f"{task.get_name()} ({getattr(coro, '__qualname__', type(coro).__name__)})"
+
+
+class LoopMonitor:
+    """Samples loop lag and records callbacks that block the loop, with their stack."""
+
+    def __init__(
+        self,
+        interval: float = LOOP_MONITOR_INTERVAL,
+        threshold: float = LOOP_SLOW_CALLBACK,
+        history: int = LOOP_SLOW_CALLBACK_HISTORY,
+        log: bool = LOOP_MONITOR_LOG
+    ):
+        """
+        Args:
+            interval: Seconds between lag samples
+            threshold: Lag in seconds from which a stall counts as a slow callback
+            history: Slow callbacks kept for /api/loop/stats
+            log: Print each slow callback with its stack
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.log = log
+        self.slow_callbacks: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self.slow_callbacks_total = 0
+        # About a minute of samples for the stats endpoint
+        self._lags: Deque[float] = deque(maxlen=max(1, int(60 / interval)))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._sampler: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        # Monotonic time the sampler went to sleep; it is due `interval` later
+        self._slept_at = 0.0
+        # Stall captured by the watchdog that has not ended yet
+        self._pending: Optional[Dict[str, Any]] = None
+
+    def start(self):
+        """Start sampling on the running loop and start the watchdog thread."""
+        if self._sampler is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._slept_at = time.monotonic()
+        self._stopped.clear()
+        self._sampler = asyncio.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        if self._sampler is None:
+            return
+        self._stopped.set()
+        self._sampler.cancel()
+        try:
+            await self._sampler
+        except asyncio.CancelledError:
+            pass
+        self._sampler = None
+        self._watchdog.join()
+        self._watchdog = None
+
+    async def _sample(self):
+        while True:
+            self._slept_at = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - self._slept_at - self.interval)
+            self._lags.append(lag)
+            LOOP_LAG.observe(lag)
+            if lag >= self.threshold:
+                self._record_stall(lag)
+
+    def _watch(self):
+        """Watchdog thread: capture the loop's stack while it is blocked."""
+        slept_at = None
+        while not self._stopped.wait(self.threshold / 2):
+            overdue = time.monotonic() - self._slept_at - self.interval
+            if overdue < self.threshold or self._slept_at == slept_at:
+                continue
+            # One capture per stall: the sampler moves _slept_at once it runs again
+            slept_at = self._slept_at
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = traceback.extract_stack(frame)[-_STACK_DEPTH:] if frame is not None else []
+            with self._lock:
+                self._pending = {
+                    "at": time.time() - overdue,
+                    "task": _task_name(asyncio.current_task(self._loop)),
+                    "stack": [f"{entry.filename}:{entry.lineno} in {entry.name}" for entry in stack],
+                }
+            del frame
+
+    def _record_stall(self, lag: float):
+        with self._lock:
+            stall, self._pending = self._pending, None
+        if stall is None:
+            # Shorter than the watchdog's polling could catch, or many small callbacks
+            stall = {"at": time.time() - lag, "task": None, "stack": []}
+        stall["duration_s"] = round(lag, 4)
+        self.slow_callbacks.append(stall)
+        self.slow_callbacks_total += 1
+        SLOW_CALLBACKS.inc()
+        if self.log:
+            where = "\n    ".join(stall["stack"][-10:]) or "(no stack captured)"
+            print(f"Event loop blocked for {lag:.2f}s in {stall['task'] or 'a callback'}:\n    {where}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Recent lag percentiles and slow callbacks of this worker."""
+        ordered = sorted(self._lags)
+
+        def percentile(p: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[max(1, math.ceil(p / 100.0 * len(ordered))) - 1], 4)
+
+        return {
+            "pid": os.getpid(),
+            "running": self._sampler is not None,
+            "interval_s": self.interval,
+            "threshold_s": self.threshold,
+            "lag": {
+                "samples": len(ordered),
+                "p50_s": percentile(50),
+                "p99_s": percentile(99),
+                "max_s": round(ordered[-1], 4) if ordered else None,
+            },
+            "slow_callbacks_total": self.slow_callbacks_total,
+            "slow_callbacks": list(self.slow_callbacks),
+        }
+
+
+# Process-wide monitor, started with the app when LOOP_MONITOR_ENABLED
+loop_monitor = LoopMonitor()
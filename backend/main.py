@@ -1,19 +1,51 @@
 """FastAPI backend for LLM Council."""
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Dict, Any, Optional
+from contextlib import asynccontextmanager
 import uuid
 import json
 import asyncio
+import time
 
 from . import storage
+from . import async_storage
+from . import openrouter
+from . import budget
+from .cache import response_cache
+from .scheduler import scheduler
+from .health import health_registry
+from .config import COUNCIL_MODELS, CHAIRMAN_MODEL, COUNCIL_DEADLINE, OPENROUTER_WARMUP_CONNECTIONS, LOOP_MONITOR_ENABLED
 from .council import run_full_council, generate_conversation_title, stage1_collect_responses, stage2_collect_rankings, stage3_synthesize_final, calculate_aggregate_rankings
 from .councils import run_round_table_council, run_hierarchy_council, run_assembly_line_council
+from .jobs import job_manager, COMPLETED, FAILED
+from .metrics import registry as metrics_registry, REQUEST_LATENCY, SSE_STREAMS
+from .loop_monitor import loop_monitor
 
-app = FastAPI(title="LLM Council API")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the shared OpenRouter client on startup; stop jobs, close it and storage on shutdown."""
+    await openrouter.init_client(warmup=OPENROUTER_WARMUP_CONNECTIONS > 0)
+    metrics_registry.start()
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    try:
+        yield
+    finally:
+        await job_manager.shutdown()
+        await loop_monitor.stop()
+        await metrics_registry.stop()
+        await openrouter.close_client()
+        async_storage.shutdown()
+        storage.set_backend(None)
+
+
+app = FastAPI(title="LLM Council API", lifespan=lifespan)
 
 # Enable CORS for local development
 app.add_middleware(
@@ -22,6 +54,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Job-Id"],
 )
 
 
@@ -30,10 +63,21 @@ class CreateConversationRequest(BaseModel):
     pass
 
 
+COUNCIL_TYPES = ("default", "round_table", "hierarchy", "assembly_line")
+
+
 class SendMessageRequest(BaseModel):
     """Request to send a message in a conversation."""
     content: str
     council_type: str = "default"  # "default", "round_table", "hierarchy", "assembly_line"
+    deadline: Optional[float] = Field(None, gt=0)  # Seconds the council may take (defaults to COUNCIL_DEADLINE)
+
+    @field_validator("council_type", mode="before")
+    @classmethod
+    def _known_council_type(cls, value: Any) -> str:
+        # Anything else runs the default council, so it is routed, stored and
+        # labelled in metrics as "default" (clients can't mint new label values)
+        return value if value in COUNCIL_TYPES else "default"
 
 
 class ConversationMetadata(BaseModel):
@@ -42,6 +86,7 @@ class ConversationMetadata(BaseModel):
     created_at: str
     title: str
     message_count: int
+    council_type: Optional[str] = None
 
 
 class Conversation(BaseModel):
@@ -58,34 +103,136 @@ async def root():
     return {"status": "ok", "service": "LLM Council API"}
 
 
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss statistics of the model response cache."""
+    return response_cache.stats()
+
+
+@app.get("/api/health/models")
+async def model_health():
+    """Rolling error/timeout rates, latency and circuit state per model."""
+    return health_registry.snapshot(COUNCIL_MODELS + [CHAIRMAN_MODEL])
+
+
+@app.get("/api/scheduler/stats")
+async def scheduler_stats():
+    """Queue depth, in-flight requests and cooldowns per model and API key."""
+    return scheduler.stats()
+
+
+@app.get("/api/loop/stats")
+async def loop_stats():
+    """Event-loop lag and the recent slow callbacks with their stacks (this worker only)."""
+    return loop_monitor.stats()
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics, summed over every uvicorn worker (see backend/metrics.py)."""
+    return Response(await metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/api/conversations", response_model=List[ConversationMetadata])
-async def list_conversations():
-    """List all conversations (metadata only)."""
-    return storage.list_conversations()
+async def list_conversations(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    title_prefix: Optional[str] = None,
+    council_type: Optional[str] = None,
+):
+    """
+    List conversations (metadata only), newest first, one page at a time.
+
+    The cursor for the next page is returned in the X-Next-Cursor header
+    (absent on the last page).
+    """
+    try:
+        conversations, next_cursor = await async_storage.list_conversations_page(
+            limit, cursor, title_prefix, council_type
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return conversations
 
 
 @app.post("/api/conversations", response_model=Conversation)
 async def create_conversation(request: CreateConversationRequest):
     """Create a new conversation."""
     conversation_id = str(uuid.uuid4())
-    conversation = storage.create_conversation(conversation_id)
+    conversation = await async_storage.create_conversation(conversation_id)
     return conversation
 
 
 @app.get("/api/conversations/{conversation_id}", response_model=Conversation)
 async def get_conversation(conversation_id: str):
     """Get a specific conversation with all its messages."""
-    conversation = storage.get_conversation(conversation_id)
+    conversation = await async_storage.get_conversation(conversation_id)
     if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
     return conversation
 
 
+@app.get("/api/conversations/{conversation_id}/messages")
+async def get_conversation_messages(
+    conversation_id: str,
+    limit: int = Query(20, ge=1, le=200),
+    before: Optional[int] = Query(None, ge=0),
+    full: bool = False,
+):
+    """
+    Get the newest messages of a conversation, one window at a time.
+
+    Pass the returned next_cursor as `before` to load older messages.
+    Unless `full` is set, Stage 2 critiques and all but the last
+    round-table round are omitted (listed under each message's "omitted")
+    and can be loaded through the sub-resources below.
+    """
+    window = await async_storage.get_messages(conversation_id, limit, before, summarize=not full)
+    if window is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return window
+
+
+async def _get_message_or_404(conversation_id: str, index: int) -> Dict[str, Any]:
+    message = await async_storage.get_message(conversation_id, index)
+    if message is None:
+        raise HTTPException(status_code=404, detail="Message not found")
+    return message
+
+
+@app.get("/api/conversations/{conversation_id}/messages/{index}")
+async def get_conversation_message(conversation_id: str, index: int):
+    """Get one complete message, including every stage body."""
+    return {**await _get_message_or_404(conversation_id, index), "index": index}
+
+
+@app.get("/api/conversations/{conversation_id}/messages/{index}/stage2")
+async def get_message_stage2(conversation_id: str, index: int):
+    """Get the full Stage 2 critiques of a default council answer."""
+    message = await _get_message_or_404(conversation_id, index)
+    if "stage2" not in message:
+        raise HTTPException(status_code=404, detail="Message has no Stage 2")
+    return message["stage2"]
+
+
+@app.get("/api/conversations/{conversation_id}/messages/{index}/rounds/{round_number}")
+async def get_message_round(conversation_id: str, index: int, round_number: int):
+    """Get one round of a round-table answer."""
+    message = await _get_message_or_404(conversation_id, index)
+    for iteration in message.get("iterations", []):
+        if iteration.get("round") == round_number:
+            return iteration
+    raise HTTPException(status_code=404, detail="Round not found")
+
+
 @app.delete("/api/conversations/{conversation_id}")
 async def delete_conversation(conversation_id: str):
     """Delete a conversation."""
     try:
-        success = storage.delete_conversation(conversation_id)
+        success = await async_storage.delete_conversation(conversation_id)
         if not success:
             raise HTTPException(status_code=404, detail="Conversation not found")
         return {"status": "deleted", "id": conversation_id}
@@ -102,80 +249,101 @@ async def send_message(conversation_id: str, request: SendMessageRequest):
     Returns the complete response with all stages.
     """
     # Check if conversation exists
-    conversation = storage.get_conversation(conversation_id)
+    conversation = await async_storage.get_conversation(conversation_id)
     if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
     # Check if this is the first message
     is_first_message = len(conversation["messages"]) == 0
-
-    # Add user message
-    storage.add_user_message(conversation_id, request.content)
-
-    # If this is the first message, generate a title with council type
-    if is_first_message:
-        title = await generate_conversation_title(request.content, request.council_type or "default")
-        storage.update_conversation_title(conversation_id, title)
-
+    deadline = request.deadline or COUNCIL_DEADLINE
     # Respect the selected council type and route accordingly
-    council_type = request.council_type or "default"
-
-    if council_type == "round_table":
-        iteration_results, synthesis_result, metadata = await run_round_table_council(request.content, iterations=2)
-        assistant_message = {
-            "role": "assistant",
-            "council_type": "round_table",
-            "iterations": iteration_results,
-            "synthesis": synthesis_result,
-            "metadata": metadata
-        }
-        storage.add_assistant_message_obj(conversation_id, assistant_message)
-        return {"iterations": iteration_results, "synthesis": synthesis_result, "metadata": metadata, "council_type": "round_table"}
-
-    elif council_type == "hierarchy":
-        junior_responses, lead_decision, metadata = await run_hierarchy_council(request.content)
-        assistant_message = {
-            "role": "assistant",
-            "council_type": "hierarchy",
-            "junior_responses": junior_responses,
-            "lead_decision": lead_decision,
-            "metadata": metadata
-        }
-        storage.add_assistant_message_obj(conversation_id, assistant_message)
-        return {"junior_responses": junior_responses, "lead_decision": lead_decision, "metadata": metadata, "council_type": "hierarchy"}
-
-    elif council_type == "assembly_line":
-        stage_results, final_output, metadata = await run_assembly_line_council(request.content)
-        assistant_message = {
-            "role": "assistant",
-            "council_type": "assembly_line",
-            "stages": stage_results,
-            "final_output": final_output,
-            "metadata": metadata
-        }
-        storage.add_assistant_message_obj(conversation_id, assistant_message)
-        return {"stages": stage_results, "final_output": final_output, "metadata": metadata, "council_type": "assembly_line"}
-
-    else:
-        # Default: 3-stage council
-        stage1_results, stage2_results, stage3_result, metadata = await run_full_council(request.content)
-
-        # Add assistant message with all stages
-        storage.add_assistant_message(
-            conversation_id,
-            stage1_results,
-            stage2_results,
-            stage3_result
-        )
+    council_type = request.council_type
 
-        # Return the complete response with metadata
-        return {
-            "stage1": stage1_results,
-            "stage2": stage2_results,
-            "stage3": stage3_result,
-            "metadata": metadata,
-            "council_type": "default"
-        }
+    started = time.monotonic()
+    status = FAILED
+    title_task = None
+    try:
+        # The user message is saved first; title and answer are committed together.
+        # The title is generated alongside the council, within the same deadline.
+        with budget.limit(deadline):
+            async with async_storage.transaction(conversation_id) as tx:
+                # Add user message (saved now, so a crash mid-council keeps it)
+                tx.add_user_message(request.content)
+                await async_storage.flush(tx)
+
+                # If this is the first message, generate a title with council type
+                if is_first_message:
+                    title_task = asyncio.create_task(generate_conversation_title(request.content, council_type))
+
+                tx.set_partial({"role": "assistant", "council_type": council_type})
+
+                if council_type == "round_table":
+                    iteration_results, synthesis_result, metadata = await run_round_table_council(request.content, iterations=2, deadline=deadline)
+                    assistant_message = {
+                        "role": "assistant",
+                        "council_type": "round_table",
+                        "iterations": iteration_results,
+                        "synthesis": synthesis_result,
+                        "metadata": metadata
+                    }
+                    response = {"iterations": iteration_results, "synthesis": synthesis_result, "metadata": metadata, "council_type": "round_table"}
+
+                elif council_type == "hierarchy":
+                    junior_responses, lead_decision, metadata = await run_hierarchy_council(request.content, deadline=deadline)
+                    assistant_message = {
+                        "role": "assistant",
+                        "council_type": "hierarchy",
+                        "junior_responses": junior_responses,
+                        "lead_decision": lead_decision,
+                        "metadata": metadata
+                    }
+                    response = {"junior_responses": junior_responses, "lead_decision": lead_decision, "metadata": metadata, "council_type": "hierarchy"}
+
+                elif council_type == "assembly_line":
+                    stage_results, final_output, metadata = await run_assembly_line_council(request.content, deadline=deadline)
+                    assistant_message = {
+                        "role": "assistant",
+                        "council_type": "assembly_line",
+                        "stages": stage_results,
+                        "final_output": final_output,
+                        "metadata": metadata
+                    }
+                    response = {"stages": stage_results, "final_output": final_output, "metadata": metadata, "council_type": "assembly_line"}
+
+                else:
+                    # Default: 3-stage council
+                    stage1_results, stage2_results, stage3_result, metadata = await run_full_council(request.content, deadline=deadline)
+
+                    # Assistant message with all stages
+                    assistant_message = {
+                        "role": "assistant",
+                        "stage1": stage1_results,
+                        "stage2": stage2_results,
+                        "stage3": stage3_result,
+                        "metadata": metadata
+                    }
+
+                    # Return the complete response with metadata
+                    response = {
+                        "stage1": stage1_results,
+                        "stage2": stage2_results,
+                        "stage3": stage3_result,
+                        "metadata": metadata,
+                        "council_type": "default"
+                    }
+
+                if title_task:
+                    tx.update_conversation_title(await title_task)
+
+                tx.add_assistant_message_obj(assistant_message)
+
+        status = COMPLETED
+    finally:
+        if title_task is not None and not title_task.done():
+            title_task.cancel()
+        REQUEST_LATENCY.observe(time.monotonic() - started, council_type=council_type, status=status)
+
+    return response
 
 
 @app.post("/api/conversations/{conversation_id}/message/stream")
@@ -183,109 +351,44 @@ async def send_message_stream(conversation_id: str, request: SendMessageRequest)
     """
     Send a message and stream the council process.
     Supports different council types: default, round_table, hierarchy, assembly_line.
-    Returns Server-Sent Events as each stage completes.
+    Returns Server-Sent Events as each stage completes, plus per-model
+    'token' events while Stage 1, the chairman, lead and synthesis steps stream
+    and a per-model result event ('stage1_response', 'junior_response',
+    'round_response') as each parallel member finishes.
+
+    The council runs as a background job (X-Job-Id header) and every event
+    carries an SSE id, so a dropped client can resume from
+    /api/jobs/{job_id}/events without starting a new run. If no client
+    reattaches within JOB_DISCONNECT_GRACE seconds, the job is cancelled
+    and its in-flight model requests aborted (see JOB_CANCEL_ON_DISCONNECT).
     """
     # Check if conversation exists
-    conversation = storage.get_conversation(conversation_id)
+    conversation = await async_storage.get_conversation(conversation_id)
     if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
     # Check if this is the first message
     is_first_message = len(conversation["messages"]) == 0
-    council_type = request.council_type or "default"
+    council_type = request.council_type
+
+    job = job_manager.start(
+        conversation_id, request.content, council_type, is_first_message,
+        deadline=request.deadline or COUNCIL_DEADLINE
+    )
+    return _job_event_stream(job.id, job.subscribe())
+
 
+def _job_event_stream(job_id: str, events) -> StreamingResponse:
+    """SSE response relaying a job's events with their ids."""
     async def event_generator():
+        SSE_STREAMS.inc()
         try:
-            # Add user message
-            storage.add_user_message(conversation_id, request.content)
-
-            # Start title generation in parallel (don't await yet)
-            title_task = None
-            if is_first_message:
-                title_task = asyncio.create_task(generate_conversation_title(request.content, council_type))
-
-            # Route to appropriate council type
-            if council_type == "round_table":
-                # Round Table: Collaborative iteration
-                yield f"data: {json.dumps({'type': 'council_start', 'council_type': 'round_table'})}\n\n"
-                iteration_results, synthesis_result, metadata = await run_round_table_council(request.content, iterations=2)
-                yield f"data: {json.dumps({'type': 'council_complete', 'iterations': iteration_results, 'synthesis': synthesis_result, 'metadata': metadata})}\n\n"
-                
-                assistant_message = {
-                    "role": "assistant",
-                    "council_type": "round_table",
-                    "iterations": iteration_results,
-                    "synthesis": synthesis_result,
-                    "metadata": metadata
-                }
-                
-            elif council_type == "hierarchy":
-                # Hierarchy: Lead agent makes final call
-                yield f"data: {json.dumps({'type': 'council_start', 'council_type': 'hierarchy'})}\n\n"
-                junior_responses, lead_decision, metadata = await run_hierarchy_council(request.content)
-                yield f"data: {json.dumps({'type': 'council_complete', 'junior_responses': junior_responses, 'lead_decision': lead_decision, 'metadata': metadata})}\n\n"
-                
-                assistant_message = {
-                    "role": "assistant",
-                    "council_type": "hierarchy",
-                    "junior_responses": junior_responses,
-                    "lead_decision": lead_decision,
-                    "metadata": metadata
-                }
-                
-            elif council_type == "assembly_line":
-                # Assembly Line: Sequential workflow
-                yield f"data: {json.dumps({'type': 'council_start', 'council_type': 'assembly_line'})}\n\n"
-                stage_results, final_output, metadata = await run_assembly_line_council(request.content)
-                yield f"data: {json.dumps({'type': 'council_complete', 'stages': stage_results, 'final_output': final_output, 'metadata': metadata})}\n\n"
-                
-                assistant_message = {
-                    "role": "assistant",
-                    "council_type": "assembly_line",
-                    "stages": stage_results,
-                    "final_output": final_output,
-                    "metadata": metadata
-                }
-                
-            else:
-                # Default: 3-stage council
-                yield f"data: {json.dumps({'type': 'stage1_start'})}\n\n"
-                stage1_results = await stage1_collect_responses(request.content)
-                yield f"data: {json.dumps({'type': 'stage1_complete', 'data': stage1_results})}\n\n"
-
-                yield f"data: {json.dumps({'type': 'stage2_start'})}\n\n"
-                stage2_results, label_to_model = await stage2_collect_rankings(request.content, stage1_results)
-                aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
-                yield f"data: {json.dumps({'type': 'stage2_complete', 'data': stage2_results, 'metadata': {'label_to_model': label_to_model, 'aggregate_rankings': aggregate_rankings}})}\n\n"
-
-                yield f"data: {json.dumps({'type': 'stage3_start'})}\n\n"
-                stage3_result = await stage3_synthesize_final(request.content, stage1_results, stage2_results)
-                yield f"data: {json.dumps({'type': 'stage3_complete', 'data': stage3_result})}\n\n"
-                
-                assistant_message = {
-                    "role": "assistant",
-                    "council_type": "default",
-                    "stage1": stage1_results,
-                    "stage2": stage2_results,
-                    "stage3": stage3_result,
-                    "metadata": {"label_to_model": label_to_model, "aggregate_rankings": aggregate_rankings}
-                }
-
-            # Wait for title generation if it was started
-            if title_task:
-                title = await title_task
-                storage.update_conversation_title(conversation_id, title)
-                yield f"data: {json.dumps({'type': 'title_complete', 'data': {'title': title}})}\n\n"
-
-            # Save complete assistant message
-            storage.add_assistant_message_obj(conversation_id, assistant_message)
-
-            # Send completion event
-            yield f"data: {json.dumps({'type': 'complete'})}\n\n"
-
-        except Exception as e:
-            # Send error event
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            async for event_id, event in events:
+                yield f"id: {event_id}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            SSE_STREAMS.dec()
+            # Detach now (not when garbage collected) so the job sees the disconnect
+            await events.aclose()
 
     return StreamingResponse(
         event_generator(),
@@ -293,10 +396,44 @@ async def send_message_stream(conversation_id: str, request: SendMessageRequest)
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
+            "X-Job-Id": job_id,
         }
     )
 
 
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of a council job: pending, running, completed, failed, cancelled or interrupted."""
+    status = await job_manager.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def get_job_events(
+    job_id: str,
+    last_event_id: Optional[int] = Query(None, ge=0),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Stream a job's events after Last-Event-ID (header, as sent by
+    EventSource on reconnect, or last_event_id query parameter); all of
+    them if neither is given. Ends once the job has finished.
+    """
+    after = last_event_id or 0
+    if last_event_id_header:
+        try:
+            after = int(last_event_id_header)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+    events = await job_manager.events(job_id, after)
+    if events is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_event_stream(job_id, events)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,322 @@
+"""Prometheus metrics for the council service (served at GET /metrics).
+
+A small in-process registry: recording a sample is a dict lookup and a few
+additions under a lock (storage threads record too), so it stays cheap on
+the hot paths. Samples are rendered in the Prometheus text format.
+
+With several uvicorn workers each process only sees its own traffic, so
+when METRICS_DIR is set (it is unset by default, keeping everything in
+memory) every worker also writes its samples to METRICS_DIR/<pid>.json every
+METRICS_FLUSH_INTERVAL seconds. Whichever worker answers a scrape adds up
+its own live samples and the other workers' latest snapshots, so every
+worker returns the same totals. Snapshots that have not been refreshed for
+three flush intervals belong to workers that are gone and are dropped
+(Prometheus sees their counters as a reset).
+"""
+
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from .config import METRICS_DIR, METRICS_FLUSH_INTERVAL
+
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160, 320)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+STORAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            values = [[list(key), value] for key, value in self._values.items()]
+        return {"kind": self.kind, "help": self.help, "labels": list(self.labels), "values": values}
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down (summed across workers)."""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels) -> Iterator[None]:
+        """Count the block as in progress while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labels)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        # Index of the first bucket the value fits in (len(buckets) = +Inf)
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            # Per-bucket (not cumulative) counts, then sum and count
+            state = self._values.get(key)
+            if state is None:
+                state = [0] * (len(self.buckets) + 1) + [0.0, 0]
+                self._values[key] = state
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe how long the block takes."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = super().snapshot()
+        snapshot["buckets"] = list(self.buckets)
+        return snapshot
+
+
+class MetricsRegistry:
+    """Every metric of this process, plus the snapshots shared between workers."""
+
+    def __init__(self, shared_dir: Optional[str] = METRICS_DIR, flush_interval: float = METRICS_FLUSH_INTERVAL):
+        self.shared_dir = shared_dir or None
+        self.flush_interval = flush_interval
+        self._metrics: Dict[str, _Metric] = {}
+        self._flusher: Optional[asyncio.Task] = None
+
+    def register(self, metric: _Metric):
+        self._metrics[metric.name] = metric
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """This process's samples, keyed by metric name (JSON-serializable)."""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    # Sharing between worker processes
+
+    def _own_path(self) -> str:
+        return os.path.join(self.shared_dir, f"{os.getpid()}.json")
+
+    def _write_snapshot(self, snapshot: Dict[str, Any]):
+        os.makedirs(self.shared_dir, exist_ok=True)
+        path = self._own_path()
+        temp = f"{path}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(temp, path)
+
+    def _read_peers(self) -> List[Dict[str, Any]]:
+        """Recent snapshots of the other workers; stale ones are removed."""
+        if not self.shared_dir or not os.path.isdir(self.shared_dir):
+            return []
+        own = os.path.basename(self._own_path())
+        stale_before = time.time() - 3 * self.flush_interval
+        peers = []
+        for name in os.listdir(self.shared_dir):
+            if not name.endswith(".json") or name == own:
+                continue
+            path = os.path.join(self.shared_dir, name)
+            try:
+                if os.path.getmtime(path) < stale_before:
+                    os.remove(path)
+                    continue
+                with open(path, "r", encoding="utf-8") as f:
+                    peers.append(json.load(f))
+            except (OSError, ValueError):
+                # Removed by another worker, or caught mid-replace
+                continue
+        return peers
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.to_thread(self._write_snapshot, self.snapshot())
+            except OSError as e:
+                print(f"Could not write metrics snapshot: {e}")
+
+    def start(self):
+        """Start publishing this worker's snapshot (no-op without METRICS_DIR)."""
+        if self.shared_dir and self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self):
+        """Stop publishing and withdraw this worker's snapshot."""
+        if self._flusher is None:
+            return
+        self._flusher.cancel()
+        try:
+            await self._flusher
+        except asyncio.CancelledError:
+            pass
+        self._flusher = None
+        try:
+            os.remove(self._own_path())
+        except OSError:
+            pass
+
+    async def render(self) -> str:
+        """Prometheus text exposition of every worker's samples combined."""
+        peers = await asyncio.to_thread(self._read_peers)
+        return _render(_merge([self.snapshot()] + peers))
+
+
+def _merge(snapshots: List[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Add up snapshots from several processes."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.get(name)
+            if target is None:
+                target = {**metric, "values": {}}
+                merged[name] = target
+            elif metric.get("buckets") != target.get("buckets"):
+                # Another worker runs a different version; don't mix layouts
+                continue
+            for labels, value in metric["values"]:
+                key = tuple(labels)
+                current = target["values"].get(key)
+                if current is None:
+                    target["values"][key] = list(value) if isinstance(value, list) else value
+                elif isinstance(value, list):
+                    target["values"][key] = [a + b for a, b in zip(current, value)]
+                else:
+                    target["values"][key] = current + value
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _render(merged: Dict[str, Dict[str, Any]]) -> str:
+    lines = []
+    for name in sorted(merged):
+        metric = merged[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        labels = metric["labels"]
+        for key, value in sorted(metric["values"].items()):
+            if metric["kind"] != "histogram":
+                lines.append(f"{name}{_format_labels(labels, key)} {_format_number(value)}")
+                continue
+            cumulative = 0
+            bounds = list(metric["buckets"]) + [math.inf]
+            for bound, count in zip(bounds, value[:len(bounds)]):
+                cumulative += count
+                le = 'le="' + ("+Inf" if math.isinf(bound) else _format_number(float(bound))) + '"'
+                lines.append(f"{name}_bucket{_format_labels(labels, key, le)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels, key)} {_format_number(float(value[-2]))}")
+            lines.append(f"{name}_count{_format_labels(labels, key)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+# Global registry instance
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = Histogram(
+    "llm_council_request_duration_seconds",
+    "Council turns from request to saved answer, by council type and outcome",
+    ["council_type", "status"],
+)
+STAGE_LATENCY = Histogram(
+    "llm_council_stage_duration_seconds",
+    "Duration of each council stage (see backend/tracing.py for stage names)",
+    ["stage"],
+)
+UPSTREAM_LATENCY = Histogram(
+    "llm_council_upstream_duration_seconds",
+    "OpenRouter requests from sending to the full response, by model",
+    ["model"],
+)
+UPSTREAM_ERRORS = Counter(
+    "llm_council_upstream_errors_total",
+    "Failed OpenRouter requests by model and HTTP status ('timeout' or 'error' without one)",
+    ["model", "status"],
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "llm_council_upstream_in_flight",
+    "OpenRouter requests currently being sent or received",
+)
+CACHE_LOOKUPS = Counter(
+    "llm_council_cache_lookups_total",
+    "Response cache lookups by result (memory_hit, disk_hit, miss); hit ratio = hits / all",
+    ["result"],
+)
+STORAGE_LATENCY = Histogram(
+    "llm_council_storage_duration_seconds",
+    "Conversation storage calls on the storage thread pool, by operation",
+    ["operation"],
+    buckets=STORAGE_BUCKETS,
+)
+SSE_STREAMS = Gauge(
+    "llm_council_sse_streams",
+    "Open SSE connections relaying council job events",
+)
+LOOP_LAG = Histogram(
+    "llm_council_event_loop_lag_seconds",
+    "How late the event loop ran a sleeping task (see backend/loop_monitor.py)",
+    buckets=LOOP_LAG_BUCKETS,
+)
+SLOW_CALLBACKS = Counter(
+    "llm_council_event_loop_slow_callbacks_total",
+    "Times the event loop was blocked for at least LOOP_SLOW_CALLBACK seconds",
+)
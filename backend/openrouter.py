@@ -1,61 +1,828 @@
 """OpenRouter API client for making LLM requests."""
 
+import asyncio
+import json
+import time
 import httpx
-from typing import List, Dict, Any, Optional
-from .config import OPENROUTER_API_KEY, OPENROUTER_API_URL
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable, Tuple, Set
+from .config import (
+    OPENROUTER_API_URL,
+    OPENROUTER_TIMEOUT,
+    OPENROUTER_HTTP2,
+    OPENROUTER_MAX_CONNECTIONS,
+    OPENROUTER_MAX_KEEPALIVE_CONNECTIONS,
+    OPENROUTER_KEEPALIVE_EXPIRY,
+    OPENROUTER_CONNECT_TIMEOUT,
+    OPENROUTER_WARMUP_CONNECTIONS,
+    OPENROUTER_CASSETTE_MODE,
+    OPENROUTER_CASSETTE,
+    OPENROUTER_REPLAY_SPEED,
+    FANOUT_QUORUM,
+    FANOUT_SOFT_DEADLINE,
+    FANOUT_STRAGGLERS,
+    HEDGE_ENABLED,
+    HEDGE_FALLBACK_MODELS,
+)
+from . import budget, cassette, tracing
+from .cache import response_cache, make_cache_key
+from .scheduler import scheduler, AdmissionTimeout
+from .latency import latency_tracker
+from .health import health_registry, OK, ERROR, TIMEOUT
+from .metrics import UPSTREAM_LATENCY, UPSTREAM_ERRORS, UPSTREAM_IN_FLIGHT
+
+# Shared client, created once per process (see init_client / close_client)
+_client: Optional[httpx.AsyncClient] = None
+
+# Straggler requests left running after their stage finished (kept referenced)
+_background_tasks: Set[asyncio.Task] = set()
+
+
+@dataclass
+class FanoutPolicy:
+    """
+    When a parallel fan-out may stop waiting for the remaining models.
+
+    Attributes:
+        quorum: Finish once this many models answered successfully (None = all)
+        soft_deadline: Seconds after which to finish with what has arrived,
+            as long as at least min_responses models answered
+        min_responses: Answers required before the soft deadline applies
+        stragglers: "cancel" to abort late requests, "background" to let them
+            finish without waiting for them
+        timeout: Per-request timeout passed to query_model
+    """
+    quorum: Optional[int] = FANOUT_QUORUM
+    soft_deadline: Optional[float] = FANOUT_SOFT_DEADLINE
+    min_responses: int = 1
+    stragglers: str = FANOUT_STRAGGLERS
+    timeout: float = OPENROUTER_TIMEOUT
+
+
+def _http2_available() -> bool:
+    """Check whether the optional 'h2' package needed for HTTP/2 is installed."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_client() -> httpx.AsyncClient:
+    """
+    Build the pooled client used for every OpenRouter request (recording
+    or replaying a cassette if configured, see backend/cassette.py).
+    """
+    http2 = OPENROUTER_HTTP2 and _http2_available()
+    if OPENROUTER_HTTP2 and not http2:
+        print("HTTP/2 requested but 'h2' is not installed; falling back to HTTP/1.1")
+
+    limits = httpx.Limits(
+        max_connections=OPENROUTER_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENROUTER_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=OPENROUTER_KEEPALIVE_EXPIRY,
+    )
+
+    transport = cassette.build_transport(
+        OPENROUTER_CASSETTE_MODE,
+        OPENROUTER_CASSETTE,
+        OPENROUTER_REPLAY_SPEED,
+        httpx.AsyncHTTPTransport(http2=http2, limits=limits),
+    )
+
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(OPENROUTER_TIMEOUT, connect=OPENROUTER_CONNECT_TIMEOUT),
+    )
+
+
+async def init_client(warmup: bool = False) -> httpx.AsyncClient:
+    """
+    Create the shared HTTP client (idempotent).
+
+    Args:
+        warmup: If True, open connections to OpenRouter ahead of the first query
+
+    Returns:
+        The shared client
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    if warmup:
+        await warm_connections()
+    return _client
+
+
+async def close_client():
+    """Close the shared HTTP client and release pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Get the shared HTTP client, creating it lazily if needed.
+
+    The app lifespan normally creates it; lazy creation keeps scripts that
+    call the council functions directly working.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def warm_connections(connections: int = OPENROUTER_WARMUP_CONNECTIONS):
+    """
+    Pre-establish pooled connections so the first council run skips TCP/TLS setup.
+
+    Failures are ignored - warming is best effort.
+
+    Args:
+        connections: Number of concurrent connections to open
+    """
+    client = get_client()
+    origin = httpx.URL(OPENROUTER_API_URL).copy_with(path="/", query=None)
+
+    async def _touch():
+        try:
+            await client.head(origin, timeout=OPENROUTER_CONNECT_TIMEOUT)
+        except Exception as e:
+            print(f"Connection warm-up failed: {e}")
+
+    await asyncio.gather(*[_touch() for _ in range(max(1, connections))])
+
+
+def _request_headers(api_key: str) -> Dict[str, str]:
+    """Headers sent with every OpenRouter request."""
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+
+
+def _request_timeout(timeout: float) -> httpx.Timeout:
+    """Per-call timeout; connecting never gets more than the configured connect timeout."""
+    return httpx.Timeout(timeout, connect=min(timeout, OPENROUTER_CONNECT_TIMEOUT))
+
+
+async def _stream_deltas(
+    model: str,
+    messages: List[Dict[str, str]],
+    timeout: float,
+    params: Optional[Dict[str, Any]],
+    api_key: str,
+    usage: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream a completion and yield the raw 'delta' object of every chunk.
+    Token counts sent with the final chunk are copied into 'usage' if given.
+
+    Raises on HTTP errors and on error chunks sent mid-stream.
+    """
+    payload = {
+        **(params or {}),
+        "model": model,
+        "messages": messages,
+        "stream": True,
+    }
+
+    client = get_client()
+    async with client.stream(
+        "POST",
+        OPENROUTER_API_URL,
+        headers=_request_headers(api_key),
+        json=payload,
+        timeout=_request_timeout(timeout)
+    ) as response:
+        response.raise_for_status()
+
+        async for line in response.aiter_lines():
+            # Skip blank separators and SSE comments (": OPENROUTER PROCESSING")
+            if not line.startswith("data:"):
+                continue
+
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+
+            chunk = json.loads(data)
+            if "error" in chunk:
+                raise RuntimeError(chunk["error"].get("message", chunk["error"]))
+            if usage is not None and chunk.get("usage"):
+                usage.update(chunk["usage"])
+
+            choices = chunk.get("choices") or []
+            if choices:
+                yield choices[0].get("delta") or {}
 
 
 async def query_model(
     model: str,
     messages: List[Dict[str, str]],
-    timeout: float = 120.0
+    timeout: float = OPENROUTER_TIMEOUT,
+    on_delta: Optional[Callable[[str], None]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+    cache_ttl: Optional[float] = None
 ) -> Optional[Dict[str, Any]]:
     """
     Query a single model via OpenRouter API.
 
+    Identical concurrent requests share one upstream call (see _single_flight),
+    and slow calls may be hedged with a duplicate request (see _query_hedged).
+    Inside a latency budget (see backend/budget.py) the call is abandoned
+    once the budget runs out, however much of 'timeout' is left. Inside a
+    trace (see backend/tracing.py) the call records a timing span.
+
     Args:
         model: OpenRouter model identifier (e.g., "openai/gpt-4o")
         messages: List of message dicts with 'role' and 'content'
-        timeout: Request timeout in seconds
+        timeout: Request timeout in seconds (capped by the current budget)
+        on_delta: Optional callback receiving content deltas; when given the
+            request is streamed and the deltas are forwarded as they arrive
+        params: Extra sampling parameters merged into the request payload
+        use_cache: Set to False to bypass the response cache for this call
+        cache_ttl: Cache lifetime for this response (defaults to the cache TTL)
 
     Returns:
-        Response dict with 'content' and optional 'reasoning_details', or None if failed
+        Response dict with 'content', optional 'reasoning_details' and 'usage'
+        (token counts), or None if failed. 'served_by' is set when a hedge to
+        a fallback model answered instead.
     """
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-    }
+    with tracing.model_call(model, messages) as span:
+        response, outcome = await _query_model(
+            model, messages, timeout, on_delta, params, use_cache, cache_ttl
+        )
+        if span is not None:
+            span.finish(response, outcome)
+        return response
+
+
+async def _query_model(
+    model: str,
+    messages: List[Dict[str, str]],
+    timeout: float,
+    on_delta: Optional[Callable[[str], None]],
+    params: Optional[Dict[str, Any]],
+    use_cache: bool,
+    cache_ttl: Optional[float]
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """query_model without the span; also returns the outcome when it is not plain."""
+    key = make_cache_key(model, messages, params)
+    cacheable = use_cache and response_cache.enabled
+
+    if cacheable:
+        cached = await response_cache.get(key)
+        if cached is not None:
+            # A cache hit arrives as a single delta for streaming callers
+            if on_delta is not None and cached.get('content'):
+                on_delta(cached['content'])
+            return cached, "cached"
+
+    left = budget.remaining()
+    if left is not None and left <= 0:
+        print(f"Skipping {model}: latency budget exhausted")
+        return None, "budget"
+    if left is None or left >= timeout:
+        # The request's own timeout comes first; the scheduler enforces it and
+        # a slow model is recorded as a timeout in its health
+        return await _single_flight(key, model, messages, timeout, on_delta, params, cacheable, cache_ttl), None
+
+    # The request keeps its normal timeout, so a budget cut-off is a cancellation
+    # (not counted against the model's health) rather than a timeout
+    try:
+        return await asyncio.wait_for(
+            _single_flight(key, model, messages, timeout, on_delta, params, cacheable, cache_ttl),
+            left
+        ), None
+    except asyncio.TimeoutError:
+        print(f"Abandoning {model}: latency budget exhausted")
+        return None, "budget"
+
+
+class _Flight:
+    """One upstream request shared by every concurrent caller with the same key."""
+
+    def __init__(self, streaming: bool):
+        self.task: Optional[asyncio.Task] = None
+        self.streaming = streaming
+        self.waiters = 0
+        self.chunks: List[str] = []
+        self.listeners: List[Callable[[str], None]] = []
+
+    def broadcast(self, delta: str):
+        """Forward a streamed delta to every attached caller, keeping it for late joiners."""
+        self.chunks.append(delta)
+        for listener in list(self.listeners):
+            listener(delta)
+
+
+# In-flight upstream requests keyed by request key (see _single_flight)
+_inflight: Dict[str, _Flight] = {}
+
+
+async def _single_flight(
+    key: str,
+    model: str,
+    messages: List[Dict[str, str]],
+    timeout: float,
+    on_delta: Optional[Callable[[str], None]],
+    params: Optional[Dict[str, Any]],
+    cacheable: bool,
+    cache_ttl: Optional[float]
+) -> Optional[Dict[str, Any]]:
+    """
+    Coalesce identical concurrent requests into one upstream call.
+
+    The first caller starts the request; later callers with the same key
+    await the same task. A caller that is cancelled only detaches itself -
+    the upstream request is cancelled once the last waiter has gone.
+    Streaming callers that join late first receive the deltas seen so far.
+    """
+    flight = _inflight.get(key)
+    if flight is None:
+        flight = _Flight(streaming=on_delta is not None)
+        flight.task = asyncio.ensure_future(_fetch(
+            key, model, messages, timeout,
+            flight.broadcast if flight.streaming else None,
+            params, cacheable, cache_ttl
+        ))
+        _inflight[key] = flight
+        flight.task.add_done_callback(lambda _: _forget_flight(key, flight))
+    else:
+        span = tracing.current_call()
+        if span is not None:
+            # Timings of the shared request are on the span of its first caller
+            span.shared = True
+
+    streams_live = on_delta is not None and flight.streaming
+    if streams_live:
+        for chunk in flight.chunks:
+            on_delta(chunk)
+        flight.listeners.append(on_delta)
+
+    flight.waiters += 1
+    try:
+        response = await asyncio.shield(flight.task)
+    except asyncio.CancelledError:
+        if flight.waiters == 1 and not flight.task.done():
+            # Last interested caller left: abort the upstream request
+            _forget_flight(key, flight)
+            flight.task.cancel()
+        raise
+    finally:
+        flight.waiters -= 1
+        if streams_live:
+            flight.listeners.remove(on_delta)
+
+    # Joined a non-streaming flight: deliver the whole answer as one delta
+    if on_delta is not None and not streams_live and response and response.get('content'):
+        on_delta(response['content'])
+
+    return response
+
+
+def _forget_flight(key: str, flight: _Flight):
+    """Remove a flight from the registry so new callers start a fresh request."""
+    if _inflight.get(key) is flight:
+        del _inflight[key]
+
+
+async def _fetch(
+    key: str,
+    model: str,
+    messages: List[Dict[str, str]],
+    timeout: float,
+    on_delta: Optional[Callable[[str], None]],
+    params: Optional[Dict[str, Any]],
+    cacheable: bool,
+    cache_ttl: Optional[float]
+) -> Optional[Dict[str, Any]]:
+    """Run the upstream request and cache a successful response."""
+    response = await _query_upstream(model, messages, timeout, on_delta, params)
+
+    # A fallback model's answer is not an answer from the requested model
+    if cacheable and response is not None and response.get('content') and not response.get('served_by'):
+        await response_cache.set(key, response, ttl=cache_ttl)
+
+    return response
+
+
+async def _query_upstream(
+    model: str,
+    messages: List[Dict[str, str]],
+    timeout: float,
+    on_delta: Optional[Callable[[str], None]],
+    params: Optional[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """
+    Send the request upstream, hedging it when the model has enough latency
+    history to know what "slow" means. Returns None on failure.
+    """
+    if not health_registry.is_available(model):
+        # Circuit open: go straight to the fallback model if there is one
+        fallback = HEDGE_FALLBACK_MODELS.get(model)
+        if fallback and fallback != model and health_registry.is_available(fallback):
+            response = await _query_scheduled(fallback, messages, timeout, on_delta, params)
+            return {**response, 'served_by': fallback} if response is not None else None
+
+    # Only hedge to a different model: a duplicate request to the same one
+    # would double the load on the key without a better chance of answering
+    hedge_model = HEDGE_FALLBACK_MODELS.get(model)
+    delay = None
+    if HEDGE_ENABLED and hedge_model and hedge_model != model:
+        delay = latency_tracker.hedge_delay(model, streaming=on_delta is not None)
+
+    if delay is None or delay >= timeout:
+        return await _query_scheduled(model, messages, timeout, on_delta, params)
+    return await _query_hedged(model, hedge_model, messages, timeout, on_delta, params, delay)
+
+
+class _Attempt:
+    """One of the racing requests of a hedged call."""
+
+    def __init__(self, model: str, task: "asyncio.Future", ready: "asyncio.Future"):
+        self.model = model
+        self.task = task
+        # Resolved on the first byte or when the request finishes, whichever is first
+        self.ready = ready
+
+    def failed(self) -> bool:
+        return self.task.done() and (self.task.cancelled() or self.task.result() is None)
+
+
+async def _query_hedged(
+    model: str,
+    hedge_model: str,
+    messages: List[Dict[str, str]],
+    timeout: float,
+    on_delta: Optional[Callable[[str], None]],
+    params: Optional[Dict[str, Any]],
+    delay: float
+) -> Optional[Dict[str, Any]]:
+    """
+    Start the request; if it has produced no first byte after 'delay'
+    seconds, send a duplicate to 'hedge_model' - unless no API key could
+    send it right away, so hedges never take rate-limit tokens the primary
+    calls are queueing for. The first attempt to start answering wins and
+    the other one is cancelled. Only the winner's tokens are forwarded to
+    on_delta.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    owner: List[_Attempt] = []
+    attempts: List[_Attempt] = []
+
+    def _launch(target_model: str) -> _Attempt:
+        ready = loop.create_future()
+        attempt: Optional[_Attempt] = None
+
+        def _on_first_byte():
+            if not owner:
+                owner.append(attempt)
+            if not ready.done():
+                ready.set_result(None)
+
+        forward = None
+        if on_delta is not None:
+            def forward(delta: str):
+                if owner and owner[0] is attempt:
+                    on_delta(delta)
+
+        task = asyncio.ensure_future(_query_scheduled(
+            target_model, messages, max(0.001, deadline - loop.time()),
+            forward, params, on_first_byte=_on_first_byte
+        ))
+        task.add_done_callback(lambda _: ready.done() or ready.set_result(None))
+        attempt = _Attempt(target_model, task, ready)
+        attempts.append(attempt)
+        return attempt
+
+    try:
+        primary = _launch(model)
+        await asyncio.wait({primary.ready}, timeout=delay)
+        if primary.ready.done():
+            return await primary.task
+
+        if not scheduler.key_available():
+            return await primary.task
+        print(f"Hedging {model} with {hedge_model} after {delay:.2f}s without a first byte")
+        _launch(hedge_model)
+
+        racing = list(attempts)
+        while racing:
+            await asyncio.wait({a.ready for a in racing}, return_when=asyncio.FIRST_COMPLETED)
+            # The attempt that answered first owns on_delta, so its result is
+            # the one that matches what was streamed (even if it then failed)
+            winner = owner[0] if owner else next((a for a in racing if a.ready.done() and not a.failed()), None)
+            if winner is not None:
+                for other in attempts:
+                    if other is not winner:
+                        other.task.cancel()
+                response = await winner.task
+                if response is not None and winner.model != model:
+                    response = {**response, 'served_by': winner.model}
+                return response
+            # Everything that finished failed; keep waiting on the rest
+            racing = [a for a in racing if not a.failed()]
+
+        return None
+    finally:
+        for attempt in attempts:
+            if not attempt.task.done():
+                attempt.task.cancel()
+
+
+async def _query_scheduled(
+    model: str,
+    messages: List[Dict[str, str]],
+    timeout: float,
+    on_delta: Optional[Callable[[str], None]],
+    params: Optional[Dict[str, Any]],
+    on_first_byte: Optional[Callable[[], None]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Send the request to OpenRouter through the upstream scheduler, which
+    queues it behind the rate limits and retries 429s/transient errors
+    within 'timeout' seconds. Outcomes feed the health registry; models
+    whose circuit is open are refused immediately. Returns None on any
+    final failure.
+    """
+    streaming = on_delta is not None
+    span = tracing.current_call()
+    sent = 0
+
+    async def _attempt(api_key: str, remaining: float):
+        nonlocal sent
+        sent += 1
+        sent_at = time.monotonic()
+        if span is not None:
+            span.sent()
+
+        def _first_byte():
+            latency_tracker.record(model, streaming, time.monotonic() - sent_at)
+            if span is not None:
+                span.first_byte()
+            if on_first_byte is not None:
+                on_first_byte()
+
+        with UPSTREAM_IN_FLIGHT.track():
+            try:
+                if streaming:
+                    response = await _query_model_streaming(
+                        model, messages, remaining, on_delta, params, api_key, _first_byte
+                    )
+                else:
+                    response = await _query_model_once(model, messages, remaining, params, api_key, _first_byte)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                UPSTREAM_ERRORS.inc(model=model, status=_error_status(e))
+                raise
+        UPSTREAM_LATENCY.observe(time.monotonic() - sent_at, model=model)
+        return response
+
+    if not health_registry.acquire(model):
+        print(f"Skipping {model}: circuit open")
+        if span is not None:
+            span.fail("skipped")
+        return None
+
+    started = time.monotonic()
+    try:
+        response = await scheduler.run(model, _attempt, budget=timeout)
+    except asyncio.CancelledError:
+        health_registry.release(model)
+        raise
+    except AdmissionTimeout as e:
+        # Queued behind our own limiters until the budget ran out: only the
+        # requests actually sent (retries that failed) count against the model
+        if sent:
+            health_registry.record(model, ERROR, time.monotonic() - started)
+        else:
+            health_registry.release(model)
+        print(f"Error querying model {model}: {e}")
+        if span is not None:
+            span.fail("timeout", str(e))
+        return None
+    except Exception as e:
+        timed_out = isinstance(e, (httpx.TimeoutException, asyncio.TimeoutError, TimeoutError))
+        health_registry.record(model, TIMEOUT if timed_out else ERROR, time.monotonic() - started)
+        print(f"Error querying model {model}: {e}")
+        if span is not None:
+            span.fail("timeout" if timed_out else "error", str(e))
+        return None
+
+    health_registry.record(model, OK, time.monotonic() - started)
+    return response
+
+
+def _error_status(error: Exception) -> str:
+    """Status label of a failed request for the upstream error counter."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return str(error.response.status_code)
+    if isinstance(error, (httpx.TimeoutException, asyncio.TimeoutError, TimeoutError)):
+        return "timeout"
+    return "error"
 
+
+async def _query_model_once(
+    model: str,
+    messages: List[Dict[str, str]],
+    timeout: float,
+    params: Optional[Dict[str, Any]],
+    api_key: str,
+    on_first_byte: Callable[[], None]
+) -> Dict[str, Any]:
+    """Single non-streaming request; raises on failure."""
     payload = {
+        **(params or {}),
         "model": model,
         "messages": messages,
     }
 
+    client = get_client()
+    request = client.build_request(
+        "POST",
+        OPENROUTER_API_URL,
+        headers=_request_headers(api_key),
+        json=payload,
+        timeout=_request_timeout(timeout)
+    )
+    # Send with stream=True so the arrival of the response head is observable
+    response = await client.send(request, stream=True)
     try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.post(
-                OPENROUTER_API_URL,
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
+        if response.is_success:
+            on_first_byte()
+        await response.aread()
+    finally:
+        await response.aclose()
+    response.raise_for_status()
+
+    data = response.json()
+    message = data['choices'][0]['message']
 
-            data = response.json()
-            message = data['choices'][0]['message']
+    return {
+        'content': message.get('content'),
+        'reasoning_details': message.get('reasoning_details'),
+        'usage': data.get('usage')
+    }
 
-            return {
-                'content': message.get('content'),
-                'reasoning_details': message.get('reasoning_details')
-            }
 
+async def _query_model_streaming(
+    model: str,
+    messages: List[Dict[str, str]],
+    timeout: float,
+    on_delta: Callable[[str], None],
+    params: Optional[Dict[str, Any]],
+    api_key: str,
+    on_first_byte: Callable[[], None]
+) -> Dict[str, Any]:
+    """Single streamed request that forwards deltas and assembles the full response."""
+    content_parts = []
+    reasoning_details = []
+    usage: Dict[str, Any] = {}
+    first = True
+
+    try:
+        async for delta in _stream_deltas(model, messages, timeout, params, api_key, usage):
+            if first:
+                on_first_byte()
+                first = False
+            content = delta.get("content")
+            if content:
+                content_parts.append(content)
+                on_delta(content)
+            if delta.get("reasoning_details"):
+                reasoning_details.extend(delta["reasoning_details"])
     except Exception as e:
-        print(f"Error querying model {model}: {e}")
-        return None
+        if content_parts:
+            # Tokens were already forwarded; a retry would duplicate them
+            raise RuntimeError(f"Stream interrupted after partial output: {e}") from e
+        raise
+
+    return {
+        'content': "".join(content_parts),
+        'reasoning_details': reasoning_details or None,
+        'usage': usage or None
+    }
+
+
+async def query_models_as_completed(
+    models: List[str],
+    messages: List[Dict[str, str]],
+    on_delta: Optional[Callable[[str, str], None]] = None,
+    policy: Optional[FanoutPolicy] = None,
+    report: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]]]]:
+    """
+    Query multiple models in parallel, yielding each result as soon as it lands.
+
+    Models whose circuit breaker is open are skipped without a request.
+    Iteration ends early once the policy's quorum or soft deadline is met,
+    or when the current latency budget (see backend/budget.py) runs out;
+    the remaining requests are then cancelled or left running in the
+    background. If the consumer stops iterating early, the outstanding
+    requests are always cancelled.
+
+    Args:
+        models: List of OpenRouter model identifiers
+        messages: List of message dicts to send to each model
+        on_delta: Optional callback receiving (model, delta) while responses stream in
+        policy: Fan-out policy (defaults to the configured one)
+        report: Optional dict filled with what happened (answered, failed,
+            skipped, stragglers, why the fan-out finished)
+
+    Yields:
+        (model, response) pairs in completion order (response is None if failed)
+    """
+    policy = policy or FanoutPolicy()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + policy.soft_deadline if policy.soft_deadline is not None else None
+
+    # Stragglers keep running in background mode but must stop emitting tokens
+    detached: Set[str] = set()
+
+    def _forward(model: str, delta: str):
+        if model not in detached:
+            on_delta(model, delta)
+
+    async def _tagged(model: str):
+        forward = _bind_model(_forward if on_delta else None, model)
+        return model, await query_model(model, messages, timeout=policy.timeout, on_delta=forward)
+
+    available = health_registry.available(models)
+    skipped = [model for model in models if model not in available]
+    task_models = {asyncio.ensure_future(_tagged(model)): model for model in available}
+    pending = set(task_models)
+    answered: List[str] = []
+    failed: List[str] = []
+    reason = "complete"
+    finished_by_policy = False
+
+    try:
+        while pending:
+            if policy.quorum is not None and len(answered) >= policy.quorum:
+                reason = "quorum"
+                break
+
+            wait_timeout = None
+            timeout_reason = "deadline"
+            if deadline is not None and len(answered) >= policy.min_responses:
+                wait_timeout = max(0.0, deadline - loop.time())
+            left = budget.remaining()
+            if left is not None and (wait_timeout is None or left < wait_timeout):
+                wait_timeout = max(0.0, left)
+                timeout_reason = "budget"
+
+            done, pending = await asyncio.wait(
+                pending, timeout=wait_timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                reason = timeout_reason
+                break
+
+            for task in done:
+                model, response = task.result()
+                (answered if response is not None else failed).append(model)
+                yield model, response
+
+        finished_by_policy = True
+    finally:
+        stragglers = [task_models[task] for task in pending]
+        keep_running = finished_by_policy and policy.stragglers == "background"
+        for task in pending:
+            if keep_running:
+                detached.add(task_models[task])
+                _background_tasks.add(task)
+                task.add_done_callback(_background_tasks.discard)
+            else:
+                task.cancel()
+
+        if report is not None:
+            report.update({
+                "requested": len(models),
+                "answered": answered,
+                "failed": failed,
+                "skipped": skipped,
+                "stragglers": stragglers,
+                "straggler_mode": "background" if keep_running else "cancel",
+                "finished_by": reason,
+                "elapsed": round(loop.time() - started, 3),
+            })
 
 
 async def query_models_parallel(
     models: List[str],
-    messages: List[Dict[str, str]]
+    messages: List[Dict[str, str]],
+    on_delta: Optional[Callable[[str, str], None]] = None,
+    policy: Optional[FanoutPolicy] = None,
+    report: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Optional[Dict[str, Any]]]:
     """
     Query multiple models in parallel.
@@ -63,17 +830,27 @@ async def query_models_parallel(
     Args:
         models: List of OpenRouter model identifiers
         messages: List of message dicts to send to each model
+        on_delta: Optional callback receiving (model, delta) while responses stream in
+        policy: Fan-out policy deciding when to stop waiting (defaults to config)
+        report: Optional dict filled with the fan-out outcome
 
     Returns:
-        Dict mapping model identifier to response dict (or None if failed)
+        Dict mapping model identifier to response dict (or None if failed or
+        cut off by the policy), in the same order as models
     """
-    import asyncio
+    responses = {}
+    async for model, response in query_models_as_completed(models, messages, on_delta, policy, report):
+        responses[model] = response
 
-    # Create tasks for all models
-    tasks = [query_model(model, messages) for model in models]
+    # Map models to their responses
+    return {model: responses.get(model) for model in models}
 
-    # Wait for all to complete
-    responses = await asyncio.gather(*tasks)
 
-    # Map models to their responses
-    return {model: response for model, response in zip(models, responses)}
+def _bind_model(
+    on_delta: Optional[Callable[[str, str], None]],
+    model: str
+) -> Optional[Callable[[str], None]]:
+    """Turn an on_delta(model, delta) callback into a per-model on_delta(delta)."""
+    if on_delta is None:
+        return None
+    return lambda delta: on_delta(model, delta)
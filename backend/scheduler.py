@@ -0,0 +1,307 @@
+"""Rate-limit-aware scheduling of upstream OpenRouter requests."""
+
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import httpx
+from .config import (
+    OPENROUTER_API_KEYS,
+    SCHEDULER_MODEL_CONCURRENCY,
+    SCHEDULER_MODEL_RPM,
+    SCHEDULER_KEY_CONCURRENCY,
+    SCHEDULER_KEY_RPM,
+    SCHEDULER_MAX_RETRIES,
+    SCHEDULER_BACKOFF_BASE,
+    SCHEDULER_BACKOFF_MAX,
+)
+
+# HTTP statuses worth retrying: rate limiting and transient upstream failures
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class AdmissionTimeout(Exception):
+    """
+    No admission slot freed up, or the latency budget ran out, before a
+    request could be sent. Says nothing about the model's health.
+    """
+
+
+class TokenBucket:
+    """Classic token bucket: 'rate' tokens per second, up to 'burst' saved up."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def has_token(self) -> bool:
+        """Whether a token is available right now (without taking it)."""
+        if self._lock.locked():
+            return False
+        self._refill()
+        return self._tokens >= 1
+
+    async def acquire(self):
+        """Take one token, sleeping until one is available (FIFO via the lock)."""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class Limiter:
+    """
+    Admission control for one model or one API key: a concurrency
+    semaphore, an optional token bucket, and a Retry-After cooldown.
+    """
+
+    def __init__(self, concurrency: int, requests_per_minute: float):
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency) if concurrency > 0 else None
+        # A full minute's allowance may be used in a burst, refilled evenly
+        self._bucket = (
+            TokenBucket(requests_per_minute / 60.0, max(1.0, requests_per_minute))
+            if requests_per_minute > 0 else None
+        )
+        self.blocked_until = 0.0
+        self.in_use = 0
+        self.waiting = 0
+
+    async def acquire(self):
+        """Wait for a free slot, an available token and the end of any cooldown."""
+        self.waiting += 1
+        try:
+            if self._semaphore is not None:
+                await self._semaphore.acquire()
+            try:
+                while True:
+                    cooldown = self.blocked_until - time.monotonic()
+                    if cooldown > 0:
+                        await asyncio.sleep(cooldown)
+                        continue
+                    if self._bucket is not None:
+                        await self._bucket.acquire()
+                    break
+            except BaseException:
+                if self._semaphore is not None:
+                    self._semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+        self.in_use += 1
+
+    def can_admit_now(self) -> bool:
+        """Whether a request would be admitted without waiting."""
+        if self.waiting or self.blocked_until > time.monotonic():
+            return False
+        if self._semaphore is not None and self._semaphore.locked():
+            return False
+        return self._bucket is None or self._bucket.has_token()
+
+    def release(self):
+        self.in_use -= 1
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    def block_for(self, seconds: float):
+        """Hold back new requests for the given number of seconds."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "cooldown": round(max(0.0, self.blocked_until - time.monotonic()), 3),
+        }
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """
+    Parse a Retry-After header (delta-seconds or HTTP date).
+
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class UpstreamScheduler:
+    """
+    Queues upstream requests behind per-model and per-API-key limiters and
+    retries rate-limited or transient failures inside a latency budget.
+    """
+
+    def __init__(
+        self,
+        api_keys: List[str] = OPENROUTER_API_KEYS,
+        model_concurrency: int = SCHEDULER_MODEL_CONCURRENCY,
+        model_rpm: float = SCHEDULER_MODEL_RPM,
+        key_concurrency: int = SCHEDULER_KEY_CONCURRENCY,
+        key_rpm: float = SCHEDULER_KEY_RPM,
+        max_retries: int = SCHEDULER_MAX_RETRIES,
+        backoff_base: float = SCHEDULER_BACKOFF_BASE,
+        backoff_max: float = SCHEDULER_BACKOFF_MAX
+    ):
+        self.model_concurrency = model_concurrency
+        self.model_rpm = model_rpm
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._key_limiters = {key: Limiter(key_concurrency, key_rpm) for key in api_keys}
+        self._model_limiters: Dict[str, Limiter] = {}
+
+    def _model_limiter(self, model: str) -> Limiter:
+        limiter = self._model_limiters.get(model)
+        if limiter is None:
+            limiter = Limiter(self.model_concurrency, self.model_rpm)
+            self._model_limiters[model] = limiter
+        return limiter
+
+    def _pick_key(self) -> str:
+        """Least loaded key, preferring keys that are not cooling down."""
+        now = time.monotonic()
+        return min(
+            self._key_limiters,
+            key=lambda k: (
+                self._key_limiters[k].blocked_until > now,
+                self._key_limiters[k].in_use + self._key_limiters[k].waiting,
+            ),
+        )
+
+    def key_available(self) -> bool:
+        """Whether some API key could send a request right now, without queueing."""
+        return any(limiter.can_admit_now() for limiter in self._key_limiters.values())
+
+    async def _admit(self, model: str) -> str:
+        """Acquire the model limiter, then the least loaded key's limiter."""
+        model_limiter = self._model_limiter(model)
+        await model_limiter.acquire()
+        try:
+            api_key = self._pick_key()
+            await self._key_limiters[api_key].acquire()
+        except BaseException:
+            model_limiter.release()
+            raise
+        return api_key
+
+    @asynccontextmanager
+    async def slot(self, model: str, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Hold an admission slot for one request to a model.
+
+        Args:
+            model: Model the request goes to
+            timeout: Maximum seconds to wait in the queue (None = no limit)
+
+        Yields:
+            The API key to send the request with
+
+        Raises:
+            AdmissionTimeout if no slot frees up in time
+        """
+        try:
+            api_key = await asyncio.wait_for(self._admit(model), timeout)
+        except asyncio.TimeoutError:
+            raise AdmissionTimeout(f"No slot for {model} within {timeout:.1f}s") from None
+        try:
+            yield api_key
+        finally:
+            self._key_limiters[api_key].release()
+            self._model_limiter(model).release()
+
+    async def run(
+        self,
+        model: str,
+        attempt: Callable[[str, float], Awaitable[Any]],
+        budget: float
+    ) -> Any:
+        """
+        Run attempt(api_key, remaining_seconds) under the limiters, retrying
+        429s (honoring Retry-After) and transient errors with jittered
+        exponential backoff while the latency budget allows.
+
+        Args:
+            model: Model being queried (selects the per-model limiter)
+            attempt: Coroutine function performing one request
+            budget: Total seconds allowed for queueing, attempts and backoff
+
+        Returns:
+            Whatever the successful attempt returned
+
+        Raises:
+            The last attempt's exception, or AdmissionTimeout when the budget
+            runs out before a request can be sent
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + budget
+
+        for attempt_number in range(self.max_retries + 1):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise AdmissionTimeout(f"Latency budget of {budget:.1f}s exhausted for {model}")
+
+            try:
+                async with self.slot(model, timeout=remaining) as api_key:
+                    return await attempt(api_key, max(0.001, deadline - loop.time()))
+            except Exception as e:
+                delay = self._retry_delay(model, e, attempt_number)
+                if delay is None or attempt_number == self.max_retries:
+                    raise
+                if loop.time() + delay >= deadline:
+                    raise
+                print(f"Retrying {model} in {delay:.2f}s after: {e}")
+
+            await asyncio.sleep(delay)
+
+    def _retry_delay(self, model: str, error: Exception, attempt_number: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the error is not retryable."""
+        backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt_number)))
+
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            if status not in RETRYABLE_STATUSES:
+                return None
+            retry_after = retry_after_seconds(error.response)
+            if status == 429 and retry_after is not None:
+                # Everyone queued for this model waits too, not just this caller
+                self._model_limiter(model).block_for(retry_after)
+                return retry_after + random.uniform(0, self.backoff_base)
+            return backoff
+
+        if isinstance(error, (httpx.TransportError, asyncio.TimeoutError)):
+            return backoff
+
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Current queue/in-flight/cooldown state per model and per key."""
+        return {
+            "models": {model: limiter.snapshot() for model, limiter in self._model_limiters.items()},
+            "keys": {f"key_{i}": limiter.snapshot() for i, limiter in enumerate(self._key_limiters.values())},
+        }
+
+
+# Process-wide scheduler used by query_model
+scheduler = UpstreamScheduler()
@@ -1,21 +1,72 @@
-"""JSON-based storage for conversations."""
+"""Conversation storage.
 
-import json
-import os
-from datetime import datetime
-from typing import List, Dict, Any, Optional
-from pathlib import Path
-from .config import DATA_DIR
-
-
-def ensure_data_dir():
-    """Ensure the data directory exists."""
-    Path(DATA_DIR).mkdir(parents=True, exist_ok=True)
+The functions below are the storage API used by the rest of the backend.
+They delegate to the backend selected by STORAGE_BACKEND (see
+backend/storage_backends): JSON files in DATA_DIR by default, or SQLite.
+"""
 
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, List, Dict, Any, Optional, Tuple
+from .config import (
+    DATA_DIR,
+    STORAGE_BACKEND,
+    STORAGE_SQLITE_PATH,
+    STORAGE_COMPACT_MIN_BYTES,
+    STORAGE_FSYNC,
+    STORAGE_PRETTY,
+    STORAGE_COMPRESSION,
+    STORAGE_COMPRESS_MIN_BYTES,
+)
+from .storage_backends import StorageBackend, FileBackend, SQLiteBackend, DocumentCodec
+
+_backend: Optional[StorageBackend] = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name: str = STORAGE_BACKEND) -> StorageBackend:
+    """
+    Build a storage backend from configuration.
 
-def get_conversation_path(conversation_id: str) -> str:
-    """Get the file path for a conversation."""
-    return os.path.join(DATA_DIR, f"{conversation_id}.json")
+    Args:
+        name: "file" or "sqlite"
+    """
+    codec = DocumentCodec(
+        pretty=STORAGE_PRETTY,
+        compression=STORAGE_COMPRESSION,
+        compress_min_bytes=STORAGE_COMPRESS_MIN_BYTES,
+    )
+    if name == "file":
+        return FileBackend(
+            DATA_DIR,
+            compact_min_bytes=STORAGE_COMPACT_MIN_BYTES,
+            fsync=STORAGE_FSYNC,
+            codec=codec,
+        )
+    if name == "sqlite":
+        return SQLiteBackend(STORAGE_SQLITE_PATH, codec=codec)
+    raise ValueError(f"Unknown storage backend: {name}")
+
+
+def get_backend() -> StorageBackend:
+    """The process-wide storage backend (created on first use)."""
+    global _backend
+    if _backend is None:
+        # Storage functions are called from a thread pool (backend/async_storage.py)
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend: Optional[StorageBackend]):
+    """Replace the process-wide storage backend (None = rebuild from config on next use)."""
+    global _backend
+    with _backend_lock:
+        if _backend is not None and _backend is not backend:
+            _backend.close()
+        _backend = backend
 
 
 def create_conversation(conversation_id: str) -> Dict[str, Any]:
@@ -28,21 +79,7 @@ def create_conversation(conversation_id: str) -> Dict[str, Any]:
     Returns:
         New conversation dict
     """
-    ensure_data_dir()
-
-    conversation = {
-        "id": conversation_id,
-        "created_at": datetime.utcnow().isoformat(),
-        "title": "New Conversation",
-        "messages": []
-    }
-
-    # Save to file
-    path = get_conversation_path(conversation_id)
-    with open(path, 'w') as f:
-        json.dump(conversation, f, indent=2)
-
-    return conversation
+    return get_backend().create_conversation(conversation_id, datetime.utcnow().isoformat())
 
 
 def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
@@ -55,27 +92,107 @@ def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         Conversation dict or None if not found
     """
-    path = get_conversation_path(conversation_id)
+    return get_backend().get_conversation(conversation_id)
+
+
+def summarize_message(message: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Strip the bulky, rarely read parts of a message for windowed loading.
+
+    Omitted parts are listed under "omitted" and can be loaded on demand
+    with get_message:
+        - default council: the Stage 2 critiques ("stage2"; the parsed
+          rankings are kept)
+        - round table: every round but the last ("rounds": [numbers])
+
+    Args:
+        message: Stored message
+
+    Returns:
+        A shallow copy with the omitted parts removed
+    """
+    if message.get("role") != "assistant":
+        return message
+
+    summary = dict(message)
+    omitted: Dict[str, Any] = {}
+
+    if summary.get("stage2"):
+        summary["stage2"] = [
+            {"model": ranking.get("model"), "parsed_ranking": ranking.get("parsed_ranking", [])}
+            for ranking in summary["stage2"]
+        ]
+        omitted["stage2"] = True
 
-    if not os.path.exists(path):
+    iterations = summary.get("iterations")
+    if iterations and len(iterations) > 1:
+        summary["iterations"] = iterations[-1:]
+        omitted["rounds"] = [iteration.get("round") for iteration in iterations[:-1]]
+
+    if omitted:
+        summary["omitted"] = omitted
+    return summary
+
+
+def get_messages(
+    conversation_id: str,
+    limit: int = 20,
+    before: Optional[int] = None,
+    summarize: bool = True
+) -> Optional[Dict[str, Any]]:
+    """
+    Load a window of a conversation: its newest messages before a cursor.
+
+    Args:
+        conversation_id: Conversation identifier
+        limit: Maximum number of messages
+        before: Only messages with a lower index (the previous window's next_cursor)
+        summarize: Apply summarize_message to every message
+
+    Returns:
+        Dict with the conversation metadata, "messages" (oldest first, each
+        with its "index") and "next_cursor" (None when the start is reached),
+        or None if the conversation does not exist
+    """
+    window = get_backend().get_message_window(conversation_id, limit, before)
+    if window is None:
         return None
 
-    with open(path, 'r') as f:
-        return json.load(f)
+    metadata, indexed_messages = window
+    messages = [
+        {**(summarize_message(message) if summarize else message), "index": index}
+        for index, message in indexed_messages
+    ]
+    first = indexed_messages[0][0] if indexed_messages else 0
+    return {
+        **metadata,
+        "messages": messages,
+        "next_cursor": first if first > 0 else None,
+    }
+
+
+def get_message(conversation_id: str, index: int) -> Optional[Dict[str, Any]]:
+    """
+    Load one full message of a conversation.
+
+    Args:
+        conversation_id: Conversation identifier
+        index: Position of the message in the conversation
+
+    Returns:
+        Message dict or None if not found
+    """
+    return get_backend().get_message(conversation_id, index)
 
 
 def save_conversation(conversation: Dict[str, Any]):
     """
-    Save a conversation to storage.
+    Save a conversation to storage, replacing its stored contents.
 
     Args:
         conversation: Conversation dict to save
     """
-    ensure_data_dir()
-
-    path = get_conversation_path(conversation['id'])
-    with open(path, 'w') as f:
-        json.dump(conversation, f, indent=2)
+    get_backend().save_conversation(conversation)
 
 
 def list_conversations() -> List[Dict[str, Any]]:
@@ -85,26 +202,45 @@ def list_conversations() -> List[Dict[str, Any]]:
     Returns:
         List of conversation metadata dicts
     """
-    ensure_data_dir()
+    return get_backend().list_conversations()
+
+
+def list_conversations_page(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    title_prefix: Optional[str] = None,
+    council_type: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    List one page of conversations (metadata only), newest first.
+
+    Served from the backend's metadata index, so the cost is proportional
+    to the page size rather than to the number of conversations.
+
+    Args:
+        limit: Maximum number of conversations to return
+        cursor: Cursor returned with the previous page (None = first page)
+        title_prefix: Only conversations whose title starts with this (case-insensitive)
+        council_type: Only conversations whose first answer used this council type
+
+    Returns:
+        Tuple of (metadata dicts, cursor for the next page or None)
+
+    Raises:
+        ValueError if the cursor is malformed
+    """
+    return get_backend().list_conversations_page(limit, cursor, title_prefix, council_type)
 
-    conversations = []
-    for filename in os.listdir(DATA_DIR):
-        if filename.endswith('.json'):
-            path = os.path.join(DATA_DIR, filename)
-            with open(path, 'r') as f:
-                data = json.load(f)
-                # Return metadata only
-                conversations.append({
-                    "id": data["id"],
-                    "created_at": data["created_at"],
-                    "title": data.get("title", "New Conversation"),
-                    "message_count": len(data["messages"])
-                })
 
-    # Sort by creation time, newest first
-    conversations.sort(key=lambda x: x["created_at"], reverse=True)
+def conversation_exists(conversation_id: str) -> bool:
+    """Whether a conversation exists."""
+    return get_backend().exists(conversation_id)
 
-    return conversations
+
+def _require(conversation_id: str):
+    """Raise ValueError if the conversation does not exist."""
+    if not conversation_exists(conversation_id):
+        raise ValueError(f"Conversation {conversation_id} not found")
 
 
 def add_user_message(conversation_id: str, content: str):
@@ -115,17 +251,13 @@ def add_user_message(conversation_id: str, content: str):
         conversation_id: Conversation identifier
         content: User message content
     """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
-        raise ValueError(f"Conversation {conversation_id} not found")
+    _require(conversation_id)
 
-    conversation["messages"].append({
+    get_backend().append_message(conversation_id, {
         "role": "user",
         "content": content
     })
 
-    save_conversation(conversation)
-
 
 def add_assistant_message(
     conversation_id: str,
@@ -142,19 +274,15 @@ def add_assistant_message(
         stage2: List of model rankings
         stage3: Final synthesized response
     """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
-        raise ValueError(f"Conversation {conversation_id} not found")
+    _require(conversation_id)
 
-    conversation["messages"].append({
+    get_backend().append_message(conversation_id, {
         "role": "assistant",
         "stage1": stage1,
         "stage2": stage2,
         "stage3": stage3
     })
 
-    save_conversation(conversation)
-
 
 def add_assistant_message_obj(conversation_id: str, message: Dict[str, Any]):
     """
@@ -165,12 +293,9 @@ def add_assistant_message_obj(conversation_id: str, message: Dict[str, Any]):
         conversation_id: Conversation identifier
         message: Assistant message dict (can be default, round_table, hierarchy, or assembly_line)
     """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
-        raise ValueError(f"Conversation {conversation_id} not found")
+    _require(conversation_id)
 
-    conversation["messages"].append(message)
-    save_conversation(conversation)
+    get_backend().append_message(conversation_id, message)
 
 
 def update_conversation_title(conversation_id: str, title: str):
@@ -181,12 +306,9 @@ def update_conversation_title(conversation_id: str, title: str):
         conversation_id: Conversation identifier
         title: New title for the conversation
     """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
-        raise ValueError(f"Conversation {conversation_id} not found")
+    _require(conversation_id)
 
-    conversation["title"] = title
-    save_conversation(conversation)
+    get_backend().set_title(conversation_id, title)
 
 def delete_conversation(conversation_id: str) -> bool:
     """
@@ -198,15 +320,90 @@ def delete_conversation(conversation_id: str) -> bool:
     Returns:
         True if deleted, False if not found
     """
-    ensure_data_dir()
-    path = get_conversation_path(conversation_id)
+    return get_backend().delete_conversation(conversation_id)
+
+
+class Transaction:
+    """
+    Unit of work for one conversation: collects mutations in memory and
+    writes them in a single atomic, durable commit.
+
+    Usage:
+        with storage.transaction(conversation_id) as tx:
+            tx.add_user_message(content)
+            tx.flush()  # the user message is saved before the council runs
+            tx.set_partial({"role": "assistant", "stage1": ...})
+            tx.update_conversation_title(title)
+            tx.add_assistant_message_obj(message)
+
+    If the block raises, what was collected is still committed, plus the
+    partial assistant message (if any) marked "status": "incomplete", so a
+    turn that fails halfway keeps the user message and the stages that
+    finished.
+    """
 
-    if not os.path.exists(path):
-        return False
+    def __init__(self, conversation_id: str):
+        self.conversation_id = conversation_id
+        self.ops: List[Dict[str, Any]] = []
+        self.partial: Optional[Dict[str, Any]] = None
+        self.committed = False
+
+    def add_user_message(self, content: str):
+        """Queue a user message."""
+        self.ops.append({"op": "add_message", "message": {"role": "user", "content": content}})
+
+    def add_assistant_message_obj(self, message: Dict[str, Any]):
+        """Queue a complete assistant message (replaces any partial one)."""
+        self.ops.append({"op": "add_message", "message": message})
+        self.partial = None
+
+    def update_conversation_title(self, title: str):
+        """Queue a title change."""
+        self.ops.append({"op": "set_title", "title": title})
+
+    def set_partial(self, message: Optional[Dict[str, Any]]):
+        """Record the assistant message as far as it got, saved only if the turn fails."""
+        self.partial = message
+
+    def fail(self, error: BaseException):
+        """Queue the partial assistant message, marked incomplete with the error."""
+        if self.partial is not None:
+            self.ops.append({
+                "op": "add_message",
+                "message": {**self.partial, "status": "incomplete", "error": str(error) or type(error).__name__}
+            })
+            self.partial = None
+
+    def flush(self):
+        """Write the mutations queued so far now, keeping the transaction open."""
+        if self.committed or not self.ops:
+            return
+        ops, self.ops = self.ops, []
+        get_backend().apply(self.conversation_id, ops)
+
+    def commit(self):
+        """Write every queued mutation in one backend call (only once)."""
+        if self.committed:
+            return
+        self.committed = True
+        if self.ops:
+            get_backend().apply(self.conversation_id, self.ops)
+
+
+@contextmanager
+def transaction(conversation_id: str) -> Iterator[Transaction]:
+    """
+    Open a unit of work on a conversation (see Transaction).
 
+    Raises:
+        ValueError if the conversation does not exist
+    """
+    _require(conversation_id)
+    tx = Transaction(conversation_id)
     try:
-        os.remove(path)
-        return True
-    except Exception as e:
-        print(f"Error deleting conversation {conversation_id}: {e}")
-        return False
\ No newline at end of file
+        yield tx
+    except BaseException as e:
+        tx.fail(e)
+        tx.commit()
+        raise
+    tx.commit()
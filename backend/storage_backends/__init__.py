@@ -0,0 +1,13 @@
+"""Storage backends for conversations."""
+
+from .base import StorageBackend
+from .codec import DocumentCodec
+from .file import FileBackend
+from .sqlite import SQLiteBackend
+
+__all__ = [
+    "StorageBackend",
+    "DocumentCodec",
+    "FileBackend",
+    "SQLiteBackend"
+]
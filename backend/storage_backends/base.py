@@ -0,0 +1,105 @@
+"""Interface every conversation storage backend implements."""
+
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class StorageBackend(ABC):
+    """
+    Persists conversations. backend/storage.py exposes these operations as
+    module-level functions on top of the configured backend.
+    """
+
+    @abstractmethod
+    def create_conversation(self, conversation_id: str, created_at: str) -> Dict[str, Any]:
+        """Create an empty conversation and return it."""
+
+    @abstractmethod
+    def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Load a full conversation, or None if it does not exist."""
+
+    @abstractmethod
+    def save_conversation(self, conversation: Dict[str, Any]):
+        """Create or replace a conversation with the given contents."""
+
+    @abstractmethod
+    def exists(self, conversation_id: str) -> bool:
+        """Whether the conversation exists."""
+
+    @abstractmethod
+    def apply(self, conversation_id: str, ops: List[Dict[str, Any]]):
+        """
+        Apply a batch of mutations to an existing conversation in one
+        atomic, durable write.
+
+        Ops: {"op": "add_message", "message": {...}} and {"op": "set_title", "title": "..."}.
+
+        Raises:
+            ValueError if the conversation does not exist
+        """
+
+    def append_message(self, conversation_id: str, message: Dict[str, Any]):
+        """Append a message to an existing conversation."""
+        self.apply(conversation_id, [{"op": "add_message", "message": message}])
+
+    def set_title(self, conversation_id: str, title: str):
+        """Change the title of an existing conversation."""
+        self.apply(conversation_id, [{"op": "set_title", "title": title}])
+
+    @abstractmethod
+    def list_conversations(self) -> List[Dict[str, Any]]:
+        """Metadata (id, created_at, title, message_count, council_type) of all conversations, newest first."""
+
+    @abstractmethod
+    def list_conversations_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        title_prefix: Optional[str] = None,
+        council_type: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of metadata, newest first, and the cursor of the next page (None at the end)."""
+
+    def get_message_window(
+        self,
+        conversation_id: str,
+        limit: int,
+        before: Optional[int] = None
+    ) -> Optional[Tuple[Dict[str, Any], List[Tuple[int, Dict[str, Any]]]]]:
+        """
+        The newest `limit` messages with an index below `before`.
+
+        This default loads the whole conversation; backends that can read a
+        range of messages directly override it.
+
+        Returns:
+            Tuple of (metadata with id, created_at, title and message_count,
+            list of (index, message) oldest first), or None if not found
+        """
+        conversation = self.get_conversation(conversation_id)
+        if conversation is None:
+            return None
+        messages = conversation["messages"]
+        end = len(messages) if before is None else max(0, min(before, len(messages)))
+        start = max(0, end - limit)
+        metadata = {
+            "id": conversation["id"],
+            "created_at": conversation["created_at"],
+            "title": conversation.get("title", "New Conversation"),
+            "message_count": len(messages),
+        }
+        return metadata, list(enumerate(messages))[start:end]
+
+    def get_message(self, conversation_id: str, index: int) -> Optional[Dict[str, Any]]:
+        """One full message by position, or None if it does not exist."""
+        conversation = self.get_conversation(conversation_id)
+        if conversation is None or not 0 <= index < len(conversation["messages"]):
+            return None
+        return conversation["messages"][index]
+
+    @abstractmethod
+    def delete_conversation(self, conversation_id: str) -> bool:
+        """Delete a conversation; returns False if it did not exist."""
+
+    def close(self):
+        """Release any resources held by the backend."""
@@ -0,0 +1,107 @@
+"""Serialization of stored conversation documents.
+
+Format versions:
+    1: pretty-printed JSON (indent=2), the original format
+    2: compact JSON carrying "format_version": 2, optionally compressed
+
+Compressed documents are recognised by their magic bytes (zstd or gzip),
+so the reader handles every version and compression side by side and
+files never need to be converted up front. orjson and zstandard are used
+when installed; otherwise the standard library json and gzip are used.
+"""
+
+import gzip
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMAT_VERSION = 2
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def dumps(obj: Any) -> str:
+    """Compact JSON text (no whitespace, UTF-8 kept as is)."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def loads(data) -> Any:
+    """Parse JSON from str or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def available_compression() -> str:
+    """Best compression available: "zstd" if zstandard is installed, else "gzip"."""
+    return "zstd" if zstandard is not None else "gzip"
+
+
+class DocumentCodec:
+    """Encodes conversation documents to bytes and back."""
+
+    def __init__(self, pretty: bool = False, compression: str = "auto", compress_min_bytes: int = 16 * 1024):
+        """
+        Args:
+            pretty: Write the original indent=2 format (version 1) instead of compact JSON
+            compression: "auto" (zstd if installed, else gzip), "zstd", "gzip" or "none"
+            compress_min_bytes: Documents smaller than this are stored uncompressed
+        """
+        if compression == "auto":
+            compression = available_compression()
+        if compression == "zstd" and zstandard is None:
+            print("zstandard is not installed; compressing conversations with gzip instead")
+            compression = "gzip"
+        if compression not in ("zstd", "gzip", "none"):
+            raise ValueError(f"Unknown compression: {compression}")
+        self.pretty = pretty
+        self.compression = compression
+        self.compress_min_bytes = compress_min_bytes
+
+    def encode(self, document: dict) -> bytes:
+        """Serialize a document (compressing it if it is large enough)."""
+        if self.pretty:
+            return json.dumps(document, indent=2).encode("utf-8")
+
+        data = dumps({**document, "format_version": FORMAT_VERSION}).encode("utf-8")
+        if self.compression == "none" or len(data) < self.compress_min_bytes:
+            return data
+        return self.compress(data)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=3).compress(data)
+        # mtime=0 keeps the output deterministic
+        return gzip.compress(data, compresslevel=6, mtime=0)
+
+    @staticmethod
+    def decode(data: bytes) -> dict:
+        """Parse a document written in any format version."""
+        data = decompress(data)
+        document = loads(data)
+        document.pop("format_version", None)
+        return document
+
+
+def decompress(data: bytes) -> bytes:
+    """Undo zstd or gzip compression, detected by magic bytes (plain data is returned as is)."""
+    if data[:4] == ZSTD_MAGIC:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read this conversation")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    if data[:2] == GZIP_MAGIC:
+        return gzip.decompress(data)
+    return data
+
@@ -0,0 +1,563 @@
+"""JSON file storage: one snapshot plus one append-only event log per conversation.
+
+Each conversation is a snapshot file (`<id>.json`) plus an append-only
+event log (`<id>.jsonl`). Mutations append one JSON line to the log, so
+their cost is proportional to the change rather than to the whole
+conversation. Reads fold the log into the snapshot, and the log is
+periodically compacted into a new snapshot.
+
+The snapshot holds the conversation's metadata; its messages are records
+in a message file (`<id>.<token>.messages`) at the byte offsets listed in
+the snapshot (`message_file`, `message_offsets`). Compaction appends the
+log's messages to that file, and a window of messages (get_message_window,
+get_message) reads only its own byte range plus the short log. Records
+past the last listed offset are left over from a compaction that crashed
+and are overwritten by the next one. Snapshots with the messages inline
+(written before message files existed, or with the pretty format) are
+still read, and are converted the next time they are compacted or saved.
+
+Log layout: the first line is a header `{"log_id": ...}`, followed by one
+event per line (`{"op": "add_message", ...}` / `{"op": "set_title", ...}`,
+or `{"op": "batch", "ops": [...]}` for several mutations committed together).
+A snapshot records the id and size of the log it already contains
+(`folded_log_id`, `folded_log_size`), which makes compaction crash-safe:
+if the process dies after writing the snapshot but before replacing the
+log, the folded part of the stale log is recognised and not applied
+twice, while events appended to it after the crash still are. A torn
+final line (crash mid-append) is ignored.
+
+Snapshots are written with a DocumentCodec: compact JSON, compressed with
+zstd or gzip once large. Files in the original pretty-printed format are
+still read, and are converted the next time they are compacted or saved.
+
+Every operation holds an advisory lock (fcntl.flock on
+`.locks/<id>.lock`): shared for reads, exclusive for writes. flock locks
+belong to the open file, so they exclude other threads as well as other
+processes (e.g. uvicorn --workers N). Snapshots and fresh logs are
+written via write-and-rename, so even an unlocked reader never sees a
+half-written file.
+
+Listing is served from a metadata index (`.index.sqlite3` in the same
+directory) that every mutation keeps up to date. It is rebuilt from the
+files when missing; rebuild_index() repairs it after files were changed
+by hand.
+"""
+
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, List, Dict, Any, Optional, Tuple
+from pathlib import Path
+from .base import StorageBackend
+from .codec import DocumentCodec, decompress, dumps, loads
+from .index import ConversationIndex
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+# Snapshot bookkeeping that is not part of the conversation
+_INTERNAL_KEYS = ("folded_log_id", "folded_log_size", "message_file", "message_offsets")
+
+
+class FileBackend(StorageBackend):
+    """Conversations as JSON snapshot + JSONL log files in a directory."""
+
+    def __init__(
+        self,
+        data_dir: str,
+        compact_min_bytes: int = 64 * 1024,
+        fsync: bool = False,
+        codec: Optional[DocumentCodec] = None
+    ):
+        """
+        Args:
+            data_dir: Directory holding the conversation files
+            compact_min_bytes: The log is compacted once it is larger than both
+                this and the snapshot (keeps compaction cost amortized O(1))
+            fsync: fsync every append/snapshot (durable across power loss, slower)
+            codec: Snapshot format (defaults to compact JSON, compressed when large)
+        """
+        self.data_dir = data_dir
+        self.compact_min_bytes = compact_min_bytes
+        self.fsync = fsync
+        self.codec = codec or DocumentCodec()
+        self.ensure_data_dir()
+        self.index = ConversationIndex(os.path.join(data_dir, ".index.sqlite3"))
+        with self.index.write() as conn:
+            created = self.index.ensure_schema(conn) is not None
+        if created:
+            self.rebuild_index()
+
+    def ensure_data_dir(self):
+        """Ensure the data directory exists."""
+        Path(self.data_dir).mkdir(parents=True, exist_ok=True)
+
+    def get_conversation_path(self, conversation_id: str) -> str:
+        """Get the file path for a conversation's snapshot."""
+        return os.path.join(self.data_dir, f"{conversation_id}.json")
+
+    def get_log_path(self, conversation_id: str) -> str:
+        """Get the file path for a conversation's append-only event log."""
+        return os.path.join(self.data_dir, f"{conversation_id}.jsonl")
+
+    def get_message_file_path(self, name: str) -> str:
+        """Get the path of a message file named by a snapshot."""
+        return os.path.join(self.data_dir, name)
+
+    def get_lock_path(self, conversation_id: str) -> str:
+        """Get the file path of a conversation's advisory lock."""
+        return os.path.join(self.data_dir, ".locks", f"{conversation_id}.lock")
+
+    @contextmanager
+    def _locked(self, conversation_id: str, exclusive: bool = True) -> Iterator[None]:
+        """Hold the conversation's advisory file lock (shared or exclusive)."""
+        if fcntl is None:
+            yield
+            return
+
+        path = self.get_lock_path(conversation_id)
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(fd)
+
+    def conversation_ids(self) -> List[str]:
+        """Ids of every conversation in the directory."""
+        self.ensure_data_dir()
+        return [
+            filename[:-len('.json')]
+            for filename in os.listdir(self.data_dir)
+            if filename.endswith('.json')
+        ]
+
+    def _write_atomic(self, path: str, data: bytes):
+        """Write a file via write-and-rename so readers never see it half-written."""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        if self.fsync:
+            # Make the rename itself durable
+            dir_fd = os.open(self.data_dir, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    def _new_log(self, conversation_id: str) -> str:
+        """Replace the conversation's log with an empty one; returns the new log id."""
+        log_id = uuid.uuid4().hex
+        self._write_atomic(self.get_log_path(conversation_id), (dumps({"log_id": log_id}) + "\n").encode("utf-8"))
+        return log_id
+
+    def _append_event(self, conversation_id: str, event: Dict[str, Any]):
+        """
+        Append one event to the conversation's log.
+
+        The line is written with a single O_APPEND write, so concurrent
+        appends never interleave and a crash can at most leave a torn last line.
+        """
+        path = self.get_log_path(conversation_id)
+        line = dumps(event) + "\n"
+
+        fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            size = os.fstat(fd).st_size
+            if size == 0:
+                # Log created on first write (e.g. conversations from before the log existed)
+                line = dumps({"log_id": uuid.uuid4().hex}) + "\n" + line
+            elif os.pread(fd, 1, size - 1) != b"\n":
+                # Terminate a torn line left by a crash so this event stays readable
+                line = "\n" + line
+            os.write(fd, line.encode("utf-8"))
+            if self.fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        self._maybe_compact(conversation_id)
+
+    def _read_log(self, conversation_id: str):
+        """
+        Read the conversation's log.
+
+        Returns:
+            Tuple of (log_id, events, size); log_id is None if there is no
+            log. Events are (byte offset, event) pairs.
+        """
+        path = self.get_log_path(conversation_id)
+        if not os.path.exists(path):
+            return None, [], 0
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        lines = data.split(b"\n")
+
+        log_id = None
+        events = []
+        offset = 0
+        for number, line in enumerate(lines):
+            start = offset
+            offset += len(line) + 1
+            if not line:
+                continue
+            try:
+                record = loads(line)
+            except ValueError:
+                # Torn write from a crash mid-append; only the last line can be affected
+                if number < len(lines) - 2:
+                    print(f"Skipping corrupt log line {number} in {path}")
+                continue
+            if number == 0 and "log_id" in record:
+                log_id = record["log_id"]
+            else:
+                events.append((start, record))
+
+        return log_id, events, len(data)
+
+    @staticmethod
+    def _apply_event(conversation: Dict[str, Any], event: Dict[str, Any]):
+        """Apply one logged mutation to a conversation dict."""
+        op = event.get("op")
+        if op == "batch":
+            for nested in event["ops"]:
+                FileBackend._apply_event(conversation, nested)
+        elif op == "add_message":
+            conversation["messages"].append(event["message"])
+        elif op == "set_title":
+            conversation["title"] = event["title"]
+
+    def _read_snapshot(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """The decoded snapshot (internal keys included), or None if there is none."""
+        path = self.get_conversation_path(conversation_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return self.codec.decode(f.read())
+
+    @staticmethod
+    def _unfolded(snapshot: Dict[str, Any], log_id: Optional[str], events: List[Tuple[int, Dict[str, Any]]]):
+        """The log events the snapshot does not contain yet."""
+        folded = 0
+        if log_id is not None and log_id == snapshot.get("folded_log_id"):
+            # Crash between snapshot and new log: skip only what the snapshot holds
+            # (snapshots without a recorded size hold the whole log)
+            folded = snapshot.get("folded_log_size")
+            if folded is None:
+                return []
+        return [event for offset, event in events if offset >= folded]
+
+    def _fold_tail(
+        self,
+        snapshot: Dict[str, Any],
+        log_id: Optional[str],
+        events: List[Tuple[int, Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Title and messages after the message file: the snapshot's inline
+        messages (if any) followed by the messages added in the log.
+        """
+        tail = {
+            "title": snapshot.get("title", "New Conversation"),
+            "messages": list(snapshot.get("messages", [])),
+        }
+        for event in self._unfolded(snapshot, log_id, events):
+            self._apply_event(tail, event)
+        return tail
+
+    @staticmethod
+    def _stored_count(snapshot: Dict[str, Any]) -> int:
+        """Number of messages in the snapshot's message file."""
+        return len(snapshot.get("message_offsets") or [0]) - 1
+
+    def _encode_record(self, message: Dict[str, Any]) -> bytes:
+        """Compact JSON, or compressed bytes for large messages."""
+        data = dumps(message).encode("utf-8")
+        if self.codec.compression == "none" or len(data) < self.codec.compress_min_bytes:
+            return data
+        return self.codec.compress(data)
+
+    def _read_messages(self, snapshot: Dict[str, Any], start: int, end: int) -> List[Dict[str, Any]]:
+        """Messages start..end-1 of the snapshot's message file (one read of their byte range)."""
+        if start >= end:
+            return []
+        offsets = snapshot["message_offsets"]
+        with open(self.get_message_file_path(snapshot["message_file"]), 'rb') as f:
+            f.seek(offsets[start])
+            data = f.read(offsets[end] - offsets[start])
+        base = offsets[start]
+        return [
+            loads(decompress(data[offsets[i] - base:offsets[i + 1] - base]))
+            for i in range(start, end)
+        ]
+
+    def _append_messages(self, snapshot: Dict[str, Any], messages: List[Dict[str, Any]]):
+        """
+        Write messages to the snapshot's message file after its last record
+        (creating the file if the snapshot has none) and list their offsets
+        in the snapshot. The snapshot still has to be written.
+        """
+        if not messages:
+            return
+        if not snapshot.get("message_file"):
+            snapshot["message_file"] = f"{snapshot['id']}.{uuid.uuid4().hex}.messages"
+            snapshot["message_offsets"] = [0]
+        offsets = snapshot["message_offsets"]
+        records = [self._encode_record(message) for message in messages]
+
+        fd = os.open(self.get_message_file_path(snapshot["message_file"]), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # Drop records of a compaction that crashed before its snapshot was written
+            os.ftruncate(fd, offsets[-1])
+            os.pwrite(fd, b"".join(records), offsets[-1])
+            if self.fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        for record in records:
+            offsets.append(offsets[-1] + len(record))
+
+    def _load(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Load the snapshot, its messages and fold in the log (keeps internal keys)."""
+        conversation = self._read_snapshot(conversation_id)
+        if conversation is None:
+            return None
+
+        log_id, events, _ = self._read_log(conversation_id)
+        tail = self._fold_tail(conversation, log_id, events)
+        conversation["title"] = tail["title"]
+        conversation["messages"] = (
+            self._read_messages(conversation, 0, self._stored_count(conversation)) + tail["messages"]
+        )
+        return conversation
+
+    def _maybe_compact(self, conversation_id: str):
+        """Fold the log into the snapshot once the log outgrows the snapshot."""
+        try:
+            log_size = os.path.getsize(self.get_log_path(conversation_id))
+            snapshot_size = os.path.getsize(self.get_conversation_path(conversation_id))
+        except OSError:
+            return
+
+        if log_size > max(self.compact_min_bytes, snapshot_size):
+            self._compact(conversation_id)
+
+    def compact_conversation(self, conversation_id: str):
+        """
+        Fold a conversation's log into a new snapshot and start a fresh log.
+
+        Args:
+            conversation_id: Conversation identifier
+        """
+        with self._locked(conversation_id):
+            self._compact(conversation_id)
+
+    def _compact(self, conversation_id: str):
+        snapshot = self._read_snapshot(conversation_id)
+        if snapshot is None:
+            return
+
+        log_id, events, log_size = self._read_log(conversation_id)
+        tail = self._fold_tail(snapshot, log_id, events)
+        if "messages" in snapshot:
+            # Inline messages: rewrite as a whole (moves them to a message file)
+            conversation = {**snapshot, "title": tail["title"], "messages": tail["messages"]}
+            self._write_snapshot(conversation, folded_log_id=log_id, folded_log_size=log_size)
+        else:
+            # Only the log's messages are written; the snapshot itself is small
+            snapshot["title"] = tail["title"]
+            self._append_messages(snapshot, tail["messages"])
+            self._write_document(snapshot, folded_log_id=log_id, folded_log_size=log_size)
+        self._new_log(conversation_id)
+
+    def _write_snapshot(
+        self,
+        conversation: Dict[str, Any],
+        folded_log_id: Optional[str],
+        folded_log_size: Optional[int] = None
+    ):
+        """Write a whole conversation as a new snapshot (and a new message file)."""
+        snapshot = {key: value for key, value in conversation.items() if key not in _INTERNAL_KEYS}
+        if not self.codec.pretty:
+            # The pretty format keeps the original single-document layout
+            self._append_messages(snapshot, snapshot.pop("messages"))
+        self._write_document(snapshot, folded_log_id, folded_log_size)
+
+    def _write_document(
+        self,
+        snapshot: Dict[str, Any],
+        folded_log_id: Optional[str],
+        folded_log_size: Optional[int] = None
+    ):
+        snapshot["folded_log_id"] = folded_log_id
+        snapshot["folded_log_size"] = folded_log_size
+        self._write_atomic(self.get_conversation_path(snapshot["id"]), self.codec.encode(snapshot))
+
+    def create_conversation(self, conversation_id: str, created_at: str) -> Dict[str, Any]:
+        self.ensure_data_dir()
+
+        conversation = {
+            "id": conversation_id,
+            "created_at": created_at,
+            "title": "New Conversation",
+            "messages": []
+        }
+
+        with self._locked(conversation_id):
+            # Save snapshot, then start an empty log
+            self._write_snapshot(conversation, folded_log_id=None)
+            self._new_log(conversation_id)
+
+            with self.index.write() as conn:
+                self.index.upsert_conversation(conn, conversation)
+
+        return conversation
+
+    def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        with self._locked(conversation_id, exclusive=False):
+            conversation = self._load(conversation_id)
+        if conversation is None:
+            return None
+        for key in _INTERNAL_KEYS:
+            conversation.pop(key, None)
+        return conversation
+
+    def save_conversation(self, conversation: Dict[str, Any]):
+        self.ensure_data_dir()
+
+        with self._locked(conversation['id']):
+            previous = self._read_snapshot(conversation['id'])
+            # The current log is marked as folded, so a crash before the new log
+            # exists cannot re-apply its events on top of the new snapshot
+            log_id, _, log_size = self._read_log(conversation['id'])
+            self._write_snapshot(conversation, folded_log_id=log_id, folded_log_size=log_size)
+            self._new_log(conversation['id'])
+            if previous is not None and previous.get("message_file"):
+                os.remove(self.get_message_file_path(previous["message_file"]))
+
+            with self.index.write() as conn:
+                self.index.upsert_conversation(conn, conversation)
+
+    def get_message_window(
+        self,
+        conversation_id: str,
+        limit: int,
+        before: Optional[int] = None
+    ) -> Optional[Tuple[Dict[str, Any], List[Tuple[int, Dict[str, Any]]]]]:
+        # Reads the snapshot, the log and only the window's records of the message file
+        with self._locked(conversation_id, exclusive=False):
+            snapshot = self._read_snapshot(conversation_id)
+            if snapshot is None:
+                return None
+            log_id, events, _ = self._read_log(conversation_id)
+            tail = self._fold_tail(snapshot, log_id, events)
+
+            stored = self._stored_count(snapshot)
+            total = stored + len(tail["messages"])
+            end = total if before is None else max(0, min(before, total))
+            start = max(0, end - limit)
+            messages = self._read_messages(snapshot, start, min(end, stored))
+
+        messages += tail["messages"][max(start, stored) - stored:max(end, stored) - stored]
+        metadata = {
+            "id": snapshot["id"],
+            "created_at": snapshot["created_at"],
+            "title": tail["title"],
+            "message_count": total,
+        }
+        return metadata, list(zip(range(start, end), messages))
+
+    def get_message(self, conversation_id: str, index: int) -> Optional[Dict[str, Any]]:
+        if index < 0:
+            return None
+        window = self.get_message_window(conversation_id, 1, index + 1)
+        if window is None or not window[1] or window[1][0][0] != index:
+            return None
+        return window[1][0][1]
+
+    def exists(self, conversation_id: str) -> bool:
+        return os.path.exists(self.get_conversation_path(conversation_id))
+
+    def apply(self, conversation_id: str, ops: List[Dict[str, Any]]):
+        if not ops:
+            return
+        # A batch is logged as one line, so it is applied entirely or not at all
+        event = ops[0] if len(ops) == 1 else {"op": "batch", "ops": ops}
+
+        with self._locked(conversation_id):
+            if not self.exists(conversation_id):
+                raise ValueError(f"Conversation {conversation_id} not found")
+            self._append_event(conversation_id, event)
+            with self.index.write() as conn:
+                for op in ops:
+                    if op["op"] == "add_message":
+                        self.index.message_added(conn, conversation_id, op["message"])
+                    elif op["op"] == "set_title":
+                        self.index.set_title(conn, conversation_id, op["title"])
+
+    def list_conversations(self) -> List[Dict[str, Any]]:
+        return self.index.list_all()
+
+    def list_conversations_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        title_prefix: Optional[str] = None,
+        council_type: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return self.index.page(limit, cursor, title_prefix, council_type)
+
+    def rebuild_index(self):
+        """Re-create the metadata index from the conversation files."""
+        with self.index.write() as conn:
+            conn.execute("DELETE FROM conversations")
+            for conversation_id in self.conversation_ids():
+                try:
+                    conversation = self.get_conversation(conversation_id)
+                except (OSError, ValueError) as e:
+                    print(f"Error indexing conversation {conversation_id}: {e}")
+                    continue
+                if conversation is not None:
+                    self.index.upsert_conversation(conn, conversation)
+
+    def delete_conversation(self, conversation_id: str) -> bool:
+        path = self.get_conversation_path(conversation_id)
+
+        if not os.path.exists(path):
+            return False
+
+        try:
+            with self._locked(conversation_id):
+                os.remove(path)
+                if os.path.exists(self.get_log_path(conversation_id)):
+                    os.remove(self.get_log_path(conversation_id))
+                # Includes message files orphaned by a crash mid-save
+                for message_file in Path(self.data_dir).glob(f"{conversation_id}.*.messages"):
+                    os.remove(message_file)
+                with self.index.write() as conn:
+                    self.index.delete(conn, conversation_id)
+            try:
+                os.remove(self.get_lock_path(conversation_id))
+            except OSError:
+                pass
+            return True
+        except Exception as e:
+            print(f"Error deleting conversation {conversation_id}: {e}")
+            return False
+
+    def close(self):
+        self.index.close()
@@ -0,0 +1,259 @@
+"""Persistent conversation metadata index (SQLite) with cursor pagination."""
+
+import base64
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Dict, Any, Optional, Tuple
+
+METADATA_COLUMNS = "id, created_at, title, message_count, council_type"
+
+
+def council_type_of(message: Dict[str, Any]) -> Optional[str]:
+    """Council type recorded by an assistant message (None for user messages)."""
+    if message.get("role") != "assistant":
+        return None
+    return message.get("council_type") or "default"
+
+
+def encode_cursor(created_at: str, conversation_id: str) -> str:
+    """Opaque cursor pointing just after the given conversation."""
+    raw = json.dumps([created_at, conversation_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Inverse of encode_cursor.
+
+    Raises:
+        ValueError if the cursor is malformed
+    """
+    try:
+        created_at, conversation_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return str(created_at), str(conversation_id)
+
+
+class ConversationIndex:
+    """
+    The conversations metadata table (id, created_at, title, message_count,
+    council_type) in a SQLite database, plus the connection handling for
+    that database.
+
+    council_type is that of the conversation's first assistant message.
+    Listing is ordered newest first by (created_at, id), which an index
+    covers, so a page costs O(page size) regardless of how many
+    conversations exist.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 10.0):
+        """
+        Args:
+            path: Database file (created if missing)
+            busy_timeout: Seconds to wait for another writer's lock
+        """
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection (one per thread, created on first use)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode: transactions are started explicitly in write()
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run a write transaction. BEGIN IMMEDIATE takes the write lock up
+        front, so read-modify-write sequences cannot interleave.
+        """
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """Run several queries against one consistent snapshot."""
+        conn = self.connection()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    def ensure_schema(self, conn: sqlite3.Connection) -> Optional[str]:
+        """
+        Create the conversations table or add columns missing from older versions.
+
+        Returns:
+            "created" for a new table, "upgraded" if columns were added, else None
+        """
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(conversations)")}
+        status = None
+        if not columns:
+            conn.execute(
+                "CREATE TABLE conversations ("
+                "id TEXT PRIMARY KEY, "
+                "created_at TEXT NOT NULL, "
+                "title TEXT NOT NULL, "
+                "message_count INTEGER NOT NULL DEFAULT 0, "
+                "council_type TEXT)"
+            )
+            status = "created"
+        elif "council_type" not in columns:
+            conn.execute("ALTER TABLE conversations ADD COLUMN council_type TEXT")
+            status = "upgraded"
+        conn.execute("CREATE INDEX IF NOT EXISTS conversations_created_at ON conversations (created_at, id)")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS conversations_council_type "
+            "ON conversations (council_type, created_at, id)"
+        )
+        return status
+
+    def upsert(
+        self,
+        conn: sqlite3.Connection,
+        conversation_id: str,
+        created_at: str,
+        title: str,
+        message_count: int = 0,
+        council_type: Optional[str] = None
+    ):
+        """Insert or replace one conversation's metadata."""
+        conn.execute(
+            "INSERT INTO conversations (id, created_at, title, message_count, council_type) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET created_at = excluded.created_at, title = excluded.title, "
+            "message_count = excluded.message_count, council_type = excluded.council_type",
+            (conversation_id, created_at, title, message_count, council_type),
+        )
+
+    def upsert_conversation(self, conn: sqlite3.Connection, conversation: Dict[str, Any]):
+        """Index a full conversation dict."""
+        messages = conversation.get("messages", [])
+        council_type = next(
+            (council_type_of(m) for m in messages if council_type_of(m) is not None),
+            None,
+        )
+        self.upsert(
+            conn,
+            conversation["id"],
+            conversation["created_at"],
+            conversation.get("title", "New Conversation"),
+            len(messages),
+            council_type,
+        )
+
+    def message_added(self, conn: sqlite3.Connection, conversation_id: str, message: Dict[str, Any]):
+        """Count a new message (and record the council type if it is the first assistant message)."""
+        conn.execute(
+            "UPDATE conversations SET message_count = message_count + 1, "
+            "council_type = COALESCE(council_type, ?) WHERE id = ?",
+            (council_type_of(message), conversation_id),
+        )
+
+    def set_title(self, conn: sqlite3.Connection, conversation_id: str, title: str):
+        conn.execute("UPDATE conversations SET title = ? WHERE id = ?", (title, conversation_id))
+
+    def delete(self, conn: sqlite3.Connection, conversation_id: str) -> bool:
+        cursor = conn.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+        return cursor.rowcount > 0
+
+    def page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        title_prefix: Optional[str] = None,
+        council_type: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of conversation metadata, newest first.
+
+        Args:
+            limit: Maximum number of conversations to return
+            cursor: next_cursor from the previous page (None = first page)
+            title_prefix: Only conversations whose title starts with this (case-insensitive)
+            council_type: Only conversations of this council type
+
+        Returns:
+            Tuple of (metadata dicts, cursor for the next page or None)
+
+        Raises:
+            ValueError if the cursor is malformed
+        """
+        clauses = []
+        args: List[Any] = []
+        if cursor:
+            created_at, conversation_id = decode_cursor(cursor)
+            clauses.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            args += [created_at, created_at, conversation_id]
+        if title_prefix:
+            escaped = title_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            clauses.append("title LIKE ? ESCAPE '\\'")
+            args.append(escaped + "%")
+        if council_type:
+            clauses.append("council_type = ?")
+            args.append(council_type)
+
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        rows = self.connection().execute(
+            f"SELECT {METADATA_COLUMNS} FROM conversations {where}"
+            "ORDER BY created_at DESC, id DESC LIMIT ?",
+            args + [limit + 1],
+        ).fetchall()
+
+        items = [self._metadata(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit and items:
+            next_cursor = encode_cursor(items[-1]["created_at"], items[-1]["id"])
+        return items, next_cursor
+
+    def list_all(self) -> List[Dict[str, Any]]:
+        """Metadata of every conversation, newest first."""
+        rows = self.connection().execute(
+            f"SELECT {METADATA_COLUMNS} FROM conversations ORDER BY created_at DESC, id DESC"
+        ).fetchall()
+        return [self._metadata(row) for row in rows]
+
+    @staticmethod
+    def _metadata(row: Tuple) -> Dict[str, Any]:
+        return {
+            "id": row[0],
+            "created_at": row[1],
+            "title": row[2],
+            "message_count": row[3],
+            "council_type": row[4],
+        }
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
@@ -0,0 +1,74 @@
+"""Copy conversations from one storage backend to another.
+
+Usage:
+    python -m backend.storage_backends.migrate                  # JSON files -> SQLite
+    python -m backend.storage_backends.migrate --source DIR --target FILE --overwrite
+"""
+
+import argparse
+from typing import Dict
+from .base import StorageBackend
+from .file import FileBackend
+from .sqlite import SQLiteBackend
+
+
+def migrate(
+    source: FileBackend,
+    target: StorageBackend,
+    overwrite: bool = False
+) -> Dict[str, int]:
+    """
+    Import every conversation of a file backend into another backend.
+
+    Args:
+        source: Backend holding the existing JSON files
+        target: Backend to import into
+        overwrite: Replace conversations that already exist in the target
+
+    Returns:
+        Counts of imported, skipped (already present) and failed conversations
+    """
+    counts = {"imported": 0, "skipped": 0, "failed": 0}
+
+    for conversation_id in sorted(source.conversation_ids()):
+        if not overwrite and target.exists(conversation_id):
+            counts["skipped"] += 1
+            continue
+        try:
+            conversation = source.get_conversation(conversation_id)
+            if conversation is None:
+                continue
+            conversation.setdefault("title", "New Conversation")
+            target.save_conversation(conversation)
+            counts["imported"] += 1
+        except Exception as e:
+            print(f"Error migrating conversation {conversation_id}: {e}")
+            counts["failed"] += 1
+
+    return counts
+
+
+def main():
+    from ..config import DATA_DIR, STORAGE_SQLITE_PATH
+
+    parser = argparse.ArgumentParser(description="Import JSON conversation files into SQLite.")
+    parser.add_argument("--source", default=DATA_DIR, help="Directory with <id>.json conversation files")
+    parser.add_argument("--target", default=STORAGE_SQLITE_PATH, help="SQLite database to import into")
+    parser.add_argument("--overwrite", action="store_true", help="Replace conversations already in the database")
+    args = parser.parse_args()
+
+    target = SQLiteBackend(args.target)
+    try:
+        counts = migrate(FileBackend(args.source), target, overwrite=args.overwrite)
+    finally:
+        target.close()
+
+    print(
+        f"Imported {counts['imported']}, skipped {counts['skipped']}, "
+        f"failed {counts['failed']} conversations into {args.target}"
+    )
+    print("Set STORAGE_BACKEND=sqlite to use it.")
+
+
+if __name__ == "__main__":
+    main()
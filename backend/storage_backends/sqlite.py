@@ -0,0 +1,193 @@
+"""SQLite storage: an indexed conversations table plus a messages table."""
+
+from typing import List, Dict, Any, Optional, Tuple
+from .base import StorageBackend
+from .codec import DocumentCodec, decompress, dumps, loads
+from .index import ConversationIndex, council_type_of
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Conversations in a SQLite database in WAL mode.
+
+    Listing reads only the small conversations table (see
+    ConversationIndex); message bodies are stored as one JSON document per
+    row in the messages table, compressed into a BLOB when large (both
+    kinds of row are read side by side). Each thread gets its own connection, and WAL
+    lets readers proceed while a writer commits, including across processes.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 10.0, codec: Optional[DocumentCodec] = None):
+        """
+        Args:
+            path: Database file (created if missing)
+            busy_timeout: Seconds to wait for another writer's lock
+            codec: Decides when and how message bodies are compressed
+        """
+        self.path = path
+        self.codec = codec or DocumentCodec()
+        self.index = ConversationIndex(path, busy_timeout=busy_timeout)
+
+        with self.index.write() as conn:
+            self._migrate(conn)
+
+    def _migrate(self, conn):
+        """Create or upgrade the schema."""
+        status = self.index.ensure_schema(conn)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "conversation_id TEXT NOT NULL REFERENCES conversations (id) ON DELETE CASCADE, "
+            "position INTEGER NOT NULL, "
+            "body TEXT NOT NULL, "
+            "PRIMARY KEY (conversation_id, position)"
+            ") WITHOUT ROWID"
+        )
+        if status == "upgraded":
+            # Backfill council_type from each conversation's first assistant message
+            for (body, conversation_id) in conn.execute(
+                "SELECT body, conversation_id FROM messages "
+                "WHERE body LIKE '%\"role\":\"assistant\"%' ORDER BY conversation_id, position DESC"
+            ).fetchall():
+                conn.execute(
+                    "UPDATE conversations SET council_type = ? WHERE id = ?",
+                    (council_type_of(self._decode_body(body)), conversation_id),
+                )
+
+    def _encode_body(self, message: Dict[str, Any]):
+        """Compact JSON text, or compressed bytes for large messages."""
+        data = dumps(message)
+        if self.codec.compression == "none" or len(data) < self.codec.compress_min_bytes:
+            return data
+        return self.codec.compress(data.encode("utf-8"))
+
+    @staticmethod
+    def _decode_body(body) -> Dict[str, Any]:
+        if isinstance(body, bytes):
+            return loads(decompress(body))
+        return loads(body)
+
+    def create_conversation(self, conversation_id: str, created_at: str) -> Dict[str, Any]:
+        conversation = {
+            "id": conversation_id,
+            "created_at": created_at,
+            "title": "New Conversation",
+            "messages": []
+        }
+        with self.index.write() as conn:
+            conn.execute(
+                "INSERT INTO conversations (id, created_at, title, message_count) VALUES (?, ?, ?, 0)",
+                (conversation_id, created_at, conversation["title"]),
+            )
+        return conversation
+
+    def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        # One read transaction so the row and its messages are consistent
+        with self.index.read() as conn:
+            row = conn.execute(
+                "SELECT id, created_at, title FROM conversations WHERE id = ?",
+                (conversation_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            messages = [
+                self._decode_body(body)
+                for (body,) in conn.execute(
+                    "SELECT body FROM messages WHERE conversation_id = ? ORDER BY position",
+                    (conversation_id,),
+                )
+            ]
+
+        return {
+            "id": row[0],
+            "created_at": row[1],
+            "title": row[2],
+            "messages": messages
+        }
+
+    def get_message_window(
+        self,
+        conversation_id: str,
+        limit: int,
+        before: Optional[int] = None
+    ) -> Optional[Tuple[Dict[str, Any], List[Tuple[int, Dict[str, Any]]]]]:
+        # Reads only the requested rows through the (conversation_id, position) key
+        with self.index.read() as conn:
+            row = conn.execute(
+                "SELECT id, created_at, title, message_count FROM conversations WHERE id = ?",
+                (conversation_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            end = row[3] if before is None else before
+            rows = conn.execute(
+                "SELECT position, body FROM messages WHERE conversation_id = ? AND position < ? "
+                "ORDER BY position DESC LIMIT ?",
+                (conversation_id, end, limit),
+            ).fetchall()
+
+        metadata = {"id": row[0], "created_at": row[1], "title": row[2], "message_count": row[3]}
+        return metadata, [(position, self._decode_body(body)) for position, body in reversed(rows)]
+
+    def get_message(self, conversation_id: str, index: int) -> Optional[Dict[str, Any]]:
+        row = self.index.connection().execute(
+            "SELECT body FROM messages WHERE conversation_id = ? AND position = ?",
+            (conversation_id, index),
+        ).fetchone()
+        return self._decode_body(row[0]) if row is not None else None
+
+    def save_conversation(self, conversation: Dict[str, Any]):
+        with self.index.write() as conn:
+            self.index.upsert_conversation(conn, conversation)
+            conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation["id"],))
+            conn.executemany(
+                "INSERT INTO messages (conversation_id, position, body) VALUES (?, ?, ?)",
+                [
+                    (conversation["id"], position, self._encode_body(message))
+                    for position, message in enumerate(conversation.get("messages", []))
+                ],
+            )
+
+    def exists(self, conversation_id: str) -> bool:
+        row = self.index.connection().execute(
+            "SELECT 1 FROM conversations WHERE id = ?", (conversation_id,)
+        ).fetchone()
+        return row is not None
+
+    def apply(self, conversation_id: str, ops: List[Dict[str, Any]]):
+        with self.index.write() as conn:
+            row = conn.execute(
+                "SELECT message_count FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Conversation {conversation_id} not found")
+            position = row[0]
+            for op in ops:
+                if op["op"] == "add_message":
+                    conn.execute(
+                        "INSERT INTO messages (conversation_id, position, body) VALUES (?, ?, ?)",
+                        (conversation_id, position, self._encode_body(op["message"])),
+                    )
+                    position += 1
+                    self.index.message_added(conn, conversation_id, op["message"])
+                elif op["op"] == "set_title":
+                    self.index.set_title(conn, conversation_id, op["title"])
+
+    def list_conversations(self) -> List[Dict[str, Any]]:
+        return self.index.list_all()
+
+    def list_conversations_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        title_prefix: Optional[str] = None,
+        council_type: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return self.index.page(limit, cursor, title_prefix, council_type)
+
+    def delete_conversation(self, conversation_id: str) -> bool:
+        with self.index.write() as conn:
+            conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+            return self.index.delete(conn, conversation_id)
+
+    def close(self):
+        self.index.close()
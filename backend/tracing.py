@@ -0,0 +1,201 @@
+"""Timing spans for council runs.
+
+A run collects spans in a Trace kept in a context variable, so stages and
+model calls made from any task of the run record themselves without the
+trace being passed around (the same mechanism as backend/budget.py).
+Outside a trace every helper here is a no-op.
+
+Stage spans give each stage's start and duration. Model call spans give,
+per query_model call:
+    queue_wait_s     until the first request left the upstream scheduler
+    ttfb_s           until the first byte of the answer
+    duration_s       until the call returned
+    attempts         requests sent (retries and hedges included)
+    prompt_chars / completion_chars, usage (OpenRouter token counts)
+    outcome          ok, cached, error, timeout, skipped (circuit open),
+                     budget (latency budget exhausted) or cancelled
+All times are seconds; start_s is relative to the start of the trace.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+from .metrics import STAGE_LATENCY
+
+
+class CallSpan:
+    """Timing of one query_model call."""
+
+    def __init__(self, trace: "Trace", model: str, stage: Optional[str], prompt_chars: int):
+        self.trace = trace
+        self.model = model
+        self.stage = stage
+        self.prompt_chars = prompt_chars
+        self.started = time.monotonic()
+        self.duration: Optional[float] = None
+        self.queue_wait: Optional[float] = None
+        self.ttfb: Optional[float] = None
+        self.attempts = 0
+        self.completion_chars: Optional[int] = None
+        self.usage: Optional[Dict[str, Any]] = None
+        self.outcome: Optional[str] = None
+        self.error: Optional[str] = None
+        self.shared = False
+        self.served_by: Optional[str] = None
+
+    def sent(self):
+        """A request was admitted by the scheduler and is being sent."""
+        self.attempts += 1
+        if self.queue_wait is None:
+            self.queue_wait = time.monotonic() - self.started
+
+    def first_byte(self):
+        if self.ttfb is None:
+            self.ttfb = time.monotonic() - self.started
+
+    def fail(self, outcome: str, error: Optional[str] = None):
+        """Record why the call produced no answer (the first reason wins)."""
+        if self.outcome is None:
+            self.outcome = outcome
+            self.error = error
+
+    def finish(self, response: Optional[Dict[str, Any]], outcome: Optional[str] = None):
+        """Close the span with the call's result."""
+        if self.duration is not None:
+            return
+        self.duration = time.monotonic() - self.started
+        if response is not None:
+            self.completion_chars = len(response.get("content") or "")
+            self.usage = response.get("usage")
+            self.served_by = response.get("served_by")
+            self.outcome = outcome or "ok"
+        else:
+            self.fail(outcome or "error")
+
+    def to_dict(self) -> Dict[str, Any]:
+        span = {
+            "model": self.model,
+            "stage": self.stage,
+            "start_s": _round(self.started - self.trace.started),
+            "duration_s": _round(self.duration),
+            "queue_wait_s": _round(self.queue_wait),
+            "ttfb_s": _round(self.ttfb),
+            "attempts": self.attempts,
+            "prompt_chars": self.prompt_chars,
+            "completion_chars": self.completion_chars,
+            "usage": self.usage,
+            "outcome": self.outcome,
+        }
+        if self.error:
+            span["error"] = self.error
+        if self.shared:
+            span["shared"] = True
+        if self.served_by:
+            span["served_by"] = self.served_by
+        return span
+
+
+class Trace:
+    """Stage and model call spans of one council run."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.stages: List[Dict[str, Any]] = []
+        self.calls: List[CallSpan] = []
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-serializable spans so far (stored as metadata["timings"])."""
+        return {
+            "total_s": _round(time.monotonic() - self.started),
+            "stages": list(self.stages),
+            "calls": [call.to_dict() for call in self.calls],
+        }
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("council_trace", default=None)
+_stage: ContextVar[Optional[str]] = ContextVar("council_stage", default=None)
+_call: ContextVar[Optional[CallSpan]] = ContextVar("council_call", default=None)
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
+
+
+@contextmanager
+def trace() -> Iterator[Trace]:
+    """Collect spans for the block; joins the enclosing trace if there is one."""
+    current = _trace.get()
+    if current is not None:
+        yield current
+        return
+    new = Trace()
+    token = _trace.set(new)
+    try:
+        yield new
+    finally:
+        _trace.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Record the block as a stage span; model calls inside are tagged with it."""
+    current = _trace.get()
+    if current is None:
+        yield
+        return
+    started = time.monotonic()
+    token = _stage.set(name)
+    outcome = "ok"
+    try:
+        yield
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    except Exception as e:
+        outcome = f"error: {type(e).__name__}"
+        raise
+    finally:
+        _stage.reset(token)
+        duration = time.monotonic() - started
+        current.stages.append({
+            "name": name,
+            "start_s": _round(started - current.started),
+            "duration_s": _round(duration),
+            "outcome": outcome,
+        })
+        STAGE_LATENCY.observe(duration, stage=name)
+
+
+@contextmanager
+def model_call(model: str, messages: List[Dict[str, str]]) -> Iterator[Optional[CallSpan]]:
+    """
+    Span for one query_model call (None outside a trace). The caller closes
+    it with span.finish(response); a call that raises is closed here.
+    """
+    current = _trace.get()
+    if current is None:
+        yield None
+        return
+    span = CallSpan(current, model, _stage.get(), sum(len(m.get("content") or "") for m in messages))
+    current.calls.append(span)
+    token = _call.set(span)
+    try:
+        yield span
+    except asyncio.CancelledError:
+        span.fail("cancelled")
+        raise
+    finally:
+        _call.reset(token)
+        span.finish(None)
+
+
+def current() -> Optional[Trace]:
+    """The trace collecting spans in this context, if any."""
+    return _trace.get()
+
+
+def current_call() -> Optional[CallSpan]:
+    """Span of the query_model call running in this context, if traced."""
+    return _call.get()
@@ -0,0 +1 @@
+"""Benchmarks for LLM Council (run as `python -m benchmarks.<name>`)."""
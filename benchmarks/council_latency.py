@@ -0,0 +1,267 @@
+"""Latency and throughput of the council runners against a local fake OpenRouter.
+
+Starts benchmarks/fake_openrouter.py on a free port (or uses --url), points
+the backend at it, and runs each council type at every concurrency level.
+For each combination it reports p50/p95/p99 run latency, throughput,
+upstream calls per run (counted by the stub) and event-loop lag. Results
+can be saved as JSON and compared against an earlier run.
+
+The scheduler's per-key rate limit defaults to 20 requests/minute for
+OpenRouter's free tier, which would dominate every measurement; it is
+lifted here unless SCHEDULER_KEY_RPM is set. The response cache stays
+enabled but every run sends a unique question, so it never hits.
+
+Usage:
+    python -m benchmarks.council_latency [--councils default,round_table,hierarchy,assembly_line]
+        [--concurrency 1,4,16] [--runs 16] [--profile profile.json]
+        [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+COUNCILS = ["default", "round_table", "hierarchy", "assembly_line"]
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Linearly interpolated percentile (p in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stub(profile: Optional[str], seed: int) -> tuple:
+    """Run the fake OpenRouter in a subprocess; returns (process, base url)."""
+    port = _free_port()
+    command = [sys.executable, "-m", "benchmarks.fake_openrouter", "--port", str(port), "--seed", str(seed)]
+    if profile:
+        command += ["--profile", profile]
+    process = subprocess.Popen(command)
+    base = f"http://127.0.0.1:{port}"
+
+    for _ in range(100):
+        try:
+            httpx.get(base + "/", timeout=0.5)
+            return process, base
+        except httpx.HTTPError:
+            if process.poll() is not None:
+                raise RuntimeError("Fake OpenRouter failed to start")
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Fake OpenRouter did not come up")
+
+
+def _runner(council: str):
+    """Coroutine function running one council for a question."""
+    from backend.council import run_full_council
+    from backend.councils import run_round_table_council, run_hierarchy_council, run_assembly_line_council
+
+    return {
+        "default": run_full_council,
+        "round_table": lambda query: run_round_table_council(query, iterations=2),
+        "hierarchy": run_hierarchy_council,
+        "assembly_line": run_assembly_line_council,
+    }[council]
+
+
+async def _probe_loop_lag(stop: asyncio.Event, lags: List[float], interval: float = 0.01):
+    """Record how late the loop wakes a sleeper (scheduling delay)."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def _upstream_calls(client: httpx.AsyncClient) -> int:
+    stats = (await client.get("/stats")).json()
+    return sum(counts.get("calls", 0) for counts in stats.values())
+
+
+async def measure(council: str, concurrency: int, runs: int, stub: httpx.AsyncClient) -> Dict[str, Any]:
+    """Run one council type `runs` times, at most `concurrency` at once."""
+    run_council = _runner(council)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failures = 0
+
+    async def one(index: int):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await run_council(f"Benchmark question {index} ({uuid.uuid4().hex})")
+            except Exception as e:
+                failures += 1
+                print(f"{council} run failed: {e}")
+                return
+            latencies.append(time.perf_counter() - start)
+
+    calls_before = await _upstream_calls(stub)
+    stop = asyncio.Event()
+    lags: List[float] = []
+    probe = asyncio.create_task(_probe_loop_lag(stop, lags))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(runs)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe
+    calls = await _upstream_calls(stub) - calls_before
+
+    return {
+        "council": council,
+        "concurrency": concurrency,
+        "runs": runs,
+        "failures": failures,
+        "p50_s": percentile(latencies, 50) if latencies else None,
+        "p95_s": percentile(latencies, 95) if latencies else None,
+        "p99_s": percentile(latencies, 99) if latencies else None,
+        "throughput_rps": len(latencies) / elapsed,
+        "upstream_calls": calls,
+        "calls_per_run": calls / runs,
+        "loop_lag_p99_s": percentile(lags, 99) if lags else 0.0,
+        "loop_lag_max_s": max(lags) if lags else 0.0,
+    }
+
+
+async def run(councils: List[str], levels: List[int], runs: int, base_url: str) -> List[Dict[str, Any]]:
+    from backend import openrouter
+
+    await openrouter.init_client()
+    rows = []
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=10) as stub:
+            for council in councils:
+                for concurrency in levels:
+                    print(f"Running {council} at concurrency {concurrency}...")
+                    rows.append(await measure(council, concurrency, max(runs, concurrency), stub))
+    finally:
+        await openrouter.close_client()
+    return rows
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_header():
+    print(f"{'council':<14} {'conc':>4} {'runs':>4} {'fail':>4} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} "
+          f"{'runs/s':>7} {'calls/run':>9} {'lag p99':>8}")
+
+
+def _print_row(row: Dict[str, Any]):
+    def seconds(value):
+        return f"{value:>7.2f}" if value is not None else f"{'-':>7}"
+
+    print(f"{row['council']:<14} {row['concurrency']:>4} {row['runs']:>4} {row['failures']:>4} "
+          f"{seconds(row['p50_s'])} {seconds(row['p95_s'])} {seconds(row['p99_s'])} "
+          f"{row['throughput_rps']:>7.2f} {row['calls_per_run']:>9.1f} {row['loop_lag_p99_s']:>8.3f}")
+
+
+def compare(rows: List[Dict[str, Any]], baseline_path: str):
+    """Print the relative change of each metric against a saved result file."""
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+    previous = {(row["council"], row["concurrency"]): row for row in baseline["results"]}
+
+    print(f"\nChange vs {baseline_path} (revision {baseline.get('revision')}):")
+    print(f"{'council':<14} {'conc':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'runs/s':>8} {'calls/run':>10}")
+    for row in rows:
+        old = previous.get((row["council"], row["concurrency"]))
+        if old is None:
+            continue
+
+        def change(key):
+            if not old.get(key) or row.get(key) is None:
+                return f"{'-':>8}"
+            return f"{(row[key] - old[key]) / old[key]:>+8.1%}"
+
+        print(f"{row['council']:<14} {row['concurrency']:>4} {change('p50_s')} {change('p95_s')} "
+              f"{change('p99_s')} {change('throughput_rps')} {change('calls_per_run'):>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--councils", default=",".join(COUNCILS), help="Comma-separated council types")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--runs", type=int, default=16, help="Runs per level (at least the concurrency)")
+    parser.add_argument("--profile", help="Stub latency/error profile (see benchmarks/fake_openrouter.py)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="Base URL of an already running stub instead of starting one")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    councils = [c.strip() for c in args.councils.split(",") if c.strip()]
+    unknown = set(councils) - set(COUNCILS)
+    if unknown:
+        parser.error(f"Unknown council type(s): {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    process = None
+    base_url = args.url
+    if base_url is None:
+        process, base_url = start_stub(args.profile, args.seed)
+
+    # Must be set before backend.config is imported
+    os.environ["OPENROUTER_API_URL"] = base_url.rstrip("/") + "/api/v1/chat/completions"
+    os.environ.setdefault("SCHEDULER_KEY_RPM", "0")
+    os.environ.setdefault("RESPONSE_CACHE_DISK", "0")
+    os.environ.setdefault("OPENROUTER_API_KEY", "benchmark")
+
+    try:
+        rows = asyncio.run(run(councils, levels, args.runs, base_url))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    # Printed at the end, clear of the backend's own log lines
+    print()
+    _print_header()
+    for row in rows:
+        _print_row(row)
+
+    result = {
+        "revision": _git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "profile": args.profile,
+        "seed": args.seed,
+        "results": rows,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+    if args.compare:
+        compare(rows, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Local OpenAI-compatible stand-in for OpenRouter's chat completions API.
+
+Answers every model with canned text (ending in a FINAL RANKING block so
+Stage 2 parsing works) after a simulated delay, optionally failing with
+503s or rate limiting with 429 + Retry-After, and streams SSE chunks when
+the request asks for it. Behaviour is set per model by a JSON profile:
+
+    {
+      "default": {
+        "latency": {"dist": "lognormal", "median": 1.5, "sigma": 0.4},
+        "error_rate": 0.02,
+        "rate_limit_rate": 0.0,
+        "retry_after": 1,
+        "tokens": 120,
+        "token_interval": 0.01
+      },
+      "models": {
+        "meta-llama/llama-3.1-405b-instruct:free": {"latency": {"dist": "fixed", "value": 3}}
+      }
+    }
+
+Latency is the time to the first byte; "dist" is "fixed" (value),
+"uniform" (low, high), "lognormal" (median, sigma) or "exponential"
+(mean). Model entries override the default key by key. Request counts per
+model are served at GET /stats (reset with POST /stats/reset).
+
+Usage:
+    python -m benchmarks.fake_openrouter [--port 9100] [--profile profile.json] [--seed 0]
+    OPENROUTER_API_URL=http://127.0.0.1:9100/api/v1/chat/completions uv run python -m backend.main
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_MODEL_PROFILE: Dict[str, Any] = {
+    "latency": {"dist": "lognormal", "median": 1.0, "sigma": 0.3},
+    "error_rate": 0.0,
+    "rate_limit_rate": 0.0,
+    "retry_after": 1,
+    "tokens": 80,
+    "token_interval": 0.005,
+}
+
+WORDS = "the council considered each answer carefully and found the reasoning sound overall".split()
+
+
+def sample_latency(spec: Dict[str, Any], rng: random.Random) -> float:
+    """Draw a delay in seconds from a latency spec (see module docstring)."""
+    dist = spec.get("dist", "fixed")
+    if dist == "fixed":
+        return float(spec.get("value", 0.0))
+    if dist == "uniform":
+        return rng.uniform(spec["low"], spec["high"])
+    if dist == "lognormal":
+        return rng.lognormvariate(0.0, spec.get("sigma", 0.3)) * spec["median"]
+    if dist == "exponential":
+        return rng.expovariate(1.0 / spec["mean"])
+    raise ValueError(f"Unknown latency distribution: {dist}")
+
+
+class Profile:
+    """Per-model behaviour of the stub."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.default = {**DEFAULT_MODEL_PROFILE, **config.get("default", {})}
+        self.models = config.get("models", {})
+
+    def for_model(self, model: str) -> Dict[str, Any]:
+        return {**self.default, **self.models.get(model, {})}
+
+
+def _answer(model: str, tokens: int, rng: random.Random) -> list:
+    """Canned answer split into word tokens, ending in a parseable ranking."""
+    words = [f"{model}:"] + [rng.choice(WORDS) for _ in range(max(0, tokens - 8))]
+    ranking = "\n\nFINAL RANKING:\n1. Response A\n2. Response B\n3. Response C"
+    return [word + " " for word in words] + [ranking]
+
+
+def create_app(profile: Optional[Profile] = None, seed: Optional[int] = None) -> FastAPI:
+    """Build the stub application."""
+    profile = profile or Profile()
+    rng = random.Random(seed)
+    stats: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    app = FastAPI(title="Fake OpenRouter")
+
+    @app.head("/")
+    @app.get("/")
+    async def root():
+        # Target of the client's connection warm-up
+        return {"status": "ok"}
+
+    @app.get("/stats")
+    async def get_stats():
+        """Requests per model: calls, streamed, errors, rate_limited."""
+        return {model: dict(counts) for model, counts in stats.items()}
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        stats.clear()
+        return {"status": "ok"}
+
+    @app.post("/api/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body["model"]
+        behaviour = profile.for_model(model)
+        counts = stats[model]
+        counts["calls"] += 1
+
+        if rng.random() < behaviour["rate_limit_rate"]:
+            counts["rate_limited"] += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit exceeded", "code": 429}},
+                status_code=429,
+                headers={"Retry-After": str(behaviour["retry_after"])},
+            )
+        if rng.random() < behaviour["error_rate"]:
+            counts["errors"] += 1
+            return JSONResponse({"error": {"message": "Upstream error", "code": 503}}, status_code=503)
+
+        delay = sample_latency(behaviour["latency"], rng)
+        tokens = _answer(model, behaviour["tokens"], rng)
+        interval = behaviour["token_interval"]
+        usage = {
+            "prompt_tokens": sum(len(m.get("content", "").split()) for m in body.get("messages", [])),
+            "completion_tokens": len(tokens),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if body.get("stream"):
+            counts["streamed"] += 1
+
+            async def events():
+                await asyncio.sleep(delay)
+                for token in tokens:
+                    chunk = {"model": model, "choices": [{"index": 0, "delta": {"content": token}}]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                    if interval:
+                        await asyncio.sleep(interval)
+                final = {"model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep(delay + interval * len(tokens))
+        return {
+            "id": "fake",
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--profile", help="JSON profile file (see module docstring)")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for latency/error sampling")
+    args = parser.parse_args()
+
+    config = None
+    if args.profile:
+        with open(args.profile, "r") as f:
+            config = json.load(f)
+
+    import uvicorn
+    uvicorn.run(create_app(Profile(config), args.seed), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
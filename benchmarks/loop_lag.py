@@ -0,0 +1,107 @@
+"""Event-loop lag caused by conversation storage writes.
+
+Concurrent writers save large conversations either by calling
+backend/storage.py directly on the loop (the pre-thread-pool behaviour)
+or through backend/async_storage.py. Meanwhile a probe measures how late
+the loop wakes up a sleeping task, which is the delay every other
+request and SSE stream would see.
+
+Usage:
+    python -m benchmarks.loop_lag [--writers 10] [--saves 5] [--size-kb 2048] [--backend file]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from .council_latency import percentile
+
+
+async def _probe(stop: asyncio.Event, lags: List[float], interval: float = 0.005):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+def _conversation(conversation_id: str, size_kb: int) -> Dict[str, Any]:
+    answer = {"model": "bench/model", "response": "lorem ipsum dolor sit amet " * 16}
+    per_message = len(answer["response"]) * 4
+    messages = [
+        {"role": "assistant", "council_type": "default", "stage1": [answer] * 4}
+        for _ in range(max(1, size_kb * 1024 // per_message))
+    ]
+    return {"id": conversation_id, "created_at": "2025-01-01T00:00:00", "title": "bench", "messages": messages}
+
+
+async def run(mode: str, writers: int, saves: int, size_kb: int) -> Dict[str, Any]:
+    """Measure loop lag while `writers` tasks each save a conversation `saves` times."""
+    from backend import async_storage, storage
+
+    async def writer(index: int):
+        conversation_id = f"{mode}-{index}"
+        conversation = _conversation(conversation_id, size_kb)
+        if mode == "sync":
+            storage.create_conversation(conversation_id)
+        else:
+            await async_storage.create_conversation(conversation_id)
+        for _ in range(saves):
+            if mode == "sync":
+                storage.save_conversation(conversation)
+                # Let the other writers and the probe in between saves
+                await asyncio.sleep(0)
+            else:
+                await async_storage.save_conversation(conversation)
+
+    stop = asyncio.Event()
+    lags: List[float] = []
+    probe = asyncio.create_task(_probe(stop, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*(writer(i) for i in range(writers)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    async_storage.shutdown()
+
+    return {
+        "mode": mode,
+        "elapsed_s": elapsed,
+        "lag_p50_s": percentile(lags, 50),
+        "lag_p99_s": percentile(lags, 99),
+        "lag_max_s": max(lags),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=10)
+    parser.add_argument("--saves", type=int, default=5, help="Saves per writer")
+    parser.add_argument("--size-kb", type=int, default=2048, help="Approximate conversation size")
+    parser.add_argument("--backend", choices=["file", "sqlite"], default="file")
+    args = parser.parse_args()
+
+    # Keep the benchmark's conversations out of the real data directory
+    from backend import storage
+    from backend.storage_backends import FileBackend, SQLiteBackend
+    data_dir = tempfile.mkdtemp(prefix="llm-council-bench-")
+    if args.backend == "sqlite":
+        storage.set_backend(SQLiteBackend(os.path.join(data_dir, "conversations.sqlite3")))
+    else:
+        storage.set_backend(FileBackend(data_dir))
+
+    print(f"{args.writers} writers x {args.saves} saves of ~{args.size_kb} KB ({args.backend} backend)")
+    print(f"{'mode':<6} {'elapsed s':>10} {'lag p50':>8} {'lag p99':>8} {'lag max':>8}")
+    for mode in ("sync", "async"):
+        row = asyncio.run(run(mode, args.writers, args.saves, args.size_kb))
+        print(f"{row['mode']:<6} {row['elapsed_s']:>10.2f} {row['lag_p50_s']:>8.3f} "
+              f"{row['lag_p99_s']:>8.3f} {row['lag_max_s']:>8.3f}")
+    storage.set_backend(None)
+    shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
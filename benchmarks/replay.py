@@ -0,0 +1,134 @@
+"""Replay recorded OpenRouter traffic through the API endpoints, offline.
+
+Serves the app (backend/main.py) with a cassette in replay mode (see
+backend/cassette.py), sends each question through
+POST /api/conversations/{id}/message/stream and measures time to the
+first SSE event and to the final one. Requests are matched by their
+exact body, so the questions must be the ones asked while recording, each
+as the first message of a new conversation, with the same council type
+and models.
+
+Record a cassette first, with the response cache off so every call reaches
+the recording (replay turns it off as well):
+    OPENROUTER_CASSETTE_MODE=record OPENROUTER_CASSETTE=traffic.jsonl RESPONSE_CACHE_ENABLED=0 \
+        uv run python -m backend.main
+
+Usage:
+    python -m benchmarks.replay --cassette traffic.jsonl --questions questions.txt
+        [--council default] [--speed 1] [--concurrency 1] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from .council_latency import percentile
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _ask(client: httpx.AsyncClient, question: str, council: str) -> Dict[str, Any]:
+    conversation = (await client.post("/api/conversations", json={})).json()
+    start = time.perf_counter()
+    first = None
+    last_type = None
+    async with client.stream(
+        "POST",
+        f"/api/conversations/{conversation['id']}/message/stream",
+        json={"content": question, "council_type": council},
+    ) as response:
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            if first is None:
+                first = time.perf_counter() - start
+            last_type = json.loads(line[len("data: "):])["type"]
+    return {"first_event_s": first, "total_s": time.perf_counter() - start, "outcome": last_type}
+
+
+async def run(questions: List[str], council: str, concurrency: int) -> List[Dict[str, Any]]:
+    import uvicorn
+    from backend.main import app
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(question: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await _ask(client, question, council)
+
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+            return await asyncio.gather(*(one(question) for question in questions))
+    finally:
+        server.should_exit = True
+        await serving
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cassette", required=True, help="Recorded traffic (JSON Lines)")
+    parser.add_argument("--questions", required=True, help="Text file, one question per line")
+    parser.add_argument("--council", default="default")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed (0 = no recorded delays)")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--output", help="Write per-question results to this JSON file")
+    args = parser.parse_args()
+
+    with open(args.questions, "r", encoding="utf-8") as f:
+        questions = [line.strip() for line in f if line.strip()]
+
+    # Must be set before backend.config is imported. The response cache would
+    # answer repeated questions without touching the cassette.
+    os.environ["OPENROUTER_CASSETTE_MODE"] = "replay"
+    os.environ["OPENROUTER_CASSETTE"] = args.cassette
+    os.environ["OPENROUTER_REPLAY_SPEED"] = str(args.speed)
+    os.environ["RESPONSE_CACHE_ENABLED"] = "0"
+    os.environ.setdefault("SCHEDULER_KEY_RPM", "0")
+
+    # Keep replayed conversations and job logs out of the real data directory
+    from backend import storage
+    from backend.jobs import job_manager
+    from backend.storage_backends import FileBackend
+    data_dir = tempfile.mkdtemp(prefix="llm-council-replay-")
+    storage.set_backend(FileBackend(data_dir))
+    job_manager.log_dir = os.path.join(data_dir, ".jobs")
+
+    try:
+        results = asyncio.run(run(questions, args.council, args.concurrency))
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    totals = [r["total_s"] for r in results]
+    firsts = [r["first_event_s"] for r in results if r["first_event_s"] is not None]
+    outcomes = [r["outcome"] for r in results]
+    print(f"{len(results)} questions, council {args.council}, speed {args.speed}, concurrency {args.concurrency}")
+    print(f"total      p50 {percentile(totals, 50):.2f}s  p95 {percentile(totals, 95):.2f}s  max {max(totals):.2f}s")
+    if firsts:
+        print(f"1st event  p50 {percentile(firsts, 50):.3f}s  p95 {percentile(firsts, 95):.3f}s")
+    print(f"completed {outcomes.count('complete')}/{len(outcomes)}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"council": args.council, "speed": args.speed, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
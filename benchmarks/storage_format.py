@@ -0,0 +1,152 @@
+"""Size and load time of stored conversations per on-disk format.
+
+Compares the original pretty-printed JSON (format 1) with compact JSON
+and its gzip/zstd-compressed variants (format 2) on synthetic council
+transcripts shaped like real ones: four Stage 1 answers, four Stage 2
+critiques and a chairman answer per default turn, and N rounds of four
+responses per round-table turn.
+
+Usage:
+    python -m benchmarks.storage_format [--conversations 20] [--turns 10] [--repeat 3]
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from backend.storage_backends import codec
+from backend.storage_backends.codec import DocumentCodec
+
+WORDS = (
+    "the council model answer response ranking evaluation because however therefore "
+    "consider approach result accuracy insight argument evidence clearly strong weak "
+    "response a b c d final synthesis question context example detail overall which "
+    "provides more less better worse complete missing perspective reasoning analysis"
+).split()
+
+MODELS = [
+    "openai/gpt-oss-20b:free",
+    "google/gemma-3-27b-it:free",
+    "mistralai/mistral-7b-instruct:free",
+    "meta-llama/llama-3.3-70b-instruct:free",
+]
+
+
+def _text(rng: random.Random, words: int) -> str:
+    """Markdown-ish prose of roughly the given number of words."""
+    paragraphs = []
+    while words > 0:
+        n = min(words, rng.randint(40, 120))
+        paragraphs.append(" ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + ".")
+        words -= n
+    return "\n\n".join(paragraphs)
+
+
+def _default_turn(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "role": "assistant",
+        "council_type": "default",
+        "stage1": [{"model": m, "response": _text(rng, 450)} for m in MODELS],
+        "stage2": [
+            {
+                "model": m,
+                "ranking": _text(rng, 350) + "\n\nFINAL RANKING:\n1. Response A\n2. Response C\n3. Response B\n4. Response D",
+                "parsed_ranking": ["Response A", "Response C", "Response B", "Response D"],
+            }
+            for m in MODELS
+        ],
+        "stage3": {"model": MODELS[0], "response": _text(rng, 600)},
+    }
+
+
+def _round_table_turn(rng: random.Random, rounds: int = 3) -> Dict[str, Any]:
+    return {
+        "role": "assistant",
+        "council_type": "round_table",
+        "iterations": [
+            {"round": r + 1, "responses": [{"model": m, "response": _text(rng, 400)} for m in MODELS]}
+            for r in range(rounds)
+        ],
+        "synthesis": {"model": MODELS[0], "response": _text(rng, 600)},
+    }
+
+
+def make_conversation(rng: random.Random, index: int, turns: int) -> Dict[str, Any]:
+    """A synthetic conversation alternating default and round-table turns."""
+    messages: List[Dict[str, Any]] = []
+    for turn in range(turns):
+        messages.append({"role": "user", "content": _text(rng, 30)})
+        messages.append(_default_turn(rng) if turn % 2 == 0 else _round_table_turn(rng))
+    return {
+        "id": f"bench-{index}",
+        "created_at": "2025-01-01T00:00:00",
+        "title": f"Benchmark conversation {index}",
+        "messages": messages,
+    }
+
+
+def _variants() -> List[Tuple[str, Callable[[dict], bytes]]]:
+    variants = [
+        ("v1 pretty json (indent=2)", lambda doc: json.dumps(doc, indent=2).encode("utf-8")),
+        ("v2 compact", DocumentCodec(compression="none").encode),
+        ("v2 compact + gzip", DocumentCodec(compression="gzip", compress_min_bytes=0).encode),
+    ]
+    if codec.zstandard is not None:
+        variants.append(("v2 compact + zstd", DocumentCodec(compression="zstd", compress_min_bytes=0).encode))
+    return variants
+
+
+def _best_of(repeat: int, func: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(conversations: int, turns: int, repeat: int) -> List[Dict[str, Any]]:
+    """
+    Encode and decode the synthetic corpus in every format.
+
+    Returns:
+        One row per format: total bytes, encode and decode seconds (best of `repeat`)
+    """
+    rng = random.Random(42)
+    corpus = [make_conversation(rng, i, turns) for i in range(conversations)]
+
+    rows = []
+    for name, encode in _variants():
+        encoded = [encode(doc) for doc in corpus]
+        assert all(DocumentCodec.decode(data) == doc for data, doc in zip(encoded, corpus))
+        rows.append({
+            "format": name,
+            "bytes": sum(len(data) for data in encoded),
+            "encode_s": _best_of(repeat, lambda: [encode(doc) for doc in corpus]),
+            "decode_s": _best_of(repeat, lambda: [DocumentCodec.decode(data) for data in encoded]),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=10, help="Council turns per conversation")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    rows = run(args.conversations, args.turns, args.repeat)
+    baseline = rows[0]
+    print(f"JSON encoder: {'orjson' if codec.orjson is not None else 'json (stdlib)'}")
+    print(f"{'format':<28} {'MiB':>8} {'ratio':>7} {'encode s':>9} {'load s':>9} {'load x':>7}")
+    for row in rows:
+        print(
+            f"{row['format']:<28} {row['bytes'] / 2**20:>8.2f} {row['bytes'] / baseline['bytes']:>7.2f} "
+            f"{row['encode_s']:>9.3f} {row['decode_s']:>9.3f} {baseline['decode_s'] / row['decode_s']:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
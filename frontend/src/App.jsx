@@ -208,6 +208,21 @@ function App() {
             });
             break;
 
+          case 'stage1_response':
+            // One model finished: show its full answer without waiting for the rest
+            applyToCache((conv) => {
+              const messages = [...(conv.messages || [])];
+              const lastMsg = messages[messages.length - 1];
+              if (!lastMsg) return conv;
+              const stage1 = [...(lastMsg.stage1 || [])];
+              const idx = stage1.findIndex((r) => r.model === event.data.model);
+              if (idx === -1) stage1.push(event.data);
+              else stage1[idx] = event.data;
+              messages[messages.length - 1] = { ...lastMsg, stage1 };
+              return { ...conv, messages };
+            });
+            break;
+
           case 'stage1_complete':
             applyToCache((conv) => {
               const messages = [...(conv.messages || [])];
@@ -263,6 +278,35 @@ function App() {
             });
             break;
 
+          case 'token':
+            // Streamed text for Stage 1 answers and the chairman; other
+            // councils render once council_complete arrives.
+            applyToCache((conv) => {
+              const messages = [...(conv.messages || [])];
+              const lastMsg = messages[messages.length - 1];
+              if (!lastMsg) return conv;
+              if (event.stage === 'stage1') {
+                const stage1 = [...(lastMsg.stage1 || [])];
+                const idx = stage1.findIndex((r) => r.model === event.model);
+                if (idx === -1) {
+                  stage1.push({ model: event.model, response: event.delta });
+                } else {
+                  stage1[idx] = { ...stage1[idx], response: stage1[idx].response + event.delta };
+                }
+                messages[messages.length - 1] = { ...lastMsg, stage1 };
+              } else if (event.stage === 'stage3') {
+                const stage3 = {
+                  model: event.model,
+                  response: (lastMsg.stage3?.response || '') + event.delta,
+                };
+                messages[messages.length - 1] = { ...lastMsg, stage3 };
+              } else {
+                return conv;
+              }
+              return { ...conv, messages };
+            });
+            break;
+
           case 'title_complete':
             // update title in backend and refresh list
             loadConversations();
@@ -275,6 +319,13 @@ function App() {
             setRunningConversationId(null);
             break;
 
+          case 'cancelled':
+            // The server gave up on the turn while we were disconnected; the partial answer was saved
+            loadConversations();
+            setIsLoading(false);
+            setRunningConversationId(null);
+            break;
+
           case 'error':
             console.error('Stream error:', event.message);
             setIsLoading(false);
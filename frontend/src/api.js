@@ -4,6 +4,48 @@
 
 const API_BASE = 'http://localhost:8001';
 
+// Reconnects to a council job's event stream before giving up
+const MAX_RESUME_ATTEMPTS = 5;
+
+// Events after which a job's stream ends
+const FINAL_EVENTS = new Set(['complete', 'error', 'cancelled']);
+
+/**
+ * Read an SSE response, passing events to onEvent and recording the
+ * last event id and whether a final event arrived in state.
+ */
+async function readEventStream(response, state, onEvent) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  // Token events are small and frequent, so a network chunk can end
+  // mid-line; keep the trailing partial line until the rest arrives.
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+
+    for (const line of lines) {
+      if (line.startsWith('id: ')) {
+        state.lastEventId = Number(line.slice(4));
+      } else if (line.startsWith('data: ')) {
+        const data = line.slice(6);
+        try {
+          const event = JSON.parse(data);
+          if (FINAL_EVENTS.has(event.type)) state.finished = true;
+          onEvent(event.type, event);
+        } catch (e) {
+          console.error('Failed to parse SSE event:', e);
+        }
+      }
+    }
+  }
+}
+
 export const api = {
   /**
    * List all conversations.
@@ -106,27 +148,43 @@ export const api = {
       throw new Error('Failed to send message');
     }
 
-    const reader = response.body.getReader();
-    const decoder = new TextDecoder();
-
-    while (true) {
-      const { done, value } = await reader.read();
-      if (done) break;
-
-      const chunk = decoder.decode(value);
-      const lines = chunk.split('\n');
-
-      for (const line of lines) {
-        if (line.startsWith('data: ')) {
-          const data = line.slice(6);
-          try {
-            const event = JSON.parse(data);
-            onEvent(event.type, event);
-          } catch (e) {
-            console.error('Failed to parse SSE event:', e);
-          }
-        }
+    // The council keeps running server-side as a job; if the connection
+    // drops before the final event, reattach from the last event seen.
+    const jobId = response.headers.get('X-Job-Id');
+    const state = { lastEventId: 0, finished: false };
+    try {
+      await readEventStream(response, state, onEvent);
+    } catch (e) {
+      if (!jobId) throw e;
+    }
+
+    for (let attempt = 1; jobId && !state.finished; attempt++) {
+      if (attempt > MAX_RESUME_ATTEMPTS) {
+        throw new Error('Lost connection to the council');
+      }
+      await new Promise((resolve) => setTimeout(resolve, 500 * 2 ** (attempt - 1)));
+      let resumed;
+      try {
+        resumed = await fetch(`${API_BASE}/api/jobs/${jobId}/events`, {
+          headers: { 'Last-Event-ID': String(state.lastEventId) },
+        });
+      } catch (e) {
+        console.error('Failed to resume council stream:', e);
+        continue;
+      }
+      if (resumed.status === 404) {
+        throw new Error('Council job no longer available');
+      }
+      if (!resumed.ok) continue;
+
+      const before = state.lastEventId;
+      try {
+        await readEventStream(resumed, state, onEvent);
+      } catch (e) {
+        console.error('Council stream interrupted:', e);
       }
+      // Progress resets the backoff
+      if (state.lastEventId > before) attempt = 0;
     }
   },
 };
@@ -185,6 +185,12 @@ export default function ChatInterface({
                     )}
                   </div>
 
+                  {msg.status === 'incomplete' && (
+                    <div className="incomplete-notice">
+                      This answer did not finish: {msg.error}
+                    </div>
+                  )}
+
                   {/* Round Table View */}
                   {msg.council_type === 'round_table' && (
                     <>
@@ -0,0 +1,74 @@
+"""Event-loop lag of storage writes made through backend/async_storage.py."""
+
+import asyncio
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+from backend import async_storage, storage
+from backend.storage_backends import FileBackend, SQLiteBackend
+
+WRITERS = 8
+SAVES = 3
+
+
+def _conversation(conversation_id: str, size_kb: int = 1024) -> Dict[str, Any]:
+    answer = {"model": "test/model", "response": "lorem ipsum dolor sit amet " * 16}
+    per_message = len(answer["response"]) * 4
+    messages = [
+        {"role": "assistant", "council_type": "default", "stage1": [answer] * 4}
+        for _ in range(max(1, size_kb * 1024 // per_message))
+    ]
+    return {"id": conversation_id, "created_at": "2025-01-01T00:00:00", "title": "test", "messages": messages}
+
+
+async def _loop_lag_p99(mode: str) -> float:
+    """p99 delay in waking a sleeping task while WRITERS tasks save conversations."""
+    lags: List[float] = []
+    stop = asyncio.Event()
+
+    async def probe(interval: float = 0.005):
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(time.perf_counter() - start - interval)
+
+    async def writer(index: int):
+        conversation = _conversation(f"{mode}-{index}")
+        if mode == "on_loop":
+            storage.create_conversation(conversation["id"])
+        else:
+            await async_storage.create_conversation(conversation["id"])
+        for _ in range(SAVES):
+            if mode == "on_loop":
+                storage.save_conversation(conversation)
+                await asyncio.sleep(0)
+            else:
+                await async_storage.save_conversation(conversation)
+
+    probe_task = asyncio.create_task(probe())
+    await asyncio.gather(*(writer(i) for i in range(WRITERS)))
+    stop.set()
+    await probe_task
+
+    lags.sort()
+    return lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        storage.set_backend(SQLiteBackend(str(tmp_path / "conversations.sqlite3")))
+    else:
+        storage.set_backend(FileBackend(str(tmp_path)))
+    yield request.param
+    async_storage.shutdown()
+    storage.set_backend(None)
+
+
+def test_concurrent_writes_keep_the_loop_responsive(backend):
+    # Compared within one run, so a slow or busy machine slows both alike
+    on_loop = asyncio.run(_loop_lag_p99("on_loop"))
+    off_loop = asyncio.run(_loop_lag_p99("async"))
+    assert off_loop < on_loop / 3, {"on_loop_p99_s": on_loop, "async_p99_s": off_loop}